@@ -1,6 +1,6 @@
 from django.contrib import admin
 from django.utils.html import format_html
-from .models import FoodItem, Order, OrderItem
+from .models import Auditorium, FoodItem, Order, OrderItem, PaymentTransaction, Seat, Show
 
 
 class OrderItemInline(admin.TabularInline):
@@ -35,20 +35,31 @@ class FoodItemAdmin(admin.ModelAdmin):
 class OrderAdmin(admin.ModelAdmin):
     list_display = [
         'id', 'customer_name', 'seat_number', 'payment_method', 
-        'payment_status', 'total_amount', 'created_at'
+        'payment_status', 'fulfilment_status', 'total_amount', 'created_at'
     ]
-    list_filter = ['payment_method', 'payment_status', 'created_at']
-    search_fields = ['customer_name', 'seat_number', 'mobile_number']
+    list_filter = ['show', 'payment_method', 'payment_status', 'fulfilment_status', 'created_at']
+    search_fields = ['customer_name', 'seat_number', 'mobile_number', 'payment_reference']
     list_editable = ['payment_status']
-    readonly_fields = ['total_amount', 'created_at', 'updated_at']
+    # Fulfilment only moves through the kitchen queue, which enforces transitions
+    readonly_fields = [
+        'total_amount', 'payment_reference', 'fulfilment_status', 'claimed_by', 'preparing_at', 'ready_at',
+        'delivered_at', 'cancelled_at', 'created_at', 'updated_at'
+    ]
     inlines = [OrderItemInline]
+    raw_id_fields = ['seat']
     
     fieldsets = (
         ('Customer Information', {
             'fields': ('customer_name', 'seat_number', 'mobile_number')
         }),
+        ('Show', {
+            'fields': ('show', 'seat')
+        }),
         ('Payment', {
-            'fields': ('payment_method', 'payment_status', 'total_amount')
+            'fields': ('payment_method', 'payment_status', 'payment_reference', 'total_amount')
+        }),
+        ('Fulfilment', {
+            'fields': ('fulfilment_status', 'claimed_by', 'preparing_at', 'ready_at', 'delivered_at', 'cancelled_at')
         }),
         ('Timestamps', {
             'fields': ('created_at', 'updated_at'),
@@ -70,3 +81,31 @@ class OrderItemAdmin(admin.ModelAdmin):
     def subtotal(self, obj):
         return f"₹{obj.subtotal}"
     subtotal.short_description = 'Subtotal'
+
+
+@admin.register(Auditorium)
+class AuditoriumAdmin(admin.ModelAdmin):
+    list_display = ['name', 'rows', 'seats_per_row']
+    search_fields = ['name']
+
+
+@admin.register(Show)
+class ShowAdmin(admin.ModelAdmin):
+    list_display = ['title', 'auditorium', 'starts_at', 'ends_at']
+    list_filter = ['auditorium', 'starts_at']
+    search_fields = ['title']
+
+
+@admin.register(Seat)
+class SeatAdmin(admin.ModelAdmin):
+    list_display = ['label', 'auditorium', 'row', 'number']
+    list_filter = ['auditorium', 'row']
+
+
+@admin.register(PaymentTransaction)
+class PaymentTransactionAdmin(admin.ModelAdmin):
+    list_display = ['transaction_id', 'payment_reference', 'order', 'amount', 'status', 'result', 'received_at']
+    list_filter = ['result', 'status', 'received_at']
+    search_fields = ['transaction_id', 'payment_reference']
+    raw_id_fields = ['order']
+    readonly_fields = ['received_at']
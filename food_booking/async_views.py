@@ -0,0 +1,134 @@
+from django.http import Http404, JsonResponse
+from django.shortcuts import render
+from django.views.decorators.cache import cache_control
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import condition, require_POST
+from .cart import CartOperationError, aget_cart, apply_operations
+from .events import live_streams_enabled
+from .conditional import menu_etag, menu_last_modified, order_etag, order_last_modified
+from .menu_cache import aget_menu_snapshot, get_menu_item, render_menu_items
+from .models import Order
+from .theatre import remember_show
+import json
+
+
+# Async versions of the customer views, used when FOOD_BOOKING_ASYNC_VIEWS is
+# on and the site is served through movie_ticket.asgi. Everything that could
+# touch the database or cache is awaited up front and stored on the request,
+# where the shared ETag / Last-Modified helpers and the cart pick it up.
+
+
+async def _prepare(request):
+    """Load the user, cart and menu snapshot with the async APIs"""
+    # Templates read request.user, which would otherwise load synchronously.
+    # This also loads the session, so later message and cart reads are in memory.
+    request.user = await request.auser()
+    await aget_cart(request)
+    request._menu_snapshot = await aget_menu_snapshot()
+    return request._menu_snapshot
+
+
+async def menu_view(request):
+    """Display the food menu"""
+    await _prepare(request)
+    response = await _render_menu(request)
+    remember_show(request, response)
+    return response
+
+
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=menu_etag, last_modified_func=menu_last_modified)
+async def _render_menu(request):
+    """Render the menu from data already loaded by menu_view"""
+    snapshot = request._menu_snapshot
+    context = {
+        'food_items': snapshot['food_items'],
+        'menu_items_html': render_menu_items(request, snapshot),
+        **request._cart.summary(snapshot)
+    }
+    return render(request, 'food_booking/menu.html', context)
+
+
+async def order_confirmation(request, order_id):
+    """Display order confirmation"""
+    request.user = await request.auser()
+    request._order_updated_at = await Order.objects.filter(pk=order_id).values_list('updated_at', flat=True).afirst()
+    return await _render_order_confirmation(request, order_id)
+
+
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=order_etag, last_modified_func=order_last_modified)
+async def _render_order_confirmation(request, order_id):
+    """Render the confirmation with its items fetched through the async ORM"""
+    try:
+        order = await Order.objects.aget(id=order_id)
+    except Order.DoesNotExist:
+        raise Http404('No Order matches the given query.')
+    order_items = [item async for item in order.orderitem_set.select_related('food_item').aiterator()]
+
+    context = {
+        'order': order,
+        'order_items': order_items,
+        'live_streams': live_streams_enabled(),
+        'cart_count': 0  # No cart items on confirmation page
+    }
+    return render(request, 'food_booking/order_confirmation.html', context)
+
+
+# API endpoints for AJAX requests
+@csrf_exempt
+@require_POST
+async def api_add_to_cart(request):
+    """API endpoint for adding items to cart via AJAX"""
+    try:
+        data = json.loads(request.body)
+        food_item_id = data.get('food_item_id')
+        quantity = int(data.get('quantity', 1))
+
+        if not food_item_id or quantity < 1:
+            return JsonResponse({'success': False, 'message': 'Invalid data'})
+
+        snapshot = await _prepare(request)
+        food_item = get_menu_item(food_item_id, snapshot)
+        if food_item is None:
+            return JsonResponse({'success': False, 'message': 'Invalid request'})
+
+        request._cart.add(food_item_id, quantity)
+        summary = request._cart.summary(snapshot)
+
+        return JsonResponse({
+            'success': True,
+            'message': f'{food_item.name} added to cart!',
+            'cart_total': float(summary['cart_total']),
+            'cart_count': summary['cart_count']
+        })
+
+    except (json.JSONDecodeError, ValueError):
+        return JsonResponse({'success': False, 'message': 'Invalid request'})
+    except Exception as e:
+        return JsonResponse({'success': False, 'message': str(e)})
+
+
+@csrf_exempt
+@require_POST
+async def api_cart_batch(request):
+    """API endpoint applying several cart changes in one request"""
+    try:
+        data = json.loads(request.body)
+    except (json.JSONDecodeError, UnicodeDecodeError):
+        return JsonResponse({'success': False, 'message': 'Invalid request'})
+
+    snapshot = await _prepare(request)
+    cart = request._cart
+    try:
+        apply_operations(cart, data.get('operations') if isinstance(data, dict) else None, snapshot)
+    except CartOperationError as e:
+        return JsonResponse({'success': False, 'message': str(e), 'operation': e.index})
+
+    summary = cart.summary(snapshot)
+    return JsonResponse({
+        'success': True,
+        'items': {str(line['id']): line['quantity'] for line in summary['cart']},
+        'cart_total': float(summary['cart_total']),
+        'cart_count': summary['cart_count']
+    })
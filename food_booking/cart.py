@@ -0,0 +1,327 @@
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.module_loading import import_string
+from .forms import CartItemForm, UpdateCartForm
+from .menu_cache import get_menu_item, get_menu_snapshot
+from decimal import Decimal
+import secrets
+
+
+CART_COOKIE_NAME = 'cart'
+CART_COOKIE_SALT = 'food_booking.cart'
+CART_ID_COOKIE_NAME = 'cart_id'
+CART_MAX_AGE = 60 * 60 * 6
+
+DEFAULT_CART_BACKEND = 'food_booking.cart.SignedCookieCartBackend'
+
+# Upper bound on operations accepted in one batch request
+MAX_BATCH_OPERATIONS = 50
+
+
+def encode_items(items):
+    """Compact text form of a cart, e.g. ``3:2,7:1``"""
+    return ','.join(f'{item_id}:{quantity}' for item_id, quantity in items.items())
+
+
+def decode_items(value):
+    """Parse the compact text form, ignoring anything malformed"""
+    items = {}
+    for pair in (value or '').split(','):
+        item_id, _, quantity = pair.partition(':')
+        if item_id.isdigit() and quantity.isdigit() and int(quantity) > 0:
+            items[int(item_id)] = int(quantity)
+    return items
+
+
+class SessionCartBackend:
+    """Store the cart in the Django session"""
+
+    def load(self, request):
+        return self._decode(request.session.get('cart'))
+
+    async def aload(self, request):
+        return self._decode(await request.session.aget('cart'))
+
+    def save(self, request, response, items):
+        if items:
+            request.session['cart'] = self._encode(items)
+        else:
+            request.session.pop('cart', None)
+
+    async def asave(self, request, response, items):
+        if items:
+            await request.session.aset('cart', self._encode(items))
+        else:
+            await request.session.apop('cart', None)
+
+    def _encode(self, items):
+        return {str(item_id): quantity for item_id, quantity in items.items()}
+
+    def _decode(self, value):
+        items = {}
+        for item_id, value in (value or {}).items():
+            # Carts saved before the compact format held a dict per item
+            quantity = value['quantity'] if isinstance(value, dict) else value
+            items[int(item_id)] = int(quantity)
+        return items
+
+
+class SignedCookieCartBackend:
+    """Store the cart in a signed cookie, so cart changes never touch the server"""
+
+    def load(self, request):
+        return decode_items(request.get_signed_cookie(
+            CART_COOKIE_NAME, default='', salt=CART_COOKIE_SALT, max_age=CART_MAX_AGE
+        ))
+
+    def save(self, request, response, items):
+        if items:
+            response.set_signed_cookie(
+                CART_COOKIE_NAME, encode_items(items), salt=CART_COOKIE_SALT,
+                max_age=CART_MAX_AGE, httponly=True, samesite='Lax'
+            )
+        else:
+            response.delete_cookie(CART_COOKIE_NAME, samesite='Lax')
+
+    # Cookies need no I/O, so the async API is the sync one
+    async def aload(self, request):
+        return self.load(request)
+
+    async def asave(self, request, response, items):
+        self.save(request, response, items)
+
+
+class CacheCartBackend:
+    """Store the cart in Django's cache under a random id kept in a cookie"""
+
+    def _key(self, cart_id):
+        return f'food_booking:cart:{cart_id}'
+
+    def load(self, request):
+        cart_id = request.COOKIES.get(CART_ID_COOKIE_NAME)
+        if not cart_id:
+            return {}
+        return decode_items(cache.get(self._key(cart_id)))
+
+    async def aload(self, request):
+        cart_id = request.COOKIES.get(CART_ID_COOKIE_NAME)
+        if not cart_id:
+            return {}
+        return decode_items(await cache.aget(self._key(cart_id)))
+
+    def save(self, request, response, items):
+        cart_id = request.COOKIES.get(CART_ID_COOKIE_NAME)
+        if not items:
+            if cart_id:
+                cache.delete(self._key(cart_id))
+                response.delete_cookie(CART_ID_COOKIE_NAME, samesite='Lax')
+            return
+        cache.set(self._key(self._cart_id(request, response)), encode_items(items), CART_MAX_AGE)
+
+    async def asave(self, request, response, items):
+        cart_id = request.COOKIES.get(CART_ID_COOKIE_NAME)
+        if not items:
+            if cart_id:
+                await cache.adelete(self._key(cart_id))
+                response.delete_cookie(CART_ID_COOKIE_NAME, samesite='Lax')
+            return
+        await cache.aset(self._key(self._cart_id(request, response)), encode_items(items), CART_MAX_AGE)
+
+    def _cart_id(self, request, response):
+        """Existing cart id, or a new one sent back in a cookie"""
+        cart_id = request.COOKIES.get(CART_ID_COOKIE_NAME)
+        if not cart_id:
+            cart_id = secrets.token_urlsafe(16)
+            response.set_cookie(CART_ID_COOKIE_NAME, cart_id, max_age=CART_MAX_AGE, httponly=True, samesite='Lax')
+        return cart_id
+
+
+def get_cart_backend():
+    """Cart backend chosen by the FOOD_BOOKING_CART_BACKEND setting"""
+    return import_string(getattr(settings, 'FOOD_BOOKING_CART_BACKEND', DEFAULT_CART_BACKEND))()
+
+
+class Cart:
+    """Customer cart held as compact ``{item_id: quantity}`` pairs
+
+    Names and prices are not stored; they are looked up in the cached menu
+    snapshot when the cart is displayed, so items that became unavailable
+    simply drop out.
+    """
+
+    def __init__(self, backend, items):
+        self.backend = backend
+        self.items = items
+        self.modified = False
+
+    def __contains__(self, item_id):
+        return int(item_id) in self.items
+
+    def add(self, item_id, quantity):
+        """Add quantity of an item to the cart"""
+        item_id = int(item_id)
+        self.items[item_id] = self.items.get(item_id, 0) + quantity
+        self.modified = True
+
+    def set(self, item_id, quantity):
+        """Set the quantity of an item, removing it when quantity is zero"""
+        if quantity <= 0:
+            self.remove(item_id)
+            return
+        self.items[int(item_id)] = quantity
+        self.modified = True
+
+    def remove(self, item_id):
+        """Remove an item from the cart"""
+        if self.items.pop(int(item_id), None) is not None:
+            self.modified = True
+
+    def clear(self):
+        """Empty the cart"""
+        if self.items:
+            self.items = {}
+            self.modified = True
+
+    def lines(self, snapshot=None):
+        """Cart lines with name and price resolved from the cached menu"""
+        menu = {item.id: item for item in (snapshot or get_menu_snapshot())['food_items']}
+        return [
+            {
+                'id': item_id,
+                'name': menu[item_id].name,
+                'price': menu[item_id].price,
+                'quantity': quantity,
+                'subtotal': menu[item_id].price * quantity,
+            }
+            for item_id, quantity in self.items.items()
+            if item_id in menu
+        ]
+
+    def summary(self, snapshot=None):
+        """Lines plus total and item count for templates and JSON responses"""
+        lines = self.lines(snapshot)
+        return {
+            'cart': lines,
+            'cart_total': sum((line['subtotal'] for line in lines), Decimal('0.00')),
+            'cart_count': sum(line['quantity'] for line in lines),
+        }
+
+    def save(self, request, response):
+        """Persist the cart through the configured backend"""
+        self.backend.save(request, response, self.items)
+        self.modified = False
+
+    async def asave(self, request, response):
+        """Persist the cart through the configured backend's async API"""
+        await self.backend.asave(request, response, self.items)
+        self.modified = False
+
+
+class CartOperationError(ValueError):
+    """A batch cart operation that could not be applied"""
+
+    def __init__(self, message, index=None):
+        super().__init__(message)
+        self.index = index
+
+
+def _validated_quantity(form, index):
+    """Quantity from a cart form, raising CartOperationError when invalid"""
+    if not form.is_valid():
+        raise CartOperationError('Invalid quantity or item', index)
+    return form.cleaned_data['quantity']
+
+
+def apply_operations(cart, operations, snapshot=None):
+    """Apply a list of add/set/remove operations to the cart, all or nothing
+
+    Each operation is a dict such as ``{"op": "add", "food_item_id": 3,
+    "quantity": 2}``, ``{"op": "set", "food_item_id": 3, "quantity": 0}`` or
+    ``{"op": "remove", "food_item_id": 3}``. Quantities follow the same
+    limits as the HTML cart forms. If any operation is invalid the cart is
+    left untouched.
+    """
+    if not isinstance(operations, list) or not operations:
+        raise CartOperationError('No operations given')
+    if len(operations) > MAX_BATCH_OPERATIONS:
+        raise CartOperationError(f'At most {MAX_BATCH_OPERATIONS} operations per request')
+
+    items = dict(cart.items)
+    for index, operation in enumerate(operations):
+        if not isinstance(operation, dict):
+            raise CartOperationError('Invalid operation', index)
+        op = operation.get('op')
+        item_id = operation.get('food_item_id')
+
+        if op == 'add':
+            quantity = _validated_quantity(CartItemForm({'food_item_id': item_id, 'quantity': operation.get('quantity', 1)}), index)
+        elif op == 'set':
+            quantity = _validated_quantity(UpdateCartForm({'item_id': item_id, 'quantity': operation.get('quantity')}), index)
+        elif op == 'remove':
+            quantity = 0
+        else:
+            raise CartOperationError(f'Unknown operation {op!r}', index)
+
+        try:
+            item_id = int(item_id)
+        except (TypeError, ValueError):
+            raise CartOperationError('Invalid item', index)
+
+        if quantity and get_menu_item(item_id, snapshot) is None:
+            raise CartOperationError('Item not found or not available.', index)
+
+        if op == 'add':
+            items[item_id] = items.get(item_id, 0) + quantity
+        elif quantity:
+            items[item_id] = quantity
+        else:
+            items.pop(item_id, None)
+
+    if items != cart.items:
+        cart.items = items
+        cart.modified = True
+
+
+def get_cart(request):
+    """Return the cart for this request, loading it once"""
+    if getattr(request, '_cart', None) is None:
+        backend = get_cart_backend()
+        request._cart = Cart(backend, backend.load(request))
+    return request._cart
+
+
+async def aget_cart(request):
+    """Async counterpart of get_cart; later get_cart calls reuse the result"""
+    if getattr(request, '_cart', None) is None:
+        backend = get_cart_backend()
+        request._cart = Cart(backend, await backend.aload(request))
+    return request._cart
+
+
+class CartMiddleware:
+    """Save the cart after the view has run if it was changed"""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        response = self.get_response(request)
+        cart = getattr(request, '_cart', None)
+        if cart is not None and cart.modified:
+            cart.save(request, response)
+        return response
+
+    async def __acall__(self, request):
+        response = await self.get_response(request)
+        cart = getattr(request, '_cart', None)
+        if cart is not None and cart.modified:
+            await cart.asave(request, response)
+        return response
@@ -0,0 +1,173 @@
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from collections import Counter
+from decimal import Decimal, InvalidOperation
+from itertools import islice
+from .menu_cache import bump_menu_version
+from .models import FoodItem
+import csv
+import json
+
+
+# Catalogue rows validated, compared and written per query
+CATALOGUE_CHUNK_SIZE = 500
+
+# Columns of a catalogue file; name is the key items are matched on
+CATALOGUE_FIELDS = ['name', 'description', 'price', 'available']
+ITEM_FIELDS = CATALOGUE_FIELDS[1:]
+
+FORMATS = ['csv', 'json', 'jsonl']
+
+TRUE_VALUES = {'1', 'true', 'yes', 'y', 'on'}
+FALSE_VALUES = {'0', 'false', 'no', 'n', 'off'}
+
+
+class CatalogueError(ValueError):
+    """Raised for a catalogue row that cannot be imported"""
+
+    def __init__(self, message, line=None):
+        super().__init__(f'Line {line}: {message}' if line is not None else message)
+        self.line = line
+
+
+def parse_available(value, line=None):
+    """Read an availability flag, treating a missing one as available"""
+    if value is None or isinstance(value, bool):
+        return value is not False
+    value = str(value).strip().lower()
+    if value and value not in TRUE_VALUES | FALSE_VALUES:
+        raise CatalogueError(f'Invalid available flag {value!r}', line)
+    return value not in FALSE_VALUES
+
+
+def parse_item(row, line=None):
+    """Validated, unsaved FoodItem for one catalogue row"""
+    if not isinstance(row, dict):
+        raise CatalogueError('Not a catalogue item', line)
+    try:
+        price = Decimal(str(row.get('price')).strip()).quantize(Decimal('0.01'))
+    except InvalidOperation:
+        raise CatalogueError(f"Invalid price {row.get('price')!r}", line)
+
+    item = FoodItem(
+        name=str(row.get('name') or '').strip(),
+        description=str(row.get('description') or '').strip(),
+        price=price,
+        available=parse_available(row.get('available'), line),
+    )
+    try:
+        # Uniqueness is the upsert's job, so only the field rules are checked here
+        item.full_clean(validate_unique=False, validate_constraints=False)
+    except ValidationError as e:
+        raise CatalogueError('; '.join(
+            f"{field}: {' '.join(messages)}" for field, messages in e.message_dict.items()
+        ), line)
+    return item
+
+
+def read_catalogue_csv(file):
+    """Items from a catalogue CSV, read lazily"""
+    for line, row in enumerate(csv.DictReader(file), start=2):
+        yield parse_item(row, line)
+
+
+def read_catalogue_jsonl(file):
+    """Items from a catalogue in JSON Lines, one object per line, read lazily"""
+    for line, text in enumerate(file, start=1):
+        if text.strip():
+            try:
+                row = json.loads(text)
+            except ValueError:
+                raise CatalogueError('Invalid JSON', line)
+            yield parse_item(row, line)
+
+
+def read_catalogue_json(data):
+    """Items from a JSON list of catalogue objects"""
+    if not isinstance(data, list):
+        raise CatalogueError('Expected a list of items')
+    for line, row in enumerate(data, start=1):
+        yield parse_item(row, line)
+
+
+def import_catalogue(items, chunk_size=CATALOGUE_CHUNK_SIZE, dry_run=False):
+    """Create or update items by name, chunk_size at a time
+
+    Each chunk costs one lookup of the items it names and one INSERT ... ON
+    CONFLICT (name) DO UPDATE for the new and changed ones; unchanged items
+    are not written. The import is one transaction, so a bad row leaves the
+    catalogue as it was. bulk_create sends no post_save, so the menu is
+    invalidated once after commit rather than once per item.
+
+    Returns counts of created, updated and unchanged items, and the changes
+    as (name, action, {field: (old, new)}) in file order.
+    """
+    counts, changes, seen = Counter(created=0, updated=0, unchanged=0), [], set()
+    items = iter(items)
+    with transaction.atomic():
+        while True:
+            chunk = list(islice(items, chunk_size))
+            if not chunk:
+                break
+            for item in chunk:
+                if item.name in seen:
+                    raise CatalogueError(f'{item.name!r} appears more than once')
+                seen.add(item.name)
+            for change in _import_chunk(chunk, dry_run):
+                counts[change[1]] += 1
+                if change[1] != 'unchanged':
+                    changes.append(change)
+
+        if not dry_run and (counts['created'] or counts['updated']):
+            transaction.on_commit(bump_menu_version)
+    return counts, changes
+
+
+def _import_chunk(items, dry_run):
+    current = FoodItem.objects.in_bulk([item.name for item in items], field_name='name')
+    changes, writes = [], []
+    for item in items:
+        existing = current.get(item.name)
+        if existing is None:
+            changes.append((item.name, 'created', {field: (None, getattr(item, field)) for field in ITEM_FIELDS}))
+            writes.append(item)
+            continue
+        diff = {
+            field: (getattr(existing, field), getattr(item, field))
+            for field in ITEM_FIELDS if getattr(existing, field) != getattr(item, field)
+        }
+        changes.append((item.name, 'updated' if diff else 'unchanged', diff))
+        if diff:
+            writes.append(item)
+
+    if writes and not dry_run:
+        FoodItem.objects.bulk_create(
+            writes, update_conflicts=True, unique_fields=['name'], update_fields=ITEM_FIELDS + ['updated_at']
+        )
+    return changes
+
+
+def catalogue_rows():
+    """Every item, available or not, as plain catalogue rows, streamed from the database"""
+    rows = FoodItem.objects.order_by('name').values_list(*CATALOGUE_FIELDS)
+    for name, description, price, available in rows.iterator(chunk_size=CATALOGUE_CHUNK_SIZE):
+        yield {'name': name, 'description': description, 'price': str(price), 'available': available}
+
+
+def export_catalogue(file, fmt='csv'):
+    """Write the catalogue as CSV, a JSON list or JSON Lines; returns the item count"""
+    count = 0
+    if fmt == 'csv':
+        writer = csv.DictWriter(file, fieldnames=CATALOGUE_FIELDS)
+        writer.writeheader()
+        for count, row in enumerate(catalogue_rows(), start=1):
+            writer.writerow({**row, 'available': 'yes' if row['available'] else 'no'})
+    elif fmt == 'jsonl':
+        for count, row in enumerate(catalogue_rows(), start=1):
+            file.write(json.dumps(row) + '\n')
+    else:
+        file.write('[')
+        for count, row in enumerate(catalogue_rows(), start=1):
+            file.write((',\n ' if count > 1 else '\n ') + json.dumps(row))
+        file.write('\n]\n')
+    return count
@@ -0,0 +1,79 @@
+from django.contrib import messages
+from .cart import encode_items, get_cart
+from .menu_cache import get_menu_snapshot
+from .models import Order
+from .seat_tokens import read_seat_token
+import hashlib
+
+
+def has_pending_messages(request):
+    """Check for flash messages that a 304 response would never show"""
+    return len(messages.get_messages(request)) > 0
+
+
+def cart_digest(request):
+    """Short digest of the cart so cart changes change the ETag"""
+    items = get_cart(request).items
+    if not items:
+        return 'empty'
+    encoded = encode_items(dict(sorted(items.items()))).encode()
+    return hashlib.sha1(encoded).hexdigest()[:16]
+
+
+def _menu_snapshot(request):
+    """Fetch the menu snapshot once per request for both validators"""
+    if not hasattr(request, '_menu_snapshot'):
+        request._menu_snapshot = get_menu_snapshot()
+    return request._menu_snapshot
+
+
+def menu_etag(request):
+    """ETag for the menu page: menu snapshot version plus the cart"""
+    if has_pending_messages(request):
+        return None
+    return f"menu-{_menu_snapshot(request)['version']}-{cart_digest(request)}"
+
+
+def menu_last_modified(request):
+    """Latest FoodItem.updated_at, only while the page has no per-session content"""
+    if has_pending_messages(request) or get_cart(request).items:
+        return None
+    return _menu_snapshot(request)['last_modified']
+
+
+def seat_menu_etag(request, token):
+    """ETag for a seat's order page: the menu version and the seat, nothing per customer"""
+    if has_pending_messages(request) or read_seat_token(token) is None:
+        return None
+    return f"seat-{_menu_snapshot(request)['version']}-{hashlib.sha1(token.encode()).hexdigest()[:16]}"
+
+
+def seat_menu_last_modified(request, token):
+    """Latest FoodItem.updated_at for a seat's order page"""
+    if has_pending_messages(request) or read_seat_token(token) is None:
+        return None
+    return _menu_snapshot(request)['last_modified']
+
+
+def _order_updated_at(request, order_id):
+    """Fetch Order.updated_at once per request for both validators"""
+    if not hasattr(request, '_order_updated_at'):
+        request._order_updated_at = Order.objects.filter(pk=order_id).values_list('updated_at', flat=True).first()
+    return request._order_updated_at
+
+
+def order_etag(request, order_id):
+    """ETag for the order confirmation page, derived from Order.updated_at"""
+    if has_pending_messages(request):
+        return None
+    updated_at = _order_updated_at(request, order_id)
+    if updated_at is None:
+        return None
+    return f'order-{order_id}-{updated_at.timestamp()}'
+
+
+def order_last_modified(request, order_id):
+    """Order.updated_at for the order confirmation page"""
+    if has_pending_messages(request):
+        return None
+    return _order_updated_at(request, order_id)
@@ -0,0 +1,96 @@
+from django.utils import timezone
+from datetime import timedelta
+from .models import Order
+import re
+
+
+# Orders a runner can carry on one trip
+TRIP_CAPACITY = 6
+
+# Longest a ready order waits for a fuller trip before it is sent anyway
+MAX_WAIT = timedelta(minutes=3)
+
+# Where runners leave from and return to: in front of row A, by seat 1
+ENTRANCE = (0, 0)
+
+SEAT_PATTERN = re.compile(r'^\s*([A-Za-z])\s*-?\s*(\d{1,3})\s*$')
+
+
+def parse_seat(seat_number):
+    """Turn a seat label like "F12" into (row, column) = (6, 12), or None"""
+    match = SEAT_PATTERN.match(seat_number or '')
+    if not match:
+        return None
+    return ord(match.group(1).upper()) - ord('A') + 1, int(match.group(2))
+
+
+def walk_distance(a, b):
+    """Steps between two seats, walking along rows and aisles"""
+    return abs(a[0] - b[0]) + abs(a[1] - b[1])
+
+
+class Trip:
+    """One runner's batch of orders, in the order they should be delivered"""
+
+    def __init__(self, orders, due):
+        self.orders = orders
+        self.due = due
+
+    @property
+    def seats(self):
+        return [order.seat_number for order in self.orders]
+
+    @property
+    def distance(self):
+        """Walk from the entrance through every stop and back"""
+        points = [ENTRANCE] + [parse_seat(order.seat_number) or ENTRANCE for order in self.orders] + [ENTRANCE]
+        return sum(walk_distance(a, b) for a, b in zip(points, points[1:]))
+
+
+def nearest_neighbour_route(orders):
+    """Order stops by repeatedly walking to the closest undelivered seat"""
+    remaining = list(orders)
+    route = []
+    position = ENTRANCE
+    while remaining:
+        nearest = min(remaining, key=lambda order: (walk_distance(position, parse_seat(order.seat_number)), order.id))
+        remaining.remove(nearest)
+        route.append(nearest)
+        position = parse_seat(nearest.seat_number)
+    return route
+
+
+def plan_trips(orders, capacity=TRIP_CAPACITY, max_wait=MAX_WAIT, now=None):
+    """Group ready orders into runner trips
+
+    The longest-waiting order seeds each trip, which is filled with the
+    orders seated nearest to it up to capacity and then routed with a
+    nearest-neighbour walk. A trip is due once it is full or its oldest
+    order has waited max_wait; other trips are returned with due=False so
+    they can pick up more orders first. Orders whose seat cannot be parsed
+    are sent on their own.
+    """
+    now = now or timezone.now()
+    waiting = sorted(orders, key=lambda order: (order.ready_at or order.created_at, order.id))
+    trips = []
+
+    for order in [order for order in waiting if parse_seat(order.seat_number) is None]:
+        waiting.remove(order)
+        trips.append(Trip([order], due=True))
+
+    while waiting:
+        seed = waiting.pop(0)
+        seat = parse_seat(seed.seat_number)
+        waiting.sort(key=lambda order: (walk_distance(seat, parse_seat(order.seat_number)), order.id))
+        batch, waiting = [seed] + waiting[:capacity - 1], waiting[capacity - 1:]
+        waiting.sort(key=lambda order: (order.ready_at or order.created_at, order.id))
+
+        due = len(batch) >= capacity or now - (seed.ready_at or seed.created_at) >= max_wait
+        trips.append(Trip(nearest_neighbour_route(batch), due))
+
+    return trips
+
+
+def ready_orders():
+    """Orders waiting for a runner, from the fulfilment index"""
+    return Order.objects.filter(fulfilment_status='READY').order_by('ready_at', 'id')
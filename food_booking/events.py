@@ -0,0 +1,113 @@
+from django.conf import settings
+from django.utils.module_loading import import_string
+from collections import defaultdict
+import asyncio
+import json
+import threading
+
+
+DEFAULT_EVENT_BROKER = 'food_booking.events.InProcessBroker'
+
+# Seconds between SSE comments that keep idle connections from timing out
+KEEPALIVE_SECONDS = 15
+
+
+class InProcessBroker:
+    """Fan events out to async subscribers in this process
+
+    Events may be published from any thread (usually a transaction.on_commit
+    hook in a sync view); each subscriber is woken on its own event loop.
+    A broker for several processes, e.g. backed by Redis pub/sub, only needs
+    the same ``publish``, ``subscribe`` and ``unsubscribe`` methods.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers = defaultdict(set)
+
+    def publish(self, channel, event):
+        with self._lock:
+            subscribers = list(self._subscribers.get(channel, ()))
+        for loop, queue in subscribers:
+            try:
+                loop.call_soon_threadsafe(queue.put_nowait, event)
+            except RuntimeError:
+                # The subscriber's event loop has already shut down
+                self.unsubscribe(channel, (loop, queue))
+
+    def subscribe(self, channel):
+        subscription = (asyncio.get_running_loop(), asyncio.Queue())
+        with self._lock:
+            self._subscribers[channel].add(subscription)
+        return subscription
+
+    def unsubscribe(self, channel, subscription):
+        with self._lock:
+            subscribers = self._subscribers.get(channel)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[channel]
+
+
+_brokers = {}
+
+
+def get_broker():
+    """Broker chosen by the FOOD_BOOKING_EVENT_BROKER setting, one per process"""
+    path = getattr(settings, 'FOOD_BOOKING_EVENT_BROKER', DEFAULT_EVENT_BROKER)
+    if path not in _brokers:
+        _brokers[path] = import_string(path)()
+    return _brokers[path]
+
+
+def live_streams_enabled():
+    """Whether pages may hold server-sent event streams open (FOOD_BOOKING_LIVE_STREAMS)"""
+    return getattr(settings, 'FOOD_BOOKING_LIVE_STREAMS', False)
+
+
+def publish(channel, event):
+    """Send an event to everyone subscribed to channel"""
+    get_broker().publish(channel, event)
+
+
+class subscribe:
+    """``async with subscribe(channel) as queue`` receives the channel's events
+
+    A plain class rather than asynccontextmanager, so a stream closed while
+    waiting still unsubscribes cleanly when its generator is finalized.
+    """
+
+    def __init__(self, channel):
+        self.channel = channel
+        self.broker = get_broker()
+
+    async def __aenter__(self):
+        self.subscription = self.broker.subscribe(self.channel)
+        return self.subscription[1]
+
+    async def __aexit__(self, *exc_info):
+        self.broker.unsubscribe(self.channel, self.subscription)
+
+
+def order_channel(order_id):
+    """Channel carrying one order's status changes"""
+    return f'order:{order_id}'
+
+
+def sse_event(name, data):
+    """Format one Server-Sent Event"""
+    return f'event: {name}\ndata: {json.dumps(data)}\n\n'
+
+
+def sse_keepalive():
+    """SSE comment line, ignored by browsers"""
+    return ': keepalive\n\n'
+
+
+async def next_event(queue):
+    """Wait for the next event, or None after KEEPALIVE_SECONDS of silence"""
+    try:
+        return await asyncio.wait_for(queue.get(), KEEPALIVE_SECONDS)
+    except asyncio.TimeoutError:
+        return None
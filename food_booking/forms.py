@@ -33,8 +33,11 @@ class FoodItemForm(forms.ModelForm):
 class OrderForm(forms.ModelForm):
     """Form for customer order details"""
     
+    # Layout used when no auditorium is known: rows A-Z, seats 1-30
+    DEFAULT_SEAT_MAP = {row: list(range(1, 31)) for row in 'ABCDEFGHIJKLMNOPQRSTUVWXYZ'}
+    
     # Row choices: A-Z
-    ROW_CHOICES = [('', 'Select Row')] + [(row, row) for row in 'ABCDEFGHIJKLMNOPQRSTUVWXYZ']
+    ROW_CHOICES = [('', 'Select Row')] + [(row, row) for row in DEFAULT_SEAT_MAP]
     
     # Seat choices: 1-30 (will be populated dynamically)
     SEAT_CHOICES = [('', 'Select Seat')] + [(str(i), str(i)) for i in range(1, 31)]
@@ -75,7 +78,14 @@ class OrderForm(forms.ModelForm):
             })
         }
 
-
+    def __init__(self, *args, seat_map=None, **kwargs):
+        """Build the row and seat choices from the auditorium's seat map"""
+        super().__init__(*args, **kwargs)
+        self.seat_map = seat_map or self.DEFAULT_SEAT_MAP
+        self.fields['row_letter'].choices = [('', 'Select Row')] + [(row, row) for row in self.seat_map]
+        self.fields['seat_number'].choices = [('', 'Select Seat')] + [
+            (str(number), str(number)) for number in sorted({n for numbers in self.seat_map.values() for n in numbers})
+        ]
 
     def clean_customer_name(self):
         customer_name = self.cleaned_data['customer_name']
@@ -96,6 +106,9 @@ class OrderForm(forms.ModelForm):
         if not seat_number:
             raise forms.ValidationError("Please select a seat number.")
         
+        if int(seat_number) not in self.seat_map.get(row_letter, []):
+            raise forms.ValidationError(f"Seat {row_letter}{seat_number} does not exist in this auditorium.")
+        
         # Mobile number is required for all digital payment methods
         if payment_method in ['UPI', 'PHONEPE', 'GPAY', 'PAYTM', 'CARD']:
             if not mobile_number:
@@ -0,0 +1,91 @@
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+from .kitchen import announce_order, get_counters
+from .models import Order
+
+
+# Times a claim retries after another member of staff took the same order
+CLAIM_ATTEMPTS = 5
+
+
+class InvalidTransition(Exception):
+    """Raised when an order cannot move to the requested fulfilment status"""
+
+
+def _stage_changes(status, user=None):
+    """Field values written when an order enters status"""
+    now = timezone.now()
+    changes = {
+        'fulfilment_status': status,
+        Order.FULFILMENT_TIMESTAMPS[status]: now,
+        'updated_at': now,
+    }
+    if status == 'PREPARING' and user is not None:
+        changes['claimed_by'] = user
+    return changes
+
+
+def _announce_after_commit(order_id):
+    """Queryset updates skip post_save, so tell the kitchen screens directly"""
+    transaction.on_commit(lambda: announce_order(order_id))
+
+
+def advance_order(order, status, user=None):
+    """Move an order to status, enforcing the allowed transitions
+
+    The UPDATE only matches while the order is still in the status it was
+    read with, so two people acting on the same order cannot both succeed.
+    """
+    if status not in Order.FULFILMENT_TRANSITIONS.get(order.fulfilment_status, ()):
+        raise InvalidTransition(
+            f'Cannot move order {order.pk} from {order.get_fulfilment_status_display()} to {status}'
+        )
+
+    changes = _stage_changes(status, user)
+    updated = Order.objects.filter(pk=order.pk, fulfilment_status=order.fulfilment_status).update(**changes)
+    if not updated:
+        raise InvalidTransition(f'Order {order.pk} was changed by someone else')
+
+    for field, value in changes.items():
+        setattr(order, field, value)
+    _announce_after_commit(order.pk)
+    return order
+
+
+def claimable_orders(counter=None):
+    """Placed orders waiting for staff, oldest first, optionally for one counter"""
+    orders = Order.objects.filter(fulfilment_status='PLACED').exclude(payment_status='FAILED')
+    if counter is not None:
+        rows = Q()
+        for row in get_counters()[counter]:
+            rows |= Q(seat_number__startswith=row)
+        orders = orders.filter(rows)
+    return orders.order_by('created_at', 'id')
+
+
+def claim_next_order(user, counter=None):
+    """Assign the oldest placed order to user and start preparing it
+
+    On databases with SKIP LOCKED, staff claiming at the same moment lock
+    different rows. Elsewhere the guarded UPDATE makes one of them lose and
+    retry with the next order. Returns None when the queue is empty.
+    """
+    for _ in range(CLAIM_ATTEMPTS):
+        with transaction.atomic():
+            candidates = claimable_orders(counter)
+            if connection.features.has_select_for_update_skip_locked:
+                candidates = candidates.select_for_update(skip_locked=True)
+            order_id = candidates.values_list('id', flat=True).first()
+            if order_id is None:
+                return None
+
+            if Order.objects.filter(pk=order_id, fulfilment_status='PLACED').update(**_stage_changes('PREPARING', user)):
+                _announce_after_commit(order_id)
+                return Order.objects.get(pk=order_id)
+    return None
+
+
+def open_order_count():
+    """Orders not yet delivered or cancelled, counted from the fulfilment index"""
+    return Order.objects.filter(fulfilment_status__in=Order.OPEN_FULFILMENT_STATUSES).count()
@@ -0,0 +1,64 @@
+from django.utils import timezone
+from decimal import Decimal
+from .reconciliation import SETTLEMENT_FIELDS, sign
+import csv
+import json
+import random
+import uuid
+
+
+class GatewaySimulator:
+    """Offline stand-in for a payment gateway's settlement feed
+
+    Given the orders customers paid for, it produces the settlement lines a
+    gateway would send: mostly successes, some failures, and the usual noise
+    of amounts that disagree, references nobody issued and lines sent twice.
+    A seed makes the output repeatable for load tests.
+    """
+
+    def __init__(self, failure_rate=0.05, mismatch_rate=0.01, unknown_rate=0.01, duplicate_rate=0.02, seed=None):
+        self.failure_rate = failure_rate
+        self.mismatch_rate = mismatch_rate
+        self.unknown_rate = unknown_rate
+        self.duplicate_rate = duplicate_rate
+        self.random = random.Random(seed)
+
+    def transaction_id(self):
+        return 'TXN' + uuid.UUID(int=self.random.getrandbits(128)).hex.upper()
+
+    def settle(self, orders):
+        """Settlement lines for (payment_reference, total_amount) pairs"""
+        now = timezone.now()
+        lines = []
+        for reference, amount in orders:
+            amount = Decimal(amount)
+            roll = self.random.random()
+            if roll < self.unknown_rate:
+                reference = 'MS' + uuid.UUID(int=self.random.getrandbits(128)).hex[:16].upper()
+            elif roll < self.unknown_rate + self.mismatch_rate:
+                amount -= Decimal('1.00')
+
+            line = {
+                'transaction_id': self.transaction_id(),
+                'payment_reference': reference,
+                'amount': str(amount),
+                'status': 'FAILED' if self.random.random() < self.failure_rate else 'SUCCESS',
+                'settled_at': now.isoformat(),
+            }
+            lines.append(line)
+            if self.random.random() < self.duplicate_rate:
+                lines.append(dict(line))
+
+        self.random.shuffle(lines)
+        return lines
+
+    def write_csv(self, lines, file):
+        """Write lines as a settlement file"""
+        writer = csv.DictWriter(file, fieldnames=SETTLEMENT_FIELDS)
+        writer.writeheader()
+        writer.writerows(lines)
+
+    def webhook(self, lines, secret):
+        """Body and signature header value for a webhook carrying lines"""
+        body = json.dumps({'transactions': lines}).encode()
+        return body, sign(body, secret)
@@ -0,0 +1,49 @@
+from django.utils import timezone
+from datetime import timedelta
+from .models import IdempotencyKey
+import re
+import uuid
+
+
+# How long a submitted key keeps returning its original order
+IDEMPOTENCY_KEY_TTL = timedelta(hours=24)
+
+IDEMPOTENCY_HEADER = 'Idempotency-Key'
+IDEMPOTENCY_FIELD = 'idempotency_key'
+
+KEY_PATTERN = re.compile(r'^[A-Za-z0-9_-]{8,64}$')
+
+
+def new_key():
+    """Key rendered into the order form so a double submit sends it twice"""
+    return uuid.uuid4().hex
+
+
+def request_key(request):
+    """Idempotency key from the header or the posted form, or None if absent or malformed"""
+    key = request.headers.get(IDEMPOTENCY_HEADER) or request.POST.get(IDEMPOTENCY_FIELD, '')
+    key = key.strip()
+    return key if KEY_PATTERN.match(key) else None
+
+
+def _cutoff():
+    return timezone.now() - IDEMPOTENCY_KEY_TTL
+
+
+def replayed_order(key):
+    """Order already placed with key within the TTL, else None"""
+    if not key:
+        return None
+    stored = IdempotencyKey.objects.select_related('order').filter(key=key, created_at__gte=_cutoff()).first()
+    return stored.order if stored else None
+
+
+def remember(key, order):
+    """Record key for order inside the caller's transaction
+
+    Expired keys are cleared first so a reused key can be stored again.
+    Raises IntegrityError when another request stored the key first, which
+    rolls the caller's whole order back.
+    """
+    IdempotencyKey.objects.filter(created_at__lt=_cutoff()).delete()
+    IdempotencyKey.objects.create(key=key, order=order)
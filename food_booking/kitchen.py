@@ -0,0 +1,165 @@
+from django.conf import settings
+from .events import publish
+from .models import Order
+import threading
+
+
+# Rows served by each counter when FOOD_BOOKING_COUNTERS is not set
+DEFAULT_COUNTERS = {'main': 'ABCDEFGHIJKLMNOPQRSTUVWXYZ'}
+
+
+def get_counters():
+    """Counter names mapped to the seat rows they serve"""
+    return getattr(settings, 'FOOD_BOOKING_COUNTERS', DEFAULT_COUNTERS)
+
+
+def counter_for_seat(seat_number):
+    """Counter serving a seat, falling back to the first counter"""
+    counters = get_counters()
+    row = (seat_number or '')[:1].upper()
+    for counter, rows in counters.items():
+        if row and row in rows:
+            return counter
+    return next(iter(counters))
+
+
+def kitchen_channel(counter):
+    """Channel carrying one counter's order events"""
+    return f'kitchen:{counter}'
+
+
+def _with_details(orders):
+    """Load what order_summary needs without extra queries per order"""
+    return orders.select_related('claimed_by').prefetch_related('orderitem_set__food_item')
+
+
+def open_orders():
+    """Orders still waiting for the kitchen, from the fulfilment index"""
+    return _with_details(Order.objects.filter(
+        fulfilment_status__in=Order.OPEN_FULFILMENT_STATUSES
+    ).exclude(payment_status='FAILED')).order_by('id')
+
+
+def is_open(order):
+    """Whether an order belongs on the kitchen screens"""
+    return order.payment_status != 'FAILED' and order.fulfilment_status in Order.OPEN_FULFILMENT_STATUSES
+
+
+def order_summary(order):
+    """JSON-ready view of an order for kitchen screens"""
+    return {
+        'id': order.id,
+        'counter': counter_for_seat(order.seat_number),
+        'open': is_open(order),
+        'seat_number': order.seat_number,
+        'customer_name': order.customer_name,
+        'payment_method': order.payment_method,
+        'payment_status': order.payment_status,
+        'fulfilment_status': order.fulfilment_status,
+        'fulfilment_label': order.get_fulfilment_status_display(),
+        'next_statuses': sorted(Order.FULFILMENT_TRANSITIONS.get(order.fulfilment_status, ())),
+        'claimed_by': order.claimed_by.get_username() if order.claimed_by else None,
+        'total_amount': str(order.total_amount),
+        'created_at': order.created_at.isoformat(),
+        'items': [
+            {'name': item.food_item.name, 'quantity': item.quantity}
+            for item in order.orderitem_set.all()
+        ],
+    }
+
+
+class KitchenBoard:
+    """Open orders per counter, kept in memory and updated from order events
+
+    The board is filled from the database once per process, when the first
+    kitchen screen connects. After that every committed order change is
+    applied here before it is published, so screens never query.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._orders = None
+
+    @property
+    def loaded(self):
+        return self._orders is not None
+
+    def load(self, orders):
+        """Fill the board from an iterable of open orders"""
+        board = {counter: {} for counter in get_counters()}
+        for order in orders:
+            summary = order_summary(order)
+            board.setdefault(summary['counter'], {})[summary['id']] = summary
+        with self._lock:
+            self._orders = board
+
+    def clear(self):
+        """Forget every order until the board is loaded again"""
+        with self._lock:
+            self._orders = None
+
+    def apply(self, summary):
+        """Add, replace or drop one order after a change
+
+        Returns the counter that held the order before, if any.
+        """
+        previous = None
+        with self._lock:
+            if self._orders is None:
+                return None
+            for counter, orders in self._orders.items():
+                if orders.pop(summary['id'], None) is not None:
+                    previous = counter
+            if summary['open']:
+                self._orders.setdefault(summary['counter'], {})[summary['id']] = summary
+        return previous
+
+    def orders_for(self, counter):
+        """Open orders for one counter, oldest first"""
+        with self._lock:
+            return sorted((self._orders or {}).get(counter, {}).values(), key=lambda summary: summary['id'])
+
+
+board = KitchenBoard()
+
+
+async def aload_board():
+    """Fill the board with the async ORM unless it is already loaded"""
+    if not board.loaded:
+        board.load([order async for order in open_orders()])
+
+
+def announce_order(order_id):
+    """Update the board and notify the order's counter; runs after commit
+
+    Until a kitchen screen has loaded the board nobody is listening, so
+    nothing is fetched; the first screen reads the orders itself.
+    """
+    if not board.loaded:
+        return
+    order = _with_details(Order.objects.filter(pk=order_id)).first()
+    if order is not None:
+        _announce(order_summary(order))
+
+
+def announce_orders(order_ids, chunk_size=500):
+    """announce_order for many orders, loading each chunk in a few queries"""
+    if not board.loaded:
+        return
+    order_ids = list(order_ids)
+    for start in range(0, len(order_ids), chunk_size):
+        for order in _with_details(Order.objects.filter(pk__in=order_ids[start:start + chunk_size])):
+            _announce(order_summary(order))
+
+
+def announce_removed(order_id, seat_number):
+    """Take a deleted order off the board and its counter's screens"""
+    _announce({'id': order_id, 'counter': counter_for_seat(seat_number), 'open': False})
+
+
+def _announce(summary):
+    previous = board.apply(summary)
+    if previous is not None and previous != summary['counter']:
+        # The seat moved to another counter, so the old one drops the order
+        publish(kitchen_channel(previous), {**summary, 'counter': previous, 'open': False})
+    publish(kitchen_channel(summary['counter']), summary)
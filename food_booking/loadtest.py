@@ -0,0 +1,280 @@
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext, setup_test_environment, teardown_test_environment
+from django.urls import reverse
+from django.utils import timezone
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import timedelta
+from decimal import Decimal
+from .menu_cache import bump_menu_version
+from .models import FoodItem, Order, OrderItem
+from .stats import close_days
+import math
+import os
+import random
+import shutil
+import statistics
+import tempfile
+import threading
+import time
+
+
+# One customer's visit during an interval, in order; the owner's dashboard
+# refreshes are interleaved with them
+STEPS = ['menu', 'add_to_cart', 'order_form', 'submit_order', 'owner_dashboard']
+
+# Allowed worsening of timing metrics against a baseline before it counts
+# as a regression. Query counts barely vary, so they get a small absolute
+# allowance instead, covering cache misses that depend on thread timing.
+LATENCY_TOLERANCE = 0.25
+QUERY_TOLERANCE = 0.5
+
+ROWS = 'ABCDEFGHIJ'
+
+# Private to the benchmark, so seeded menus and rollup state never reach the
+# cache the running site shares
+BENCHMARK_CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'food-booking-benchmark',
+    }
+}
+
+
+class LoadTestError(Exception):
+    """Raised when a request in the replayed flow does not succeed"""
+
+
+@contextmanager
+def benchmark_environment():
+    """Run a benchmark against a throwaway database and an empty private cache
+
+    Real orders, the shared menu snapshot and the rollup watermark are never
+    touched. SQLite gets a file rather than shared memory, which locks whole
+    tables against concurrent writers instead of waiting on the database lock.
+    """
+    old_name = connection.settings_dict['NAME']
+    directory = tempfile.mkdtemp()
+    if connection.vendor == 'sqlite':
+        connection.settings_dict['TEST']['NAME'] = os.path.join(directory, 'benchmark.sqlite3')
+    setup_test_environment()
+    connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+    try:
+        with override_settings(CACHES=BENCHMARK_CACHES):
+            cache.clear()
+            yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        teardown_test_environment()
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+@contextmanager
+def backdated_orders():
+    """Let seeded orders keep the created_at they are given
+
+    auto_now_add would otherwise stamp every one with the current time.
+    """
+    created_at = Order._meta.get_field('created_at')
+    created_at.auto_now_add = False
+    try:
+        yield
+    finally:
+        created_at.auto_now_add = True
+
+
+def seed_menu(count):
+    """Create count available food items and return their ids"""
+    FoodItem.objects.bulk_create([
+        FoodItem(name=f'Item {i}', description='Benchmark item', price=Decimal(40 + 10 * (i % 20)))
+        for i in range(count)
+    ])
+    return list(FoodItem.objects.values_list('id', flat=True))
+
+
+def seed_dataset(orders, items=40, days=90, seed=0, batch_size=5000):
+    """Fill an empty database with a menu and orders spread over the last days days
+
+    The same arguments always produce the same data. Orders get one to four
+    lines and are inserted in batches with their totals already set, then
+    closed days are rolled up as the nightly rollup_sales run would.
+    Returns the menu's item ids.
+    """
+    rng = random.Random(seed)
+    seed_menu(items)
+    menu = list(FoodItem.objects.values_list('id', 'price'))
+    methods = [choice[0] for choice in Order.PAYMENT_METHOD_CHOICES]
+    statuses = [choice[0] for choice in Order.PAYMENT_STATUS_CHOICES]
+    now = timezone.now()
+
+    with backdated_orders():
+        for start in range(0, orders, batch_size):
+            batch = []
+            for _ in range(min(batch_size, orders - start)):
+                lines = [(food_item_id, price, rng.randint(1, 3)) for food_item_id, price in rng.sample(menu, rng.randint(1, 4))]
+                order = Order(
+                    seat_number=f'{rng.choice(ROWS)}{rng.randint(1, 30)}',
+                    customer_name='Load Test',
+                    payment_method=rng.choice(methods),
+                    payment_status=rng.choice(statuses),
+                    fulfilment_status='DELIVERED',
+                    total_amount=sum(price * quantity for _, price, quantity in lines),
+                    created_at=now - timedelta(seconds=rng.randint(0, days * 86400)),
+                )
+                batch.append((order, lines))
+            Order.objects.bulk_create([order for order, _ in batch])
+            OrderItem.objects.bulk_create([
+                OrderItem(order=order, food_item_id=food_item_id, price=price, quantity=quantity)
+                for order, lines in batch for food_item_id, price, quantity in lines
+            ])
+
+    close_days()
+    bump_menu_version()
+    return [food_item_id for food_item_id, _ in menu]
+
+
+class IntervalReplay:
+    """A rush of customers ordering during one interval, driven through the test client
+
+    Every customer scans the menu, adds a few items to the cart, opens the
+    order form and submits it, each as a real request through the URL conf
+    and middleware. The owner's dashboard is refreshed after every
+    dashboard_every-th order. Each request's latency and query count is
+    recorded against its step.
+    """
+
+    def __init__(self, item_ids, owner, lines=3, dashboard_every=25, seed=0):
+        self.item_ids = item_ids
+        self.owner = owner
+        self.lines = lines
+        self.dashboard_every = dashboard_every
+        self.seed = seed
+        self._local = threading.local()
+
+    def run(self, customers, threads=1, first=0):
+        """Replay customers visits; returns (seconds, [(step, ms, queries), ...])
+
+        With one thread the visits run inline, on the caller's connection.
+        """
+        started = time.perf_counter()
+        numbers = range(first, first + customers)
+        if threads > 1:
+            with ThreadPoolExecutor(max_workers=threads) as pool:
+                visits = list(pool.map(self.visit, numbers))
+        else:
+            visits = [self.visit(number) for number in numbers]
+        return time.perf_counter() - started, [sample for samples in visits for sample in samples]
+
+    def visit(self, number):
+        """One customer's requests, from menu scan to order, as (step, ms, queries)"""
+        rng = random.Random(self.seed * 1000003 + number)
+        client = Client()
+        samples = []
+
+        self.request(samples, 'menu', client.get, reverse('food_booking:menu'))
+        for food_item_id in rng.sample(self.item_ids, min(self.lines, len(self.item_ids))):
+            self.request(samples, 'add_to_cart', client.post, reverse('food_booking:add_to_cart'),
+                         {'food_item_id': food_item_id, 'quantity': rng.randint(1, 3)})
+        self.request(samples, 'order_form', client.get, reverse('food_booking:order_form'))
+        response = self.request(samples, 'submit_order', client.post, reverse('food_booking:order_form'), {
+            'customer_name': f'Customer {number}',
+            'mobile_number': f'98{number % 100000000:08d}',
+            'payment_method': rng.choice(['CASH', 'UPI', 'CARD']),
+            'row_letter': rng.choice(ROWS),
+            'seat_number': str(rng.randint(1, 30)),
+        })
+        if response.status_code != 302:
+            raise LoadTestError(f'Order {number} was not accepted: {response.status_code}')
+
+        if self.dashboard_every and number % self.dashboard_every == 0:
+            self.request(samples, 'owner_dashboard', self.owner_client().get, reverse('food_booking:owner_dashboard'))
+        return samples
+
+    def owner_client(self):
+        """The owner's logged-in client for this thread, like one open browser tab"""
+        if not hasattr(self._local, 'client'):
+            self._local.client = Client()
+            self._local.client.force_login(self.owner)
+        return self._local.client
+
+    def request(self, samples, step, func, *args, **kwargs):
+        """Send one request, recording its latency and queries"""
+        with CaptureQueriesContext(connection) as queries:
+            response, elapsed = timed(func, *args, **kwargs)
+        if response.status_code >= 400:
+            raise LoadTestError(f'{step} answered {response.status_code}')
+        samples.append((step, elapsed, len(queries)))
+        return response
+
+
+def create_owner():
+    """Superuser whose dashboard the replay refreshes; it logs in without a password"""
+    return User.objects.create_superuser('loadtest-owner', 'owner@example.com', None)
+
+
+def timed(func, *args, **kwargs):
+    """Call func; returns its result and wall-clock time in milliseconds"""
+    started = time.perf_counter()
+    result = func(*args, **kwargs)
+    return result, (time.perf_counter() - started) * 1000
+
+
+async def atimed(func, *args, **kwargs):
+    """Await func; returns its result and wall-clock time in milliseconds"""
+    started = time.perf_counter()
+    result = await func(*args, **kwargs)
+    return result, (time.perf_counter() - started) * 1000
+
+
+def percentile(values, percent):
+    """Nearest-rank percentile of already sorted values"""
+    return values[max(1, math.ceil(len(values) * percent / 100)) - 1]
+
+
+def latency_report(timings):
+    """Median and p95 of request timings in milliseconds, as one report column"""
+    timings = sorted(timings)
+    return f'median {statistics.median(timings):7.1f} ms   p95 {percentile(timings, 95):7.1f} ms'
+
+
+def summarise(seconds, samples, orders):
+    """Orders per second overall, and latency percentiles and queries per request per step"""
+    steps = {}
+    for step in STEPS:
+        timings = sorted(ms for name, ms, _ in samples if name == step)
+        if not timings:
+            continue
+        steps[step] = {
+            'requests': len(timings),
+            'p50_ms': round(percentile(timings, 50), 2),
+            'p95_ms': round(percentile(timings, 95), 2),
+            'p99_ms': round(percentile(timings, 99), 2),
+            'queries_per_request': round(statistics.mean(q for name, _, q in samples if name == step), 2),
+        }
+    return {
+        'orders': orders,
+        'seconds': round(seconds, 3),
+        'orders_per_second': round(orders / seconds, 1) if seconds else 0,
+        'steps': steps,
+    }
+
+
+def regressions(summary, baseline, tolerance=LATENCY_TOLERANCE):
+    """Tracked metrics that are worse than in baseline, as readable lines"""
+    found = []
+    if summary['orders_per_second'] < baseline['orders_per_second'] * (1 - tolerance):
+        found.append(f"orders/s fell from {baseline['orders_per_second']} to {summary['orders_per_second']}")
+    for step, before in baseline['steps'].items():
+        now = summary['steps'].get(step)
+        if now is None:
+            continue
+        if now['p95_ms'] > before['p95_ms'] * (1 + tolerance):
+            found.append(f"{step} p95 rose from {before['p95_ms']} ms to {now['p95_ms']} ms")
+        if now['queries_per_request'] > before['queries_per_request'] + QUERY_TOLERANCE:
+            found.append(
+                f"{step} queries per request rose from {before['queries_per_request']} to {now['queries_per_request']}"
+            )
+    return found
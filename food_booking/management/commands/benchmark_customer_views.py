@@ -0,0 +1,102 @@
+from concurrent.futures import ThreadPoolExecutor
+from django.core.management.base import BaseCommand
+from django.test import AsyncClient, Client, override_settings
+from django.urls import clear_url_caches, reverse
+from food_booking import urls as food_booking_urls
+from food_booking.loadtest import atimed, benchmark_environment, latency_report, seed_menu, timed
+from movie_ticket import urls as project_urls
+import asyncio
+import importlib
+import time
+
+
+class Command(BaseCommand):
+    help = 'Compare the sync and async customer views with many concurrent phones'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--phones',
+            type=int,
+            default=500,
+            help='Concurrent customers, each loading the menu and adding to the cart'
+        )
+        parser.add_argument(
+            '--threads',
+            type=int,
+            default=8,
+            help='Worker threads available to the WSGI path'
+        )
+        parser.add_argument(
+            '--items',
+            type=int,
+            default=40,
+            help='Food items on the seeded menu'
+        )
+
+    def handle(self, *args, **options):
+        with benchmark_environment():
+            self.stdout.write(
+                self.style.SUCCESS('Benchmarking Customer Views')
+            )
+            self.stdout.write('=' * 50)
+
+            item_ids = seed_menu(options['items'])
+            phones = options['phones']
+            self.stdout.write(f'\n{phones} phones, {options["threads"]} WSGI threads:')
+
+            self.use_urls(async_views=False)
+            self.report('WSGI (sync views)', *self.run_wsgi(phones, options['threads'], item_ids))
+
+            self.use_urls(async_views=True)
+            try:
+                self.report('ASGI (async views)', *asyncio.run(self.run_asgi(phones, item_ids)))
+            finally:
+                self.use_urls(async_views=False)
+
+        self.stdout.write(
+            self.style.SUCCESS('\nCustomer view benchmark completed!')
+        )
+
+    def use_urls(self, async_views):
+        """Route the customer URLs to the sync or async views"""
+        with override_settings(FOOD_BOOKING_ASYNC_VIEWS=async_views):
+            importlib.reload(food_booking_urls)
+        importlib.reload(project_urls)
+        clear_url_caches()
+
+    def run_wsgi(self, phones, threads, item_ids):
+        """Serve every phone's session through a fixed pool of threads"""
+        def session(phone):
+            client = Client()
+            return [
+                timed(client.get, reverse('food_booking:menu'))[1],
+                timed(client.post, reverse('food_booking:api_add_to_cart'),
+                      {'food_item_id': item_ids[phone % len(item_ids)], 'quantity': 1},
+                      content_type='application/json')[1],
+                timed(client.get, reverse('food_booking:menu'))[1],
+            ]
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            timings = [timing for result in pool.map(session, range(phones)) for timing in result]
+        return time.perf_counter() - started, timings
+
+    async def run_asgi(self, phones, item_ids):
+        """Serve every phone's session concurrently on one event loop"""
+        async def session(phone):
+            client = AsyncClient()
+            return [
+                (await atimed(client.get, reverse('food_booking:menu')))[1],
+                (await atimed(client.post, reverse('food_booking:api_add_to_cart'),
+                              {'food_item_id': item_ids[phone % len(item_ids)], 'quantity': 1},
+                              content_type='application/json'))[1],
+                (await atimed(client.get, reverse('food_booking:menu')))[1],
+            ]
+
+        started = time.perf_counter()
+        results = await asyncio.gather(*[session(phone) for phone in range(phones)])
+        return time.perf_counter() - started, [timing for result in results for timing in result]
+
+    def report(self, label, elapsed, timings):
+        """Print throughput and latency for one run"""
+        self.stdout.write(f'   {label:<20} {len(timings) / elapsed:8.0f} req/s   {latency_report(timings)}')
@@ -0,0 +1,116 @@
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.db.models import Count, Sum
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from datetime import timedelta
+from decimal import Decimal
+from food_booking.loadtest import backdated_orders, benchmark_environment, timed
+from food_booking.models import DailySalesRollup, Order, RollupWatermark
+from food_booking.stats import CLOSED_THROUGH_KEY, close_days, dashboard_stats
+import random
+import statistics
+
+
+class Command(BaseCommand):
+    help = 'Benchmark the owner dashboard statistics against a throwaway database'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--orders',
+            type=int,
+            nargs='+',
+            default=[100000, 1000000],
+            help='Order counts to benchmark'
+        )
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=5,
+            help='Timed runs per measurement'
+        )
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=365,
+            help='Spread seeded orders over this many days'
+        )
+
+    def handle(self, *args, **options):
+        with benchmark_environment():
+            self.stdout.write(
+                self.style.SUCCESS('Benchmarking Dashboard Statistics')
+            )
+            self.stdout.write('=' * 50)
+
+            seeded = 0
+            for target in sorted(options['orders']):
+                self.seed_orders(target - seeded, options['days'])
+                seeded = target
+
+                self.stdout.write(f'\n{target:,} orders:')
+                self.rebuild_rollups()
+                for label, func in [('per-window queries', legacy_stats), ('rollup + live today', dashboard_stats)]:
+                    queries, timings = self.measure(func, options['repeat'])
+                    self.stdout.write(
+                        f'   {label:<22} {queries:>3} queries   '
+                        f'median {statistics.median(timings):8.1f} ms   max {max(timings):8.1f} ms'
+                    )
+
+        self.stdout.write(
+            self.style.SUCCESS('\nDashboard benchmark completed!')
+        )
+
+    def seed_orders(self, count, days, batch_size=5000):
+        """Insert count orders spread evenly over the last days days"""
+        now = timezone.now()
+        rng = random.Random(count)
+        methods = [choice[0] for choice in Order.PAYMENT_METHOD_CHOICES]
+        statuses = [choice[0] for choice in Order.PAYMENT_STATUS_CHOICES]
+
+        with backdated_orders():
+            for start in range(0, count, batch_size):
+                Order.objects.bulk_create([
+                    Order(
+                        seat_number=f'{rng.choice("ABCDEFGHIJ")}{rng.randint(1, 30)}',
+                        customer_name='Benchmark',
+                        payment_method=rng.choice(methods),
+                        payment_status=rng.choice(statuses),
+                        total_amount=Decimal(rng.randint(80, 1500)),
+                        created_at=now - timedelta(seconds=rng.randint(0, days * 86400)),
+                    )
+                    for _ in range(min(batch_size, count - start))
+                ])
+
+    def rebuild_rollups(self):
+        """Roll up every closed day, as the nightly rollup_sales run would"""
+        DailySalesRollup.objects.all().delete()
+        RollupWatermark.objects.all().delete()
+        cache.delete(CLOSED_THROUGH_KEY)
+        _, elapsed = timed(close_days)
+        self.stdout.write(f'   rollup backfill took {elapsed:.1f} ms')
+
+    def measure(self, func, repeat):
+        """Return the query count and wall-clock timings of func"""
+        timings = []
+        for _ in range(repeat):
+            with CaptureQueriesContext(connection) as captured:
+                timings.append(timed(func)[1])
+        return len(captured.captured_queries), timings
+
+
+def legacy_stats():
+    """The previous dashboard approach: one aggregate and one count per window"""
+    today = timezone.now().date()
+    results = {}
+    for name, lookup in [
+        ('today', {'created_at__date': today}),
+        ('week', {'created_at__date__gte': today - timedelta(days=7)}),
+        ('month', {'created_at__date__gte': today - timedelta(days=30)}),
+    ]:
+        orders = Order.objects.filter(**lookup)
+        results[f'{name}_revenue'] = orders.aggregate(total=Sum('total_amount'))['total'] or 0
+        results[f'{name}_count'] = orders.count()
+    results['pending'] = Order.objects.filter(payment_status='PENDING').aggregate(count=Count('id'))['count']
+    return results
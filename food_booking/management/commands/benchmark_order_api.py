@@ -0,0 +1,116 @@
+from concurrent.futures import ThreadPoolExecutor
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+from django.urls import reverse
+from food_booking.loadtest import LoadTestError, benchmark_environment, latency_report, seed_menu, timed
+from food_booking.models import Order, OrderItem
+import json
+import time
+import uuid
+
+
+# Sustained orders per second one worker must manage on SQLite. A full
+# 300-seat hall ordering in the ten minutes before a show needs about 0.5,
+# so this leaves room for several halls and retry storms.
+TARGET_ORDERS_PER_SECOND = 50
+
+
+class Command(BaseCommand):
+    help = 'Load test the JSON order API the way a hall full of kiosks and seat tablets would'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--orders',
+            type=int,
+            default=1000,
+            help='Orders to place'
+        )
+        parser.add_argument(
+            '--threads',
+            type=int,
+            default=8,
+            help='Concurrent kiosks'
+        )
+        parser.add_argument(
+            '--lines',
+            type=int,
+            default=4,
+            help='Distinct items per order'
+        )
+        parser.add_argument(
+            '--retry-rate',
+            type=float,
+            default=0.1,
+            help='Share of orders sent twice with the same Idempotency-Key'
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write(
+            self.style.SUCCESS('Benchmarking Order API')
+        )
+        self.stdout.write('=' * 50)
+
+        try:
+            with benchmark_environment():
+                item_ids = seed_menu(40)
+                self.stdout.write(
+                    f'\n{options["orders"]} orders of {options["lines"]} lines from {options["threads"]} kiosks, '
+                    f'{options["retry_rate"]:.0%} retried:'
+                )
+                elapsed, timings = self.run(options['orders'], options['threads'], options['lines'],
+                                            options['retry_rate'], item_ids)
+                self.report(elapsed, timings, options['orders'])
+        except LoadTestError as e:
+            raise CommandError(str(e))
+
+        self.stdout.write(
+            self.style.SUCCESS('\nOrder API benchmark completed!')
+        )
+
+    def run(self, orders, threads, lines, retry_rate, item_ids):
+        """Post every order through a fixed pool of kiosk threads"""
+        url = reverse('food_booking:api_place_order')
+        retry_every = round(1 / retry_rate) if retry_rate else 0
+
+        def kiosk(number):
+            client = Client()
+            body = json.dumps({
+                'items': [
+                    {'food_item_id': item_ids[(number + line) % len(item_ids)], 'quantity': 1 + line % 3}
+                    for line in range(lines)
+                ],
+                'customer_name': f'Kiosk {number}',
+                'payment_method': 'CASH',
+                'row_letter': 'ABCDEFGHIJKLMNOPQRSTUVWXYZ'[number % 26],
+                'seat_number': str(1 + number % 30),
+            })
+            headers = {'HTTP_IDEMPOTENCY_KEY': uuid.uuid4().hex}
+            timings = [self.post(client, url, body, headers)]
+            if retry_every and number % retry_every == 0:
+                timings.append(self.post(client, url, body, headers))
+            return timings
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            timings = [timing for result in pool.map(kiosk, range(orders)) for timing in result]
+        return time.perf_counter() - started, timings
+
+    def post(self, client, url, body, headers):
+        """Post one order, insisting on a successful response, and return its time in milliseconds"""
+        response, elapsed = timed(client.post, url, body, content_type='application/json', **headers)
+        if response.status_code not in (200, 201):
+            raise LoadTestError(f'Order API answered {response.status_code}: {response.content[:200]}')
+        return elapsed
+
+    def report(self, elapsed, timings, orders):
+        """Print throughput, latency and whether retries were suppressed"""
+        rate = orders / elapsed
+        self.stdout.write(f'   {rate:8.0f} orders/s   {latency_report(timings)}')
+        self.stdout.write(
+            f'   {Order.objects.count()} orders, {OrderItem.objects.count()} lines written '
+            f'for {len(timings)} requests'
+        )
+        if rate >= TARGET_ORDERS_PER_SECOND:
+            self.stdout.write(self.style.SUCCESS(f'   Meets the {TARGET_ORDERS_PER_SECOND} orders/s target'))
+        else:
+            self.stdout.write(self.style.WARNING(f'   Below the {TARGET_ORDERS_PER_SECOND} orders/s target'))
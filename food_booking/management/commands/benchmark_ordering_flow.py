@@ -0,0 +1,149 @@
+from django.core.management.base import BaseCommand, CommandError
+from food_booking.loadtest import (
+    LATENCY_TOLERANCE, STEPS, IntervalReplay, LoadTestError, benchmark_environment, create_owner, regressions,
+    seed_dataset, summarise,
+)
+from food_booking.models import Order
+import json
+import time
+
+
+class Command(BaseCommand):
+    help = 'Replay interval rushes through the whole ordering flow and report latency, queries and orders/s'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--orders',
+            type=int,
+            default=10000,
+            help='Past orders to seed before the rush, from 10k up to millions'
+        )
+        parser.add_argument(
+            '--customers',
+            type=int,
+            default=300,
+            help='Customers ordering in each interval'
+        )
+        parser.add_argument(
+            '--intervals',
+            type=int,
+            default=2,
+            help='Interval rushes to replay'
+        )
+        parser.add_argument(
+            '--threads',
+            type=int,
+            default=8,
+            help='Requests served at once'
+        )
+        parser.add_argument(
+            '--lines',
+            type=int,
+            default=3,
+            help='Items each customer adds to the cart'
+        )
+        parser.add_argument(
+            '--dashboard-every',
+            type=int,
+            default=25,
+            help='Orders between owner dashboard refreshes'
+        )
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=0,
+            help='Seed for the dataset and the customers, so runs are comparable'
+        )
+        parser.add_argument(
+            '--output',
+            help='Write the results as JSON here, for use as a later --baseline'
+        )
+        parser.add_argument(
+            '--baseline',
+            help='Results JSON from an earlier run; fail if a tracked metric regressed'
+        )
+        parser.add_argument(
+            '--tolerance',
+            type=float,
+            default=LATENCY_TOLERANCE,
+            help='Allowed worsening of p95 latency and orders/s against the baseline, as a fraction'
+        )
+
+    def handle(self, *args, **options):
+        baseline = None
+        if options['baseline']:
+            try:
+                with open(options['baseline']) as file:
+                    baseline = json.load(file)
+            except (OSError, ValueError) as e:
+                raise CommandError(f'Cannot read baseline: {e}')
+
+        self.stdout.write(
+            self.style.SUCCESS('Benchmarking Ordering Flow')
+        )
+        self.stdout.write('=' * 50)
+
+        try:
+            with benchmark_environment():
+                summary = self.replay(options)
+        except LoadTestError as e:
+            raise CommandError(str(e))
+
+        summary['config'] = {
+            name: options[name]
+            for name in ['orders', 'customers', 'intervals', 'threads', 'lines', 'dashboard_every', 'seed']
+        }
+        self.report(summary)
+        if options['output']:
+            with open(options['output'], 'w') as file:
+                json.dump(summary, file, indent=2)
+            self.stdout.write(f'\nResults written to {options["output"]}')
+
+        if baseline is not None:
+            if baseline.get('config') != summary['config']:
+                self.stdout.write(self.style.WARNING('\nBaseline was run with different options'))
+            found = regressions(summary, baseline, options['tolerance'])
+            if found:
+                raise CommandError('Regressed against the baseline:\n   ' + '\n   '.join(found))
+            self.stdout.write(self.style.SUCCESS('\nNo regressions against the baseline'))
+
+        self.stdout.write(
+            self.style.SUCCESS('\nOrdering flow benchmark completed!')
+        )
+
+    def replay(self, options):
+        """Seed the dataset and replay every interval; returns the summary"""
+        started = time.perf_counter()
+        item_ids = seed_dataset(options['orders'], seed=options['seed'])
+        self.stdout.write(f'\nSeeded {options["orders"]:,} orders in {time.perf_counter() - started:.1f} s')
+
+        replay = IntervalReplay(
+            item_ids, create_owner(), lines=options['lines'],
+            dashboard_every=options['dashboard_every'], seed=options['seed'],
+        )
+        seeded = Order.objects.count()
+        seconds, samples = 0, []
+        for interval in range(options['intervals']):
+            elapsed, interval_samples = replay.run(
+                options['customers'], options['threads'], first=interval * options['customers']
+            )
+            seconds += elapsed
+            samples += interval_samples
+            self.stdout.write(
+                f'   interval {interval + 1}: {options["customers"]} customers in {elapsed:.1f} s'
+            )
+        return summarise(seconds, samples, Order.objects.count() - seeded)
+
+    def report(self, summary):
+        """Print latency percentiles and queries per step, then throughput"""
+        self.stdout.write(f'\n   {"step":<16} {"requests":>8} {"p50 ms":>8} {"p95 ms":>8} {"p99 ms":>8} {"queries":>8}')
+        for step in STEPS:
+            metrics = summary['steps'].get(step)
+            if metrics:
+                self.stdout.write(
+                    f'   {step:<16} {metrics["requests"]:>8} {metrics["p50_ms"]:>8.1f} {metrics["p95_ms"]:>8.1f} '
+                    f'{metrics["p99_ms"]:>8.1f} {metrics["queries_per_request"]:>8.2f}'
+                )
+        self.stdout.write(
+            f'\n   {summary["orders"]} orders in {summary["seconds"]:.1f} s: {summary["orders_per_second"]} orders/s'
+        )
@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand, CommandError
+from food_booking.catalogue import FORMATS, export_catalogue
+import os
+import sys
+
+
+class Command(BaseCommand):
+    help = 'Write every food item to a catalogue file (CSV, JSON or JSON Lines) that import_catalogue reads back'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path',
+            help='Catalogue file, or - to write to standard output'
+        )
+        parser.add_argument(
+            '--format',
+            choices=FORMATS,
+            help='File format, taken from the extension when not given (CSV for standard output)'
+        )
+
+    def handle(self, *args, **options):
+        path = options['path']
+        fmt = options['format'] or (os.path.splitext(path)[1].lstrip('.').lower() if path != '-' else 'csv')
+        if fmt not in FORMATS:
+            raise CommandError(f'Cannot tell the format of {path}; pass --format.')
+
+        if path == '-':
+            export_catalogue(sys.stdout, fmt)
+            return
+        try:
+            with open(path, 'w', newline='' if fmt == 'csv' else None) as file:
+                count = export_catalogue(file, fmt)
+        except OSError as e:
+            raise CommandError(str(e))
+
+        self.stdout.write(
+            self.style.SUCCESS(f'Exported {count} items to {path}')
+        )
@@ -0,0 +1,81 @@
+from django.core.management.base import BaseCommand, CommandError
+from food_booking.models import Auditorium, Show
+from food_booking.qr import FORMATS, generate, seat_url, show_url
+from food_booking.theatre import seat_map
+import time
+
+
+class Command(BaseCommand):
+    help = 'Generate per-seat QR codes for every auditorium, plus per-show codes, as print sheets'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--base-url',
+            default='http://127.0.0.1:8000',
+            help='Public address of the site the codes link to'
+        )
+        parser.add_argument(
+            '--output',
+            default='qr_codes',
+            help='Directory for the sheets and their manifest'
+        )
+        parser.add_argument(
+            '--format',
+            choices=FORMATS,
+            default='pdf',
+            help='PDF for printing, or PNG/SVG sheets of one page each'
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            help='Encoding processes, defaults to one per CPU'
+        )
+        parser.add_argument(
+            '--auditorium',
+            action='append',
+            help='Only this auditorium (by name); may be repeated'
+        )
+        parser.add_argument(
+            '--no-shows',
+            action='store_true',
+            help='Skip the per-show codes'
+        )
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Regenerate every sheet, even if the manifest says it is unchanged'
+        )
+
+    def handle(self, *args, **options):
+        auditoriums = Auditorium.objects.all()
+        if options['auditorium']:
+            auditoriums = auditoriums.filter(name__in=options['auditorium'])
+        auditoriums = list(auditoriums)
+        if not auditoriums:
+            raise CommandError('No auditoriums to generate codes for.')
+
+        base_url = options['base_url']
+        groups = {}
+        for auditorium in auditoriums:
+            groups[f'seats-{auditorium.id}'] = [
+                (f'{row}{number}', seat_url(base_url, auditorium, f'{row}{number}'))
+                for row, numbers in seat_map(auditorium).items()
+                for number in numbers
+            ]
+        if not options['no_shows']:
+            shows = Show.objects.filter(auditorium__in=auditoriums).order_by('starts_at')
+            groups['shows'] = [(f'show-{show.id}', show_url(base_url, show)) for show in shows]
+        groups = {name: codes for name, codes in groups.items() if codes}
+
+        total = sum(len(codes) for codes in groups.values())
+        self.stdout.write(f'Generating {total:,} QR codes as {options["format"].upper()} in {options["output"]}...')
+
+        started = time.perf_counter()
+        written, skipped = generate(
+            groups, options['output'], options['format'], workers=options['workers'], force=options['force']
+        )
+        self.stdout.write(f'   {written} sheets written, {skipped} unchanged, in {time.perf_counter() - started:.1f} s')
+
+        self.stdout.write(
+            self.style.SUCCESS('QR codes are up to date!')
+        )
@@ -0,0 +1,71 @@
+from django.core.management.base import BaseCommand, CommandError
+from food_booking.catalogue import (
+    CATALOGUE_CHUNK_SIZE, FORMATS, import_catalogue, read_catalogue_csv, read_catalogue_json, read_catalogue_jsonl,
+)
+from contextlib import nullcontext
+import json
+import os
+import sys
+import time
+
+
+class Command(BaseCommand):
+    help = 'Create or update food items from a catalogue file (CSV, JSON or JSON Lines), matched by name'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path',
+            help='Catalogue file, or - to read from standard input'
+        )
+        parser.add_argument(
+            '--format',
+            choices=FORMATS,
+            help='File format, taken from the extension when not given (CSV for standard input)'
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=CATALOGUE_CHUNK_SIZE,
+            help='Items validated and written per query'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Report the changes without saving them'
+        )
+
+    def handle(self, *args, **options):
+        path = options['path']
+        fmt = options['format'] or (os.path.splitext(path)[1].lstrip('.').lower() if path != '-' else 'csv')
+        if fmt not in FORMATS:
+            raise CommandError(f'Cannot tell the format of {path}; pass --format.')
+
+        started = time.perf_counter()
+        try:
+            with (nullcontext(sys.stdin) if path == '-' else open(path, newline='' if fmt == 'csv' else None)) as file:
+                if fmt == 'csv':
+                    items = read_catalogue_csv(file)
+                elif fmt == 'jsonl':
+                    items = read_catalogue_jsonl(file)
+                else:
+                    items = read_catalogue_json(json.load(file))
+                counts, changes = import_catalogue(items, options['chunk_size'], dry_run=options['dry_run'])
+        except (OSError, ValueError) as e:
+            # The import is one transaction, so nothing was saved
+            raise CommandError(str(e))
+
+        for name, action, diff in changes:
+            if action == 'created':
+                self.stdout.write(self.style.SUCCESS(f'Created: {name}'))
+            else:
+                fields = ', '.join(f'{field} {old} -> {new}' for field, (old, new) in diff.items())
+                self.stdout.write(self.style.WARNING(f'Updated: {name} ({fields})'))
+
+        self.stdout.write('=' * 50)
+        for action in ['created', 'updated', 'unchanged']:
+            self.stdout.write(f'   {action.capitalize():<12} {counts[action]:>8}')
+        self.stdout.write(f'   in {time.perf_counter() - started:.1f} s')
+
+        self.stdout.write(
+            self.style.SUCCESS('Dry run, nothing saved.' if options['dry_run'] else 'Catalogue imported!')
+        )
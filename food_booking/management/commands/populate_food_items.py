@@ -1,4 +1,5 @@
 from django.core.management.base import BaseCommand
+from food_booking.catalogue import import_catalogue, parse_item
 from food_booking.models import FoodItem
 
 
@@ -129,35 +130,25 @@ class Command(BaseCommand):
             }
         ]
 
-        created_count = 0
-        updated_count = 0
+        # Same upsert as import_catalogue: one lookup and one write for the lot
+        counts, changes = import_catalogue(parse_item(item_data) for item_data in food_items)
 
-        for item_data in food_items:
-            food_item, created = FoodItem.objects.get_or_create(
-                name=item_data['name'],
-                defaults=item_data
-            )
-            
-            if created:
-                created_count += 1
+        for name, action, diff in changes:
+            if action == 'created':
                 self.stdout.write(
-                    self.style.SUCCESS(f'Created: {food_item.name}')
+                    self.style.SUCCESS(f'Created: {name}')
                 )
             else:
-                # Update existing item
-                for key, value in item_data.items():
-                    setattr(food_item, key, value)
-                food_item.save()
-                updated_count += 1
                 self.stdout.write(
-                    self.style.WARNING(f'Updated: {food_item.name}')
+                    self.style.WARNING(f'Updated: {name}')
                 )
 
         self.stdout.write(
             self.style.SUCCESS(
                 f'\nSuccessfully populated food items!\n'
-                f'Created: {created_count}\n'
-                f'Updated: {updated_count}\n'
+                f'Created: {counts["created"]}\n'
+                f'Updated: {counts["updated"]}\n'
+                f'Unchanged: {counts["unchanged"]}\n'
                 f'Total: {FoodItem.objects.count()}'
             )
         )
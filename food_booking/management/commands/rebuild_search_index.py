@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+from food_booking.models import Order
+from food_booking.search import reindex_orders
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the order search tokens used by the owner order search'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=2000,
+            help='Orders re-indexed per transaction'
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write('Rebuilding order search index...')
+
+        indexed = reindex_orders(Order.objects.all(), batch_size=options['batch_size'])
+
+        self.stdout.write(
+            self.style.SUCCESS(f'Indexed {indexed} orders.')
+        )
@@ -0,0 +1,44 @@
+from django.core.management.base import BaseCommand, CommandError
+from food_booking.models import PaymentTransaction
+from food_booking.reconciliation import RECONCILE_BATCH_SIZE, read_settlement_csv, read_webhook_batch, reconcile
+import json
+import sys
+
+
+class Command(BaseCommand):
+    help = 'Apply a gateway settlement file (CSV, or JSON as sent to the webhook) to order payment statuses'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path',
+            help='Settlement file, or - to read CSV from standard input'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=RECONCILE_BATCH_SIZE,
+            help='Settlement lines matched and written per transaction'
+        )
+
+    def handle(self, *args, **options):
+        path = options['path']
+        try:
+            if path == '-':
+                counts = reconcile(read_settlement_csv(sys.stdin), options['batch_size'])
+            elif path.endswith('.json'):
+                with open(path) as file:
+                    counts = reconcile(read_webhook_batch(json.load(file)), options['batch_size'])
+            else:
+                with open(path, newline='') as file:
+                    counts = reconcile(read_settlement_csv(file), options['batch_size'])
+        except (OSError, ValueError) as e:
+            # Batches before a bad line are already applied; re-running skips them
+            raise CommandError(str(e))
+
+        labels = dict(PaymentTransaction.RESULT_CHOICES, duplicate='Seen before')
+        for result, label in labels.items():
+            self.stdout.write(f'   {label:<28} {counts[result]:>8}')
+
+        self.stdout.write(
+            self.style.SUCCESS('Settlement applied!')
+        )
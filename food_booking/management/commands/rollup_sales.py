@@ -0,0 +1,70 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Min
+from django.utils import timezone
+from datetime import date, timedelta
+from food_booking.models import Order
+from food_booking.stats import get_closed_through, refresh_days, set_closed_through
+
+
+class Command(BaseCommand):
+    help = 'Backfill or repair the daily sales and item rollups'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--start',
+            type=date.fromisoformat,
+            help='First day to rebuild (YYYY-MM-DD), defaults to the first order'
+        )
+        parser.add_argument(
+            '--end',
+            type=date.fromisoformat,
+            help='Last day to rebuild (YYYY-MM-DD), defaults to yesterday'
+        )
+        parser.add_argument(
+            '--chunk-days',
+            type=int,
+            default=31,
+            help='Days rebuilt per transaction'
+        )
+
+    def handle(self, *args, **options):
+        yesterday = timezone.localdate() - timedelta(days=1)
+        end_date = options['end'] or yesterday
+        start_date = options['start']
+
+        if end_date > yesterday:
+            raise CommandError('Only closed days can be rolled up; today is always read live.')
+
+        if start_date is None:
+            first_order = Order.objects.aggregate(first=Min('created_at'))['first']
+            if first_order is None:
+                self.stdout.write(self.style.WARNING('No orders to roll up.'))
+                return
+            start_date = timezone.localdate(first_order)
+
+        if start_date > end_date:
+            raise CommandError('--start must not be after --end.')
+
+        self.stdout.write(f'Rolling up {start_date} to {end_date}...')
+
+        chunk = timedelta(days=options['chunk_days'])
+        chunk_start = start_date
+        while chunk_start <= end_date:
+            chunk_end = min(chunk_start + chunk - timedelta(days=1), end_date)
+            refresh_days(chunk_start, chunk_end)
+            self.stdout.write(f'   {chunk_start} to {chunk_end} done')
+            chunk_start = chunk_end + timedelta(days=1)
+
+        # A backfill from the first order, or one that joins up with the days
+        # already rolled up, leaves nothing missing before end_date
+        closed_through = get_closed_through()
+        if closed_through is None:
+            joined = options['start'] is None
+        else:
+            joined = start_date <= closed_through + timedelta(days=1)
+        if joined and (closed_through is None or end_date > closed_through):
+            set_closed_through(end_date)
+
+        self.stdout.write(
+            self.style.SUCCESS('Daily rollups are up to date!')
+        )
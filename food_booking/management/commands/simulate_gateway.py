@@ -0,0 +1,115 @@
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.utils import timezone
+from decimal import Decimal
+from food_booking.gateway import GatewaySimulator
+from food_booking.models import Order, PaymentTransaction
+from food_booking.reconciliation import RECONCILE_BATCH_SIZE, parse_transaction, reconcile
+from food_booking.services import new_payment_reference
+import random
+import time
+
+
+class Command(BaseCommand):
+    help = 'Load test payment reconciliation offline with simulated gateway settlements'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--transactions',
+            type=int,
+            default=100000,
+            help='Pending gateway orders to settle'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=RECONCILE_BATCH_SIZE,
+            help='Settlement lines matched and written per transaction'
+        )
+        parser.add_argument(
+            '--failure-rate',
+            type=float,
+            default=0.05,
+            help='Share of payments the gateway reports as failed'
+        )
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=1,
+            help='Random seed, for repeatable runs'
+        )
+        parser.add_argument(
+            '--output',
+            help='Instead of load testing, write a settlement CSV for the pending gateway orders in this database'
+        )
+
+    def handle(self, *args, **options):
+        simulator = GatewaySimulator(failure_rate=options['failure_rate'], seed=options['seed'])
+
+        if options['output']:
+            orders = Order.objects.filter(
+                payment_status='PENDING', payment_reference__isnull=False
+            ).values_list('payment_reference', 'total_amount')
+            lines = simulator.settle(orders.iterator())
+            with open(options['output'], 'w', newline='') as file:
+                simulator.write_csv(lines, file)
+            self.stdout.write(self.style.SUCCESS(f'Wrote {len(lines)} settlement lines to {options["output"]}'))
+            return
+
+        # Seed into a test database so real orders are never touched
+        old_name = connection.settings_dict['NAME']
+        connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+
+        try:
+            self.stdout.write(
+                self.style.SUCCESS('Simulating Gateway Settlements')
+            )
+            self.stdout.write('=' * 50)
+
+            count = options['transactions']
+            started = time.perf_counter()
+            orders = self.seed_orders(count, options['seed'])
+            self.stdout.write(f'\nSeeded {count:,} pending orders in {time.perf_counter() - started:.1f} s')
+
+            lines = [parse_transaction(line) for line in simulator.settle(orders)]
+            self.stdout.write(f'Gateway sent {len(lines):,} settlement lines')
+
+            for label in ['first delivery', 'redelivery']:
+                started = time.perf_counter()
+                counts = reconcile(lines, options['batch_size'])
+                elapsed = time.perf_counter() - started
+                summary = ', '.join(f'{result.lower()} {counts[result]:,}' for result in sorted(counts) if counts[result])
+                self.stdout.write(f'   {label:<15} {len(lines) / elapsed:10,.0f} lines/s   {elapsed:6.1f} s   {summary}')
+
+            paid = Order.objects.filter(payment_status='PAID').count()
+            self.stdout.write(
+                f'\n{paid:,} orders paid, {PaymentTransaction.objects.count():,} settlement lines stored'
+            )
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+        self.stdout.write(
+            self.style.SUCCESS('\nGateway simulation completed!')
+        )
+
+    def seed_orders(self, count, seed, batch_size=5000):
+        """Insert count delivered, unpaid gateway orders; returns (reference, amount) pairs"""
+        rng = random.Random(seed)
+        methods = list(Order.GATEWAY_PAYMENT_METHODS)
+        pairs = []
+        for start in range(0, count, batch_size):
+            orders = [
+                Order(
+                    seat_number=f'{rng.choice("ABCDEFGHIJ")}{rng.randint(1, 30)}',
+                    customer_name='Simulated',
+                    payment_method=rng.choice(methods),
+                    payment_reference=new_payment_reference(),
+                    total_amount=Decimal(rng.randint(80, 1500)),
+                    fulfilment_status='DELIVERED',
+                    delivered_at=timezone.now(),
+                )
+                for _ in range(min(batch_size, count - start))
+            ]
+            Order.objects.bulk_create(orders)
+            pairs.extend((order.payment_reference, order.total_amount) for order in orders)
+        return pairs
@@ -0,0 +1,110 @@
+from django.core.cache import cache
+from django.db.models import Max
+from django.middleware.csrf import get_token
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+from .models import FoodItem
+import time
+
+
+MENU_VERSION_KEY = 'food_booking:menu_version'
+MENU_SNAPSHOT_TIMEOUT = 60 * 60 * 24
+
+# Rendered in place of the per-request CSRF token so one fragment can be shared
+CSRF_PLACEHOLDER = '__menu_csrf_token__'
+
+
+def get_menu_version():
+    """Return the current menu version, starting a new one if none is cached"""
+    version = cache.get(MENU_VERSION_KEY)
+    if version is None:
+        # Start from the clock so an evicted version never reuses old snapshots
+        cache.add(MENU_VERSION_KEY, time.time_ns(), timeout=None)
+        version = cache.get(MENU_VERSION_KEY)
+    return version
+
+
+async def aget_menu_version():
+    """Async counterpart of get_menu_version"""
+    version = await cache.aget(MENU_VERSION_KEY)
+    if version is None:
+        await cache.aadd(MENU_VERSION_KEY, time.time_ns(), timeout=None)
+        version = await cache.aget(MENU_VERSION_KEY)
+    return version
+
+
+def bump_menu_version():
+    """Invalidate every cached menu snapshot"""
+    try:
+        cache.incr(MENU_VERSION_KEY)
+    except ValueError:
+        cache.set(MENU_VERSION_KEY, time.time_ns(), timeout=None)
+
+
+def get_menu_snapshot():
+    """Return the available items and rendered menu fragment for the current version"""
+    version = get_menu_version()
+    key = f'food_booking:menu:{version}'
+
+    snapshot = cache.get(key)
+    if snapshot is None:
+        snapshot = _build_snapshot(
+            version,
+            list(_available_items()),
+            FoodItem.objects.aggregate(last_modified=Max('updated_at'))['last_modified'],
+        )
+        cache.set(key, snapshot, MENU_SNAPSHOT_TIMEOUT)
+
+    return snapshot
+
+
+async def aget_menu_snapshot():
+    """Async counterpart of get_menu_snapshot, using the async cache and ORM APIs"""
+    version = await aget_menu_version()
+    key = f'food_booking:menu:{version}'
+
+    snapshot = await cache.aget(key)
+    if snapshot is None:
+        snapshot = _build_snapshot(
+            version,
+            [food_item async for food_item in _available_items().aiterator()],
+            (await FoodItem.objects.aaggregate(last_modified=Max('updated_at')))['last_modified'],
+        )
+        await cache.aset(key, snapshot, MENU_SNAPSHOT_TIMEOUT)
+
+    return snapshot
+
+
+def _available_items():
+    """Items shown on the menu, in display order"""
+    return FoodItem.objects.filter(available=True).order_by('name')
+
+
+def _build_snapshot(version, food_items, last_modified):
+    """Snapshot dict holding the items and their pre-rendered menu fragment"""
+    return {
+        'version': version,
+        'last_modified': last_modified,
+        'food_items': food_items,
+        'html': render_to_string('food_booking/menu_items.html', {
+            'food_items': food_items,
+            'csrf_token': CSRF_PLACEHOLDER,
+        }),
+        # Posts through the JSON order API, so no token is needed at all
+        'express_html': mark_safe(render_to_string('food_booking/express_items.html', {
+            'food_items': food_items,
+        })),
+    }
+
+
+def get_menu_item(item_id, snapshot=None):
+    """Return an available item from the cached snapshot, or None"""
+    for food_item in (snapshot or get_menu_snapshot())['food_items']:
+        if food_item.id == int(item_id):
+            return food_item
+    return None
+
+
+def render_menu_items(request, snapshot):
+    """Return the cached menu fragment with this request's CSRF token filled in"""
+    return mark_safe(snapshot['html'].replace(CSRF_PLACEHOLDER, get_token(request)))
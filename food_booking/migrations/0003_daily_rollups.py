@@ -0,0 +1,45 @@
+# Generated by Django 5.2.18 on 2026-10-17 00:23
+
+import django.db.models.deletion
+from decimal import Decimal
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('food_booking', '0002_alter_order_payment_method'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailySalesRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('payment_method', models.CharField(choices=[('UPI', 'UPI (Any UPI App)'), ('PHONEPE', 'PhonePe'), ('GPAY', 'Google Pay'), ('PAYTM', 'Paytm'), ('CARD', 'Credit/Debit Card'), ('CASH', 'Cash')], max_length=10)),
+                ('payment_status', models.CharField(choices=[('PENDING', 'Pending'), ('PAID', 'Paid'), ('FAILED', 'Failed')], max_length=10)),
+                ('order_count', models.PositiveIntegerField(default=0)),
+                ('revenue', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=12)),
+            ],
+            options={
+                'ordering': ['date'],
+                'unique_together': {('date', 'payment_method', 'payment_status')},
+            },
+        ),
+        migrations.CreateModel(
+            name='DailyItemRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('quantity', models.PositiveIntegerField(default=0)),
+                ('revenue', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=12)),
+                ('order_count', models.PositiveIntegerField(default=0)),
+                ('food_item', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='food_booking.fooditem')),
+            ],
+            options={
+                'ordering': ['date'],
+                'unique_together': {('date', 'food_item')},
+            },
+        ),
+    ]
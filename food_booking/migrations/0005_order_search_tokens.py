@@ -0,0 +1,41 @@
+# Generated by Django 5.2.18 on 2026-10-17 00:27
+
+import django.db.models.deletion
+from django.db import migrations, models
+from food_booking.search import order_tokens
+
+
+def index_existing_orders(apps, schema_editor):
+    """Give orders placed before the search index their tokens"""
+    Order = apps.get_model('food_booking', 'Order')
+    OrderSearchToken = apps.get_model('food_booking', 'OrderSearchToken')
+    orders = Order.objects.only('id', 'customer_name', 'seat_number', 'mobile_number').order_by('id')
+    batch = []
+    for order in orders.iterator(chunk_size=2000):
+        batch += [OrderSearchToken(order_id=order.id, token=token) for token in order_tokens(order)]
+        if len(batch) >= 2000:
+            OrderSearchToken.objects.bulk_create(batch)
+            batch = []
+    OrderSearchToken.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('food_booking', '0004_order_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OrderSearchToken',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('token', models.CharField(max_length=110)),
+                ('order', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_tokens', to='food_booking.order')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['token', 'order'], name='order_search_token_idx')],
+            },
+        ),
+        migrations.RunPython(index_existing_orders, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,58 @@
+# Generated by Django 5.2.18 on 2026-10-17 00:38
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def close_existing_orders(apps, schema_editor):
+    """Orders placed before fulfilment tracking are already finished"""
+    Order = apps.get_model('food_booking', 'Order')
+    Order.objects.filter(payment_status='FAILED').update(fulfilment_status='CANCELLED')
+    Order.objects.exclude(payment_status='FAILED').update(fulfilment_status='DELIVERED')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('food_booking', '0005_order_search_tokens'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='order',
+            name='cancelled_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='order',
+            name='claimed_by',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='claimed_orders', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='order',
+            name='delivered_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='order',
+            name='fulfilment_status',
+            field=models.CharField(choices=[('PLACED', 'Placed'), ('PREPARING', 'Preparing'), ('READY', 'Ready'), ('DELIVERED', 'Delivered to seat'), ('CANCELLED', 'Cancelled')], default='PLACED', max_length=10),
+        ),
+        migrations.AddField(
+            model_name='order',
+            name='preparing_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='order',
+            name='ready_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.RunPython(close_existing_orders, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['fulfilment_status', 'created_at'], name='order_fulfil_created_idx'),
+        ),
+    ]
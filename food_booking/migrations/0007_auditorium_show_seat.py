@@ -0,0 +1,79 @@
+# Generated by Django 5.2.18 on 2026-10-17 00:41
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('food_booking', '0006_order_fulfilment'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Auditorium',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True)),
+                ('rows', models.CharField(default='ABCDEFGHIJKLMNOPQRSTUVWXYZ', help_text='Row letters from front to back', max_length=52)),
+                ('seats_per_row', models.PositiveSmallIntegerField(default=30)),
+            ],
+            options={
+                'ordering': ['name'],
+            },
+        ),
+        migrations.CreateModel(
+            name='Seat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('row', models.CharField(max_length=2)),
+                ('number', models.PositiveSmallIntegerField()),
+                ('auditorium', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='seats', to='food_booking.auditorium')),
+            ],
+            options={
+                'ordering': ['auditorium', 'row', 'number'],
+            },
+        ),
+        migrations.AddField(
+            model_name='order',
+            name='seat',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='orders', to='food_booking.seat'),
+        ),
+        migrations.CreateModel(
+            name='Show',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('title', models.CharField(max_length=200)),
+                ('starts_at', models.DateTimeField()),
+                ('ends_at', models.DateTimeField()),
+                ('auditorium', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='shows', to='food_booking.auditorium')),
+            ],
+            options={
+                'ordering': ['-starts_at'],
+            },
+        ),
+        migrations.AddField(
+            model_name='order',
+            name='show',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='orders', to='food_booking.show'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['show', 'created_at'], name='order_show_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['show', 'seat'], name='order_show_seat_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='seat',
+            unique_together={('auditorium', 'row', 'number')},
+        ),
+        migrations.AddIndex(
+            model_name='show',
+            index=models.Index(fields=['starts_at', 'ends_at'], name='show_time_idx'),
+        ),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 5.2.18 on 2026-10-17 00:49
+
+import django.db.models.deletion
+from django.db import migrations, models
+import secrets
+
+
+def assign_payment_references(apps, schema_editor):
+    """Give pending gateway orders a reference so late settlements can match"""
+    Order = apps.get_model('food_booking', 'Order')
+    orders = list(Order.objects.filter(
+        payment_status='PENDING', payment_method__in=['UPI', 'PHONEPE', 'GPAY', 'PAYTM', 'CARD']
+    ).only('id'))
+    for order in orders:
+        order.payment_reference = 'MS' + secrets.token_hex(8).upper()
+    Order.objects.bulk_update(orders, ['payment_reference'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('food_booking', '0008_idempotency_key'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='order',
+            name='payment_reference',
+            field=models.CharField(blank=True, max_length=32, null=True, unique=True),
+        ),
+        migrations.CreateModel(
+            name='PaymentTransaction',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('transaction_id', models.CharField(max_length=64, unique=True)),
+                ('payment_reference', models.CharField(db_index=True, max_length=32)),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('status', models.CharField(choices=[('PENDING', 'Pending'), ('PAID', 'Paid'), ('FAILED', 'Failed')], max_length=10)),
+                ('result', models.CharField(choices=[('APPLIED', 'Applied'), ('UNCHANGED', 'Already settled'), ('UNMATCHED', 'No matching order'), ('MISMATCH', 'Amount mismatch'), ('CONFLICT', 'Conflicts with order status')], max_length=10)),
+                ('settled_at', models.DateTimeField(blank=True, null=True)),
+                ('received_at', models.DateTimeField(auto_now_add=True)),
+                ('order', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='payment_transactions', to='food_booking.order')),
+            ],
+            options={
+                'ordering': ['-received_at'],
+                'indexes': [models.Index(fields=['result', 'received_at'], name='payment_txn_result_idx')],
+            },
+        ),
+        migrations.RunPython(assign_payment_references, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-17 01:00
+
+from django.db import migrations, models
+
+
+def rename_duplicate_items(apps, schema_editor):
+    """Suffix repeated item names so the unique constraint can be added"""
+    FoodItem = apps.get_model('food_booking', 'FoodItem')
+    seen = set()
+    for item in FoodItem.objects.order_by('name', 'id'):
+        name, copy = item.name, 1
+        while name in seen:
+            copy += 1
+            name = f'{item.name[:94]} ({copy})'
+        if name != item.name:
+            item.name = name
+            item.save(update_fields=['name'])
+        seen.add(name)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('food_booking', '0009_payment_reconciliation'),
+    ]
+
+    operations = [
+        migrations.RunPython(rename_duplicate_items, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='fooditem',
+            name='name',
+            field=models.CharField(max_length=100, unique=True),
+        ),
+    ]
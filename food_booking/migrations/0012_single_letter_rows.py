@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-17 01:31
+
+import food_booking.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('food_booking', '0011_rollup_watermark'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='auditorium',
+            name='rows',
+            field=models.CharField(default='ABCDEFGHIJKLMNOPQRSTUVWXYZ', help_text='Row letters from front to back, one letter per row', max_length=26, validators=[food_booking.models.validate_row_letters]),
+        ),
+        migrations.AlterField(
+            model_name='seat',
+            name='row',
+            field=models.CharField(max_length=1),
+        ),
+    ]
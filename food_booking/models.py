@@ -1,11 +1,49 @@
-from django.db import models
+from django.conf import settings
+from django.db import models, transaction
+from django.db.models import DecimalField, F, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+from django.core.exceptions import ValidationError
 from django.core.validators import MinValueValidator
+from django.utils import timezone
+from contextlib import contextmanager
 from decimal import Decimal
+import threading
+
+
+# Orders whose totals are waiting to be recalculated by deferred_order_totals()
+_deferred = threading.local()
+
+
+@contextmanager
+def deferred_order_totals():
+    """Suspend per-line total updates and recalculate touched orders once on exit
+
+    Intended for batch imports and other code that writes many order items
+    one by one. Nested blocks recalculate when the outermost block exits.
+    """
+    outermost = getattr(_deferred, 'order_ids', None) is None
+    if outermost:
+        _deferred.order_ids = set()
+    try:
+        yield
+    finally:
+        if outermost:
+            order_ids, _deferred.order_ids = _deferred.order_ids, None
+            Order.recalculate_totals(order_ids)
+
+
+def validate_row_letters(value):
+    """Rows are single capital letters, each used once"""
+    if not value.isascii() or not value.isalpha() or not value.isupper():
+        raise ValidationError('Use one capital letter per row, like ABCDEF.')
+    if len(set(value)) != len(value):
+        raise ValidationError('Each row letter can only be used once.')
 
 
 class FoodItem(models.Model):
     """Model for food items available for ordering"""
-    name = models.CharField(max_length=100)
+    # The natural key catalogue imports match on
+    name = models.CharField(max_length=100, unique=True)
     description = models.TextField()
     price = models.DecimalField(
         max_digits=8, 
@@ -23,6 +61,67 @@ class FoodItem(models.Model):
         return self.name
 
 
+class Auditorium(models.Model):
+    """A screen with a rectangular seat layout"""
+    name = models.CharField(max_length=100, unique=True)
+    rows = models.CharField(
+        max_length=26,
+        default='ABCDEFGHIJKLMNOPQRSTUVWXYZ',
+        validators=[validate_row_letters],
+        help_text='Row letters from front to back, one letter per row'
+    )
+    seats_per_row = models.PositiveSmallIntegerField(default=30)
+
+    class Meta:
+        ordering = ['name']
+
+    def __str__(self):
+        return self.name
+
+    def sync_seats(self):
+        """Create any Seat rows the layout has but the database lacks"""
+        Seat.objects.bulk_create([
+            Seat(auditorium=self, row=row, number=number)
+            for row in self.rows
+            for number in range(1, self.seats_per_row + 1)
+        ], ignore_conflicts=True)
+
+
+class Seat(models.Model):
+    """One seat in an auditorium"""
+    auditorium = models.ForeignKey(Auditorium, on_delete=models.CASCADE, related_name='seats')
+    row = models.CharField(max_length=1)
+    number = models.PositiveSmallIntegerField()
+
+    class Meta:
+        ordering = ['auditorium', 'row', 'number']
+        unique_together = ['auditorium', 'row', 'number']
+
+    def __str__(self):
+        return f"{self.auditorium} {self.label}"
+
+    @property
+    def label(self):
+        return f"{self.row}{self.number}"
+
+
+class Show(models.Model):
+    """A screening in an auditorium; orders are partitioned by show"""
+    auditorium = models.ForeignKey(Auditorium, on_delete=models.PROTECT, related_name='shows')
+    title = models.CharField(max_length=200)
+    starts_at = models.DateTimeField()
+    ends_at = models.DateTimeField()
+
+    class Meta:
+        ordering = ['-starts_at']
+        indexes = [
+            models.Index(fields=['starts_at', 'ends_at'], name='show_time_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.title} - {self.auditorium} {timezone.localtime(self.starts_at):%d %b %H:%M}"
+
+
 class Order(models.Model):
     """Model for customer orders"""
     PAYMENT_METHOD_CHOICES = [
@@ -40,6 +139,37 @@ class Order(models.Model):
         ('FAILED', 'Failed'),
     ]
 
+    # Methods settled by a payment gateway, which echoes payment_reference back
+    GATEWAY_PAYMENT_METHODS = ['UPI', 'PHONEPE', 'GPAY', 'PAYTM', 'CARD']
+
+    FULFILMENT_STATUS_CHOICES = [
+        ('PLACED', 'Placed'),
+        ('PREPARING', 'Preparing'),
+        ('READY', 'Ready'),
+        ('DELIVERED', 'Delivered to seat'),
+        ('CANCELLED', 'Cancelled'),
+    ]
+
+    # Allowed fulfilment moves; DELIVERED and CANCELLED are final
+    FULFILMENT_TRANSITIONS = {
+        'PLACED': {'PREPARING', 'CANCELLED'},
+        'PREPARING': {'READY', 'CANCELLED'},
+        'READY': {'DELIVERED', 'CANCELLED'},
+    }
+
+    # Orders the kitchen still has to deal with
+    OPEN_FULFILMENT_STATUSES = ['PLACED', 'PREPARING', 'READY']
+
+    # Timestamp field stamped on entering each stage
+    FULFILMENT_TIMESTAMPS = {
+        'PREPARING': 'preparing_at',
+        'READY': 'ready_at',
+        'DELIVERED': 'delivered_at',
+        'CANCELLED': 'cancelled_at',
+    }
+
+    show = models.ForeignKey(Show, on_delete=models.SET_NULL, null=True, blank=True, related_name='orders')
+    seat = models.ForeignKey(Seat, on_delete=models.SET_NULL, null=True, blank=True, related_name='orders')
     seat_number = models.CharField(max_length=10)
     customer_name = models.CharField(max_length=100)
     mobile_number = models.CharField(max_length=15, blank=True, null=True)
@@ -53,26 +183,84 @@ class Order(models.Model):
         choices=PAYMENT_STATUS_CHOICES,
         default='PENDING'
     )
+    payment_reference = models.CharField(max_length=32, unique=True, null=True, blank=True)
     total_amount = models.DecimalField(
         max_digits=10,
         decimal_places=2,
         default=Decimal('0.00')
     )
+    fulfilment_status = models.CharField(
+        max_length=10,
+        choices=FULFILMENT_STATUS_CHOICES,
+        default='PLACED'
+    )
+    claimed_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='claimed_orders'
+    )
+    preparing_at = models.DateTimeField(null=True, blank=True)
+    ready_at = models.DateTimeField(null=True, blank=True)
+    delivered_at = models.DateTimeField(null=True, blank=True)
+    cancelled_at = models.DateTimeField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Date ranges and the default newest-first ordering
+            models.Index(fields=['created_at'], name='order_created_idx'),
+            # owner_orders status / payment filters, still ordered by date
+            models.Index(fields=['payment_status', 'created_at'], name='order_status_created_idx'),
+            models.Index(fields=['payment_method', 'created_at'], name='order_method_created_idx'),
+            # Per-seat lookups and analytics
+            models.Index(fields=['seat_number', 'created_at'], name='order_seat_created_idx'),
+            # Open-order counts and the oldest-first claim queue
+            models.Index(fields=['fulfilment_status', 'created_at'], name='order_fulfil_created_idx'),
+            # Per-show dashboards and seat analysis read only that show's orders
+            models.Index(fields=['show', 'created_at'], name='order_show_created_idx'),
+            models.Index(fields=['show', 'seat'], name='order_show_seat_idx'),
+        ]
 
     def __str__(self):
         return f"Order {self.id} - {self.customer_name} (Seat {self.seat_number})"
 
     def calculate_total(self):
-        """Calculate total amount from order items"""
-        total = sum(item.subtotal for item in self.orderitem_set.all())
-        self.total_amount = total
-        self.save()
-        return total
+        """Recalculate total amount from order items in the database"""
+        Order.recalculate_totals([self.pk])
+        self.refresh_from_db(fields=['total_amount', 'updated_at'])
+        return self.total_amount
+
+    def apply_total_delta(self, delta):
+        """Add delta to the stored total with a single UPDATE"""
+        if not delta:
+            return
+        deferred_ids = getattr(_deferred, 'order_ids', None)
+        if deferred_ids is not None:
+            deferred_ids.add(self.pk)
+            return
+        Order.objects.filter(pk=self.pk).update(
+            total_amount=F('total_amount') + delta,
+            updated_at=timezone.now()
+        )
+        self.total_amount += delta
+
+    @staticmethod
+    def recalculate_totals(order_ids):
+        """Recalculate totals for the given orders with one aggregate UPDATE"""
+        order_ids = list(order_ids)
+        if not order_ids:
+            return
+        subtotals = OrderItem.objects.filter(order=OuterRef('pk')).values('order').annotate(
+            total=Sum(F('quantity') * F('price'), output_field=DecimalField(max_digits=10, decimal_places=2))
+        ).values('total')
+        Order.objects.filter(pk__in=order_ids).update(
+            total_amount=Coalesce(Subquery(subtotals), Decimal('0.00')),
+            updated_at=timezone.now()
+        )
 
 
 class OrderItem(models.Model):
@@ -93,10 +281,145 @@ class OrderItem(models.Model):
         """Calculate subtotal for this item"""
         return self.quantity * self.price
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """Remember the loaded subtotal so saves can apply just the change"""
+        instance = super().from_db(db, field_names, values)
+        if not {'order_id', 'quantity', 'price'} & instance.get_deferred_fields():
+            instance._remember_subtotal()
+        return instance
+
+    def _remember_subtotal(self):
+        """Remember what this line currently contributes to its order total"""
+        self._stored_order_id = self.order_id
+        self._stored_subtotal = self.subtotal if self.price is not None else Decimal('0.00')
+
     def save(self, *args, **kwargs):
-        """Set price from food item if not set"""
+        """Set price from food item if not set and keep the order total in step"""
         if not self.price:
             self.price = self.food_item.price
-        super().save(*args, **kwargs)
-        # Update order total
-        self.order.calculate_total()
+
+        if self._state.adding:
+            stored_order_id, stored_subtotal = None, Decimal('0.00')
+        elif hasattr(self, '_stored_subtotal'):
+            stored_order_id, stored_subtotal = self._stored_order_id, self._stored_subtotal
+        else:
+            stored = OrderItem.objects.get(pk=self.pk)
+            stored_order_id, stored_subtotal = stored._stored_order_id, stored._stored_subtotal
+
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
+            # Apply only the change in this line's subtotal to the order total
+            if stored_order_id is not None and stored_order_id != self.order_id:
+                Order(pk=stored_order_id).apply_total_delta(-stored_subtotal)
+                stored_subtotal = Decimal('0.00')
+            self._order_for_update().apply_total_delta(self.subtotal - stored_subtotal)
+        self._remember_subtotal()
+
+    def remove_from_total(self):
+        """Take what this deleted line contributed off its order total"""
+        self._order_for_update().apply_total_delta(-getattr(self, '_stored_subtotal', self.subtotal))
+
+    def _order_for_update(self):
+        """Return the loaded order, or a bare instance to avoid fetching it"""
+        if OrderItem.order.is_cached(self):
+            return self.order
+        return Order(pk=self.order_id)
+
+
+class OrderSearchToken(models.Model):
+    """Normalised search key for an order: name words, seat and mobile suffixes"""
+    order = models.ForeignKey(Order, on_delete=models.CASCADE, related_name='search_tokens')
+    token = models.CharField(max_length=110)
+
+    class Meta:
+        indexes = [
+            # Covers exact and prefix lookups without touching the table
+            models.Index(fields=['token', 'order'], name='order_search_token_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.token} -> order {self.order_id}"
+
+
+class PaymentTransaction(models.Model):
+    """One gateway settlement line, kept so re-sent files and webhooks apply once"""
+    RESULT_CHOICES = [
+        ('APPLIED', 'Applied'),
+        ('UNCHANGED', 'Already settled'),
+        ('UNMATCHED', 'No matching order'),
+        ('MISMATCH', 'Amount mismatch'),
+        ('CONFLICT', 'Conflicts with order status'),
+    ]
+
+    transaction_id = models.CharField(max_length=64, unique=True)
+    payment_reference = models.CharField(max_length=32, db_index=True)
+    order = models.ForeignKey(
+        Order, on_delete=models.SET_NULL, null=True, blank=True, related_name='payment_transactions'
+    )
+    amount = models.DecimalField(max_digits=10, decimal_places=2)
+    status = models.CharField(max_length=10, choices=Order.PAYMENT_STATUS_CHOICES)
+    result = models.CharField(max_length=10, choices=RESULT_CHOICES)
+    settled_at = models.DateTimeField(null=True, blank=True)
+    received_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-received_at']
+        indexes = [
+            # Unmatched and mismatched lines for follow-up, newest first
+            models.Index(fields=['result', 'received_at'], name='payment_txn_result_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.transaction_id} {self.status} -> {self.result}"
+
+
+class IdempotencyKey(models.Model):
+    """Client-chosen key for one order submission, so retries return the same order"""
+    key = models.CharField(max_length=64, unique=True)
+    order = models.ForeignKey(Order, on_delete=models.CASCADE, related_name='idempotency_keys')
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    def __str__(self):
+        return f"{self.key} -> order {self.order_id}"
+
+
+class DailySalesRollup(models.Model):
+    """Pre-aggregated orders and revenue for one day, payment method and status"""
+    date = models.DateField()
+    payment_method = models.CharField(max_length=10, choices=Order.PAYMENT_METHOD_CHOICES)
+    payment_status = models.CharField(max_length=10, choices=Order.PAYMENT_STATUS_CHOICES)
+    order_count = models.PositiveIntegerField(default=0)
+    revenue = models.DecimalField(max_digits=12, decimal_places=2, default=Decimal('0.00'))
+
+    class Meta:
+        ordering = ['date']
+        unique_together = ['date', 'payment_method', 'payment_status']
+
+    def __str__(self):
+        return f"{self.date} {self.payment_method}/{self.payment_status}: {self.order_count} orders"
+
+
+class DailyItemRollup(models.Model):
+    """Pre-aggregated quantity and revenue for one day and food item"""
+    date = models.DateField()
+    food_item = models.ForeignKey(FoodItem, on_delete=models.CASCADE)
+    quantity = models.PositiveIntegerField(default=0)
+    revenue = models.DecimalField(max_digits=12, decimal_places=2, default=Decimal('0.00'))
+    order_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ['date']
+        unique_together = ['date', 'food_item']
+
+    def __str__(self):
+        return f"{self.date} {self.food_item_id}: {self.quantity} sold"
+
+
+class RollupWatermark(models.Model):
+    """Last day whose sales and item rollups are complete; there is only ever one row"""
+    closed_through = models.DateField()
+
+    def __str__(self):
+        return f"Rolled up through {self.closed_through}"
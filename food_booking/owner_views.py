@@ -1,14 +1,24 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required, user_passes_test
 from django.contrib import messages
-from django.db.models import Count, Sum, Q
+from django.db.models import Count, Sum
 from django.utils import timezone
-from django.http import HttpResponseForbidden
+from django.http import Http404, HttpResponseForbidden
 from django.core.exceptions import PermissionDenied
+from django.utils.http import url_has_allowed_host_and_scheme, urlencode
+from django.views.decorators.http import require_POST
 import logging
 from datetime import datetime, timedelta
-from .models import FoodItem, Order, OrderItem
+from .models import FoodItem, Order, Show
+from .delivery import MAX_WAIT, TRIP_CAPACITY, plan_trips, ready_orders
 from .forms import FoodItemForm
+from .fulfilment import InvalidTransition, advance_order, claim_next_order, open_order_count
+from .events import live_streams_enabled
+from .kitchen import get_counters, open_orders, order_summary
+from .pagination import KeysetPage, cached_count
+from .search import matching_order_ids, search_orders
+from .stats import dashboard_stats, payment_breakdown, popular_items, show_summary, start_of_day
+from .timeseries import daily_series, hourly_series, show_slot_series
 import json
 
 
@@ -16,6 +26,15 @@ import json
 # Set up logging for security events
 logger = logging.getLogger(__name__)
 
+# Day ranges the analytics page can report on
+ANALYTICS_RANGES = [7, 30, 90, 365]
+
+# Recent shows offered in the owner filters
+RECENT_SHOWS = 20
+
+# Ranked search results listed at once; searches are for finding an order, not paging
+SEARCH_RESULTS = 50
+
 
 def is_owner(user):
     """Check if user is an owner/admin - enhanced security"""
@@ -51,55 +70,44 @@ def owner_dashboard(request):
         messages.error(request, 'Access denied. You do not have permission to view this area.')
         return redirect('food_booking:menu')
 
-    # Get date range for filtering
-    today = timezone.now().date()
-    week_ago = today - timedelta(days=7)
-    month_ago = today - timedelta(days=30)
+    # Windowed revenue and counts in one query
+    stats = dashboard_stats()
 
-    # Today's statistics
-    today_orders = Order.objects.filter(created_at__date=today)
-    today_revenue = today_orders.aggregate(total=Sum('total_amount'))['total'] or 0
-    today_count = today_orders.count()
-
-    # This week's statistics
-    week_orders = Order.objects.filter(created_at__date__gte=week_ago)
-    week_revenue = week_orders.aggregate(total=Sum('total_amount'))['total'] or 0
-    week_count = week_orders.count()
-
-    # This month's statistics
-    month_orders = Order.objects.filter(created_at__date__gte=month_ago)
-    month_revenue = month_orders.aggregate(total=Sum('total_amount'))['total'] or 0
-    month_count = month_orders.count()
-
-    # Payment method breakdown
-    payment_stats = Order.objects.values('payment_method').annotate(
-        count=Count('id'),
-        total=Sum('total_amount')
-    ).order_by('-total')
+    # Payment method breakdown, which also carries the pending counts
+    payment_stats = payment_breakdown()
 
     # Recent orders
     recent_orders = Order.objects.select_related().order_by('-created_at')[:10]
 
     # Popular food items
-    popular_items = OrderItem.objects.values('food_item__name').annotate(
-        total_quantity=Sum('quantity'),
-        total_revenue=Sum('price')
-    ).order_by('-total_quantity')[:5]
+    top_sellers = popular_items(5)
 
-    # Pending orders count
-    pending_orders = Order.objects.filter(payment_status='PENDING').count()
+    # Orders awaiting payment, summed from the breakdown above
+    pending_orders = sum(row['pending'] for row in payment_stats)
+
+    # Orders not yet delivered, counted from the fulfilment index
+    open_orders = open_order_count()
+
+    # Today's orders per hour, so interval rushes show up as they happen
+    today = timezone.localdate()
+    hourly_orders = hourly_series(today, today)
+    busiest = max(point['count'] for point in hourly_orders) or 1
+    for point in hourly_orders:
+        point['height'] = round(point['count'] * 100 / busiest)
 
     context = {
-        'today_revenue': today_revenue,
-        'today_count': today_count,
-        'week_revenue': week_revenue,
-        'week_count': week_count,
-        'month_revenue': month_revenue,
-        'month_count': month_count,
+        'today_revenue': stats['today_revenue'],
+        'today_count': stats['today_count'],
+        'week_revenue': stats['week_revenue'],
+        'week_count': stats['week_count'],
+        'month_revenue': stats['month_revenue'],
+        'month_count': stats['month_count'],
         'payment_stats': payment_stats,
         'recent_orders': recent_orders,
-        'popular_items': popular_items,
+        'popular_items': top_sellers,
         'pending_orders': pending_orders,
+        'open_orders': open_orders,
+        'hourly_orders': hourly_orders,
     }
 
     return render(request, 'food_booking/owner/dashboard.html', context)
@@ -115,6 +123,7 @@ def owner_orders(request):
     payment_filter = request.GET.get('payment', '')
     date_filter = request.GET.get('date', '')
     search_query = request.GET.get('search', '')
+    show_filter = request.GET.get('show', '')
 
     # Base queryset
     orders = Order.objects.select_related().prefetch_related('orderitem_set__food_item')
@@ -126,46 +135,61 @@ def owner_orders(request):
     if payment_filter:
         orders = orders.filter(payment_method=payment_filter)
 
+    if show_filter.isdigit():
+        # Leads the (show, created_at) index, so one show is a single range scan
+        orders = orders.filter(show_id=show_filter)
+
     if date_filter:
+        # Range predicates so the created_at indexes can be used
+        today = timezone.localdate()
         if date_filter == 'today':
-            orders = orders.filter(created_at__date=timezone.now().date())
+            orders = orders.filter(created_at__gte=start_of_day(today))
         elif date_filter == 'week':
-            week_ago = timezone.now().date() - timedelta(days=7)
-            orders = orders.filter(created_at__date__gte=week_ago)
+            orders = orders.filter(created_at__gte=start_of_day(today - timedelta(days=7)))
         elif date_filter == 'month':
-            month_ago = timezone.now().date() - timedelta(days=30)
-            orders = orders.filter(created_at__date__gte=month_ago)
+            orders = orders.filter(created_at__gte=start_of_day(today - timedelta(days=30)))
 
     if search_query:
-        orders = orders.filter(
-            Q(customer_name__icontains=search_query) |
-            Q(seat_number__icontains=search_query) |
-            Q(mobile_number__icontains=search_query)
+        # Name prefixes, exact seats and mobile suffixes via the search index,
+        # best match first within the other filters
+        page = None
+        page_orders = search_orders(search_query, limit=SEARCH_RESULTS, orders=orders)
+        orders = orders.filter(id__in=matching_order_ids(search_query))
+    else:
+        # Cursor pagination on (created_at, id), newest first
+        page = KeysetPage(
+            orders,
+            after=request.GET.get('after'),
+            before=request.GET.get('before'),
+            page_size=20
         )
+        page_orders = page.orders
 
-    # Order by creation date
-    orders = orders.order_by('-created_at')
-
-    # Pagination (simple version)
-    page_size = 20
-    page = int(request.GET.get('page', 1))
-    start = (page - 1) * page_size
-    end = start + page_size
-
-    total_orders = orders.count()
-    total_pages = (total_orders + page_size - 1) // page_size
+    # The total is only informational, so a recent count is good enough
+    total_orders = cached_count(orders, (status_filter, payment_filter, date_filter, search_query, show_filter))
 
-    orders_page = orders[start:end]
+    filter_query = urlencode({
+        key: value for key, value in [
+            ('status', status_filter),
+            ('payment', payment_filter),
+            ('date', date_filter),
+            ('search', search_query),
+            ('show', show_filter),
+        ] if value
+    })
 
     context = {
-        'orders': orders_page,
+        'orders': page_orders,
         'total_orders': total_orders,
-        'current_page': page,
-        'total_pages': total_pages,
+        'next_cursor': page.next_cursor if page else None,
+        'previous_cursor': page.previous_cursor if page else None,
+        'filter_query': filter_query,
         'status_filter': status_filter,
         'payment_filter': payment_filter,
         'date_filter': date_filter,
         'search_query': search_query,
+        'show_filter': show_filter,
+        'shows': Show.objects.select_related('auditorium').order_by('-starts_at')[:RECENT_SHOWS],
         'payment_methods': Order.PAYMENT_METHOD_CHOICES,
         'payment_statuses': Order.PAYMENT_STATUS_CHOICES,
     }
@@ -186,7 +210,7 @@ def owner_order_detail(request, order_id):
         new_status = request.POST.get('payment_status')
         if new_status in dict(Order.PAYMENT_STATUS_CHOICES):
             order.payment_status = new_status
-            order.save()
+            order.save(update_fields=['payment_status', 'updated_at'])
             messages.success(request, f'Payment status updated to {order.get_payment_status_display()}')
             return redirect('food_booking:owner_order_detail', order_id=order.id)
 
@@ -289,67 +313,181 @@ def owner_analytics(request):
     """Detailed analytics and reports"""
 
     # Date range for analytics
-    end_date = timezone.now().date()
-    start_date = end_date - timedelta(days=30)
-
-    # Daily revenue for the last 30 days
-    daily_revenue = []
-    daily_orders = []
-
-    for i in range(30):
-        date = end_date - timedelta(days=i)
-        day_orders = Order.objects.filter(created_at__date=date)
-        revenue = day_orders.aggregate(total=Sum('total_amount'))['total'] or 0
-        count = day_orders.count()
-
-        daily_revenue.append({
-            'date': date.strftime('%Y-%m-%d'),
-            'revenue': float(revenue)
-        })
-        daily_orders.append({
-            'date': date.strftime('%Y-%m-%d'),
-            'count': count
-        })
+    days = request.GET.get('days', '')
+    days = int(days) if days.isdigit() and int(days) in ANALYTICS_RANGES else 30
+    end_date = timezone.localdate()
+    start_date = end_date - timedelta(days=days)
+
+    # Daily revenue and order counts from a single grouped query
+    series = daily_series(end_date - timedelta(days=days - 1), end_date)
+    daily_revenue = [
+        {'date': point['period'].strftime('%Y-%m-%d'), 'revenue': float(point['revenue'])}
+        for point in series
+    ]
+    daily_orders = [
+        {'date': point['period'].strftime('%Y-%m-%d'), 'count': point['count']}
+        for point in series
+    ]
 
     # Payment method analysis
-    payment_analysis = Order.objects.filter(
-        created_at__date__gte=start_date
-    ).values('payment_method').annotate(
-        count=Count('id'),
-        total_revenue=Sum('total_amount'),
-        avg_order_value=Sum('total_amount') / Count('id')
-    ).order_by('-total_revenue')
+    payment_analysis = [
+        {
+            'payment_method': row['payment_method'],
+            'count': row['count'],
+            'total_revenue': row['total'],
+            'avg_order_value': row['total'] / row['count'] if row['count'] else 0,
+        }
+        for row in payment_breakdown(start_date)
+    ]
 
     # Top selling items
-    top_items = OrderItem.objects.filter(
-        order__created_at__date__gte=start_date
-    ).values('food_item__name').annotate(
-        total_quantity=Sum('quantity'),
-        total_revenue=Sum('price'),
-        order_count=Count('order', distinct=True)
-    ).order_by('-total_quantity')[:10]
+    top_items = popular_items(10, start_date)
 
     # Seat usage analysis
-    seat_analysis = Order.objects.filter(
-        created_at__date__gte=start_date
+    seat_analysis = Order.objects.order_by().filter(
+        created_at__gte=start_of_day(start_date)
     ).values('seat_number').annotate(
         order_count=Count('id'),
         total_revenue=Sum('total_amount')
     ).order_by('-order_count')[:20]
 
     context = {
-        'daily_revenue': json.dumps(list(reversed(daily_revenue))),
-        'daily_orders': json.dumps(list(reversed(daily_orders))),
+        'daily_revenue': json.dumps(daily_revenue),
+        'daily_orders': json.dumps(daily_orders),
+        'show_slots': show_slot_series(start_date, end_date),
         'payment_analysis': payment_analysis,
         'top_items': top_items,
         'seat_analysis': seat_analysis,
         'start_date': start_date,
         'end_date': end_date,
+        'days': days,
+        'analytics_ranges': ANALYTICS_RANGES,
     }
 
     return render(request, 'food_booking/owner/analytics.html', context)
 
 
+@login_required
+@user_passes_test(is_owner)
+def owner_show(request, show_id):
+    """Orders and sales for a single show"""
+
+    show = get_object_or_404(Show.objects.select_related('auditorium'), id=show_id)
+    summary = show_summary(show)
+
+    labels = dict(Order.FULFILMENT_STATUS_CHOICES)
+    for row in summary['fulfilment']:
+        row['label'] = labels.get(row['fulfilment_status'], row['fulfilment_status'])
+
+    context = {
+        'show': show,
+        'summary': summary,
+    }
+
+    return render(request, 'food_booking/owner/show.html', context)
+
+
+@login_required
+@user_passes_test(is_owner)
+def owner_kitchen(request, counter=None):
+    """Live kitchen display of open orders for one counter"""
+
+    counters = list(get_counters())
+    if counter is None:
+        return redirect('food_booking:owner_kitchen_counter', counter=counters[0])
+    if counter not in counters:
+        raise Http404('Unknown counter.')
+
+    # With streams, orders arrive over the stream and rendering needs no
+    # queries; without them the page carries its orders and reloads itself
+    live_streams = live_streams_enabled()
+    orders = [] if live_streams else [
+        summary for summary in map(order_summary, open_orders()) if summary['counter'] == counter
+    ]
+    context = {
+        'counter': counter,
+        'counters': counters,
+        'live_streams': live_streams,
+        'orders': orders,
+    }
+
+    return render(request, 'food_booking/owner/kitchen.html', context)
+
+
+@login_required
+@user_passes_test(is_owner)
+@require_POST
+def owner_claim_order(request, counter):
+    """Give the oldest placed order for a counter to the current staff member"""
+
+    if counter not in get_counters():
+        raise Http404('Unknown counter.')
+
+    order = claim_next_order(request.user, counter)
+    if order is None:
+        messages.info(request, 'No orders waiting.')
+    else:
+        messages.success(request, f'Order #{order.id} for seat {order.seat_number} is yours.')
+
+    return redirect('food_booking:owner_kitchen_counter', counter=counter)
+
+
+@login_required
+@user_passes_test(is_owner)
+@require_POST
+def owner_advance_order(request, order_id):
+    """Move an order to its next fulfilment stage"""
+
+    order = get_object_or_404(Order, id=order_id)
+    try:
+        advance_order(order, request.POST.get('fulfilment_status'), request.user)
+        messages.success(request, f'Order #{order.id} is now {order.get_fulfilment_status_display()}.')
+    except InvalidTransition as e:
+        messages.error(request, str(e))
+
+    next_url = request.POST.get('next')
+    if next_url and url_has_allowed_host_and_scheme(next_url, allowed_hosts={request.get_host()}):
+        return redirect(next_url)
+    return redirect('food_booking:owner_order_detail', order_id=order.id)
+
+
+@login_required
+@user_passes_test(is_owner)
+def owner_delivery(request):
+    """Ready orders grouped into runner trips"""
+
+    trips = plan_trips(ready_orders())
+
+    context = {
+        'due_trips': [trip for trip in trips if trip.due],
+        'waiting_trips': [trip for trip in trips if not trip.due],
+        'trip_capacity': TRIP_CAPACITY,
+        'max_wait_minutes': int(MAX_WAIT.total_seconds() // 60),
+    }
+
+    return render(request, 'food_booking/owner/delivery.html', context)
+
+
+@login_required
+@user_passes_test(is_owner)
+@require_POST
+def owner_deliver_trip(request):
+    """Mark every order on a finished trip as delivered"""
+
+    order_ids = [order_id for order_id in request.POST.getlist('order_ids') if order_id.isdigit()]
+    delivered = 0
+    for order in Order.objects.filter(id__in=order_ids):
+        try:
+            advance_order(order, 'DELIVERED', request.user)
+            delivered += 1
+        except InvalidTransition:
+            # Already delivered or cancelled by someone else
+            pass
+
+    messages.success(request, f'{delivered} order(s) delivered.')
+    return redirect('food_booking:owner_delivery')
+
+
 @login_required
 @user_passes_test(is_owner)
 def owner_settings(request):
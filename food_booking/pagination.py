@@ -0,0 +1,78 @@
+from django.core.cache import cache
+from django.utils.dateparse import parse_datetime
+import base64
+import binascii
+import hashlib
+
+
+# How long a filtered order count may be reused before it is recounted
+COUNT_CACHE_TIMEOUT = 60
+
+
+def encode_cursor(order):
+    """Opaque cursor for an order's (created_at, id) position"""
+    raw = f'{order.created_at.isoformat()}|{order.id}'
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Return (created_at, id) for a cursor, or None if it is malformed"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+        created_at, order_id = raw.split('|')
+        created_at = parse_datetime(created_at)
+        order_id = int(order_id)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        return None
+    if created_at is None:
+        return None
+    return created_at, order_id
+
+
+class KeysetPage:
+    """One page of orders, newest first, addressed by cursors instead of offsets
+
+    Pages are anchored on the (created_at, id) of their first or last order,
+    so orders that arrive while someone is paging never shift rows between
+    pages, and deep pages cost the same as the first one.
+    """
+
+    def __init__(self, queryset, after=None, before=None, page_size=20):
+        after = decode_cursor(after) if after else None
+        before = decode_cursor(before) if before else None
+
+        if before and not after:
+            created_at, order_id = before
+            rows = list(queryset.filter(created_at__gte=created_at).exclude(
+                created_at=created_at, id__lte=order_id
+            ).order_by('created_at', 'id')[:page_size + 1])
+            self.has_previous = len(rows) > page_size
+            self.orders = list(reversed(rows[:page_size]))
+            self.has_next = True
+        else:
+            if after:
+                created_at, order_id = after
+                queryset = queryset.filter(created_at__lte=created_at).exclude(
+                    created_at=created_at, id__gte=order_id
+                )
+            rows = list(queryset.order_by('-created_at', '-id')[:page_size + 1])
+            self.has_next = len(rows) > page_size
+            self.orders = rows[:page_size]
+            self.has_previous = after is not None
+
+        if not self.orders:
+            self.has_next = self.has_previous = False
+
+    @property
+    def next_cursor(self):
+        return encode_cursor(self.orders[-1]) if self.has_next else None
+
+    @property
+    def previous_cursor(self):
+        return encode_cursor(self.orders[0]) if self.has_previous else None
+
+
+def cached_count(queryset, cache_key_parts, timeout=COUNT_CACHE_TIMEOUT):
+    """Count the queryset, reusing the result for the same filters for a short while"""
+    digest = hashlib.sha1(repr(cache_key_parts).encode()).hexdigest()
+    return cache.get_or_set(f'food_booking:order_count:{digest}', queryset.count, timeout)
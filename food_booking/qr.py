@@ -0,0 +1,185 @@
+from django.urls import reverse
+from django.utils.http import urlencode
+from concurrent.futures import ProcessPoolExecutor
+from PIL import Image, ImageDraw, ImageFont
+from .seat_tokens import make_seat_token
+import hashlib
+import json
+import os
+import qrcode
+
+
+# Shared by every code, so all codes in a run are encoded the same way.
+# A fixed mask skips scoring all eight masks per code, the bulk of the
+# encoding time; every mask scans, the choice only tunes contrast.
+QR_OPTIONS = {
+    'error_correction': qrcode.constants.ERROR_CORRECT_M,
+    'mask_pattern': 0,
+    'box_size': 8,
+    'border': 4,
+}
+
+# Codes per printed page: columns x rows
+PAGE_COLUMNS = 6
+PAGE_ROWS = 8
+
+# A4 at 300 dpi for print-ready pages
+PAGE_SIZE = (2480, 3508)
+PAGE_DPI = 300
+LABEL_HEIGHT = 40
+
+FORMATS = ['png', 'svg', 'pdf']
+
+MANIFEST_NAME = 'manifest.json'
+
+
+def seat_url(base_url, auditorium, label):
+    """Deep link printed on one seat: its signed token, opening the seat's order page"""
+    token = make_seat_token(auditorium.id, label)
+    return f"{base_url.rstrip('/')}{reverse('food_booking:seat_menu', args=[token])}"
+
+
+def show_url(base_url, show):
+    """Deep link for one show, for posters and tickets"""
+    return f"{base_url.rstrip('/')}{reverse('food_booking:menu')}?{urlencode({'show': show.id})}"
+
+
+def content_hash(codes, fmt):
+    """Fingerprint of everything that decides an output file's content"""
+    digest = hashlib.sha256(json.dumps([fmt, QR_OPTIONS, PAGE_COLUMNS, PAGE_ROWS, codes]).encode())
+    return digest.hexdigest()
+
+
+# Work done in the pool: each process keeps one configured QRCode
+
+_qr = None
+
+
+def _encoder():
+    global _qr
+    if _qr is None:
+        _qr = qrcode.QRCode(**QR_OPTIONS)
+    return _qr
+
+
+def encode(url):
+    """Module matrix for url, border included, as rows of booleans"""
+    qr = _encoder()
+    qr.clear()
+    qr.add_data(url)
+    qr.make(fit=True)
+    return qr.get_matrix()
+
+
+def matrix_image(matrix):
+    """Black-on-white image of a module matrix at QR_OPTIONS box size"""
+    size = len(matrix)
+    image = Image.new('1', (size, size), 1)
+    image.putdata([0 if dark else 1 for row in matrix for dark in row])
+    return image.resize((size * QR_OPTIONS['box_size'],) * 2, Image.NEAREST)
+
+
+def compose_pages(codes):
+    """Lay labelled codes out on print pages, PAGE_COLUMNS x PAGE_ROWS per page"""
+    per_page = PAGE_COLUMNS * PAGE_ROWS
+    cell_width = PAGE_SIZE[0] // PAGE_COLUMNS
+    cell_height = PAGE_SIZE[1] // PAGE_ROWS
+    pages = []
+    for start in range(0, len(codes), per_page):
+        page = Image.new('L', PAGE_SIZE, 255)
+        draw = ImageDraw.Draw(page)
+        font = ImageFont.load_default(size=LABEL_HEIGHT - 8)
+        for index, (label, url) in enumerate(codes[start:start + per_page]):
+            tile = matrix_image(encode(url))
+            tile.thumbnail((cell_width, cell_height - LABEL_HEIGHT))
+            x = (index % PAGE_COLUMNS) * cell_width + (cell_width - tile.width) // 2
+            y = (index // PAGE_COLUMNS) * cell_height
+            page.paste(tile, (x, y))
+            draw.text((x + tile.width // 2, y + tile.height + 4), label, fill=0, font=font, anchor='ma')
+        pages.append(page)
+    return pages
+
+
+def svg_sheet(codes):
+    """One SVG with a <symbol> per code, laid out in a grid of <use> elements"""
+    symbols, uses = [], []
+    cell = None
+    for index, (label, url) in enumerate(codes):
+        matrix = encode(url)
+        size = len(matrix)
+        cell = cell or size + 4
+        path = ''.join(
+            f'M{x},{y}h1v1h-1z' for y, row in enumerate(matrix) for x, dark in enumerate(row) if dark
+        )
+        symbols.append(f'<symbol id="{label}" viewBox="0 0 {size} {size}"><path d="{path}"/></symbol>')
+        x, y = (index % PAGE_COLUMNS) * cell, (index // PAGE_COLUMNS) * cell
+        uses.append(
+            f'<use href="#{label}" x="{x}" y="{y}" width="{size}" height="{size}"/>'
+            f'<text x="{x + size / 2}" y="{y + size + 2}" font-size="2" text-anchor="middle">{label}</text>'
+        )
+    rows = -(-len(codes) // PAGE_COLUMNS)
+    width, height = PAGE_COLUMNS * (cell or 0), rows * (cell or 0)
+    return (
+        f'<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 {width} {height}" shape-rendering="crispEdges">'
+        f'<rect width="100%" height="100%" fill="white"/><defs>{"".join(symbols)}</defs>{"".join(uses)}</svg>'
+    )
+
+
+def render_sheet(path, codes, fmt):
+    """Encode codes and write them to path as a PNG sheet, SVG sprite sheet or PDF"""
+    if fmt == 'svg':
+        with open(path, 'w') as file:
+            file.write(svg_sheet(codes))
+    elif fmt == 'pdf':
+        pages = compose_pages(codes)
+        pages[0].save(path, save_all=True, append_images=pages[1:], resolution=PAGE_DPI)
+    else:
+        compose_pages(codes)[0].save(path, dpi=(PAGE_DPI, PAGE_DPI))
+    return path
+
+
+# Planning and running a batch
+
+def sheets_for(name, codes, fmt):
+    """Output files for one group of codes: a PDF holds them all, PNG/SVG one page each"""
+    if fmt == 'pdf':
+        return [(f'{name}.pdf', codes)]
+    per_page = PAGE_COLUMNS * PAGE_ROWS
+    return [
+        (f'{name}-{number:03d}.{fmt}', codes[start:start + per_page])
+        for number, start in enumerate(range(0, len(codes), per_page), start=1)
+    ]
+
+
+def generate(groups, output_dir, fmt='pdf', workers=None, force=False):
+    """Write sheets for {name: [(label, url), ...]} groups, skipping unchanged ones
+
+    A manifest in output_dir records the content hash of every sheet. Only
+    sheets whose codes or layout changed, or whose file is missing, are
+    encoded again, spread over a process pool. Returns (written, skipped).
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    manifest_path = os.path.join(output_dir, MANIFEST_NAME)
+    try:
+        with open(manifest_path) as file:
+            manifest = json.load(file)
+    except (OSError, ValueError):
+        manifest = {}
+
+    sheets, skipped, hashes = [], 0, {}
+    for name, codes in groups.items():
+        for filename, sheet_codes in sheets_for(name, codes, fmt):
+            hashes[filename] = content_hash(sheet_codes, fmt)
+            path = os.path.join(output_dir, filename)
+            if not force and manifest.get(filename) == hashes[filename] and os.path.exists(path):
+                skipped += 1
+            else:
+                sheets.append((path, sheet_codes))
+
+    if sheets:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            list(pool.map(render_sheet, *zip(*sheets), [fmt] * len(sheets)))
+
+    with open(manifest_path, 'w') as file:
+        json.dump(hashes, file, indent=2, sort_keys=True)
+    return len(sheets), skipped
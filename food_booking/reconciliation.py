@@ -0,0 +1,191 @@
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from collections import Counter
+from decimal import Decimal, InvalidOperation
+from itertools import islice
+from .events import order_channel, publish
+from .kitchen import announce_orders
+from .models import Order, PaymentTransaction
+from .stats import refresh_days
+from .streams import payment_status_event
+import csv
+import hashlib
+import hmac
+
+
+# Settlement lines matched and written per transaction
+RECONCILE_BATCH_SIZE = 2000
+
+# Gateway outcomes mapped to order payment statuses
+GATEWAY_STATUSES = {
+    'SUCCESS': 'PAID',
+    'CAPTURED': 'PAID',
+    'PAID': 'PAID',
+    'FAILED': 'FAILED',
+    'DECLINED': 'FAILED',
+    'PENDING': 'PENDING',
+}
+
+SETTLEMENT_FIELDS = ['transaction_id', 'payment_reference', 'amount', 'status', 'settled_at']
+
+SIGNATURE_HEADER = 'X-Gateway-Signature'
+
+
+class SettlementError(ValueError):
+    """Raised for a settlement line that cannot be read"""
+
+    def __init__(self, message, line=None):
+        super().__init__(f'Line {line}: {message}' if line is not None else message)
+        self.line = line
+
+
+def parse_transaction(row, line=None):
+    """Normalise one settlement line from a file or webhook"""
+    if not isinstance(row, dict):
+        raise SettlementError('Not a transaction', line)
+    transaction_id = str(row.get('transaction_id') or '').strip()
+    reference = str(row.get('payment_reference') or '').strip().upper()
+    if not transaction_id or not reference:
+        raise SettlementError('Missing transaction_id or payment_reference', line)
+
+    status = GATEWAY_STATUSES.get(str(row.get('status') or '').strip().upper())
+    if status is None:
+        raise SettlementError(f"Unknown status {row.get('status')!r}", line)
+
+    try:
+        amount = Decimal(str(row.get('amount'))).quantize(Decimal('0.01'))
+    except InvalidOperation:
+        raise SettlementError(f"Invalid amount {row.get('amount')!r}", line)
+
+    settled_at = None
+    if row.get('settled_at'):
+        try:
+            settled_at = parse_datetime(str(row.get('settled_at')).strip())
+        except ValueError:
+            pass
+        if settled_at is None:
+            raise SettlementError(f"Invalid settled_at {row.get('settled_at')!r}", line)
+
+    return {
+        'transaction_id': transaction_id[:64],
+        'payment_reference': reference[:32],
+        'amount': amount,
+        'status': status,
+        'settled_at': settled_at,
+    }
+
+
+def read_settlement_csv(file):
+    """Transactions from a gateway settlement CSV, read lazily"""
+    for line, row in enumerate(csv.DictReader(file), start=2):
+        yield parse_transaction(row, line)
+
+
+def read_webhook_batch(data):
+    """Transactions from a webhook body of the form {"transactions": [...]}"""
+    rows = data.get('transactions') if isinstance(data, dict) else None
+    if not isinstance(rows, list):
+        raise SettlementError('Expected a list of transactions')
+    return [parse_transaction(row, line) for line, row in enumerate(rows, start=1)]
+
+
+def sign(body, secret):
+    """Signature the gateway sends with a webhook body"""
+    return hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+
+
+def verify_signature(body, secret, signature):
+    """Whether a webhook body was signed with secret; never true without one"""
+    return bool(secret) and hmac.compare_digest(sign(body, secret), signature or '')
+
+
+def reconcile(transactions, batch_size=RECONCILE_BATCH_SIZE):
+    """Match settlement lines to orders and apply their payment statuses
+
+    Lines are taken batch_size at a time. Each batch costs one lookup of
+    already-seen transaction ids, one lookup of orders through the indexed
+    payment_reference, one guarded UPDATE per target status and one bulk
+    insert of the lines, all in one transaction, so a re-sent file or
+    webhook is safe to apply again. Returns counts per result plus
+    ``duplicate`` for lines seen before.
+    """
+    totals = Counter()
+    transactions = iter(transactions)
+    while True:
+        batch = list(islice(transactions, batch_size))
+        if not batch:
+            return totals
+        totals.update(_reconcile_batch(batch))
+
+
+def _classify(txn, order, targeted):
+    """Result for one line against the order it names (a values row or None)"""
+    if order is None:
+        return 'UNMATCHED'
+    if txn['amount'] != order['total_amount']:
+        return 'MISMATCH'
+    if txn['status'] == order['payment_status'] or txn['status'] == 'PENDING':
+        return 'UNCHANGED'
+    if order['payment_status'] != 'PENDING' or order['id'] in targeted:
+        # Settled already, by staff or an earlier line; leave it for a person
+        return 'CONFLICT'
+    return 'APPLIED'
+
+
+def _reconcile_batch(batch):
+    lines = {}
+    for txn in batch:
+        lines.setdefault(txn['transaction_id'], txn)
+    counts = Counter(duplicate=len(batch) - len(lines))
+
+    with transaction.atomic():
+        seen = set(PaymentTransaction.objects.filter(transaction_id__in=lines).values_list('transaction_id', flat=True))
+        counts['duplicate'] += len(seen)
+        fresh = [txn for transaction_id, txn in lines.items() if transaction_id not in seen]
+
+        orders = {
+            order['payment_reference']: order
+            for order in Order.objects.order_by().filter(
+                payment_reference__in={txn['payment_reference'] for txn in fresh}
+            ).values('id', 'payment_reference', 'payment_status', 'total_amount', 'fulfilment_status', 'created_at')
+        }
+
+        targets = {'PAID': [], 'FAILED': []}
+        targeted = {}
+        records = []
+        for txn in fresh:
+            order = orders.get(txn['payment_reference'])
+            result = _classify(txn, order, targeted)
+            if result == 'APPLIED':
+                targets[txn['status']].append(order['id'])
+                targeted[order['id']] = order
+            counts[result] += 1
+            records.append(PaymentTransaction(**txn, order_id=order['id'] if order else None, result=result))
+
+        now = timezone.now()
+        for status, order_ids in targets.items():
+            if order_ids:
+                # Guarded, so a status staff set since the lookup is never overwritten
+                Order.objects.filter(id__in=order_ids, payment_status='PENDING').update(
+                    payment_status=status, updated_at=now
+                )
+        PaymentTransaction.objects.bulk_create(records, batch_size=500)
+
+        applied = {order_id: status for status, order_ids in targets.items() for order_id in order_ids}
+        transaction.on_commit(lambda: _after_commit(applied, targeted.values()))
+
+    return counts
+
+
+def _after_commit(applied, orders):
+    """Do what post_save would have done for each order updated in bulk"""
+    for order_id, status in applied.items():
+        publish(order_channel(order_id), payment_status_event(status))
+
+    announce_orders(order['id'] for order in orders if order['fulfilment_status'] in Order.OPEN_FULFILMENT_STATUSES)
+
+    today = timezone.localdate()
+    for date in sorted({timezone.localdate(order['created_at']) for order in orders}):
+        if date < today:
+            refresh_days(date, date)
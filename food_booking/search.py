@@ -0,0 +1,163 @@
+from django.db import transaction
+from django.db.models import Case, Count, IntegerField, Q, Sum, Value, When
+from .models import Order, OrderSearchToken
+import re
+
+
+# Shortest mobile number suffix that is indexed and searchable
+MIN_MOBILE_SUFFIX = 4
+
+# Fields whose changes require an order to be re-indexed
+SEARCH_FIELDS = {'customer_name', 'seat_number', 'mobile_number'}
+
+# Relevance of each kind of match; an order's score is the sum over its matches
+WEIGHTS = {
+    'seat': 30,
+    'mobile': 20,
+    'name': 15,
+    'name_prefix': 10,
+    'seat_prefix': 5,
+}
+
+# Upper bound for prefix ranges, sorts after any character used in tokens
+PREFIX_END = '\uffff'
+
+
+def _words(text):
+    """Lower-case words of a customer name"""
+    return [word for word in re.split(r'[^\w]+', text.lower()) if word]
+
+
+def order_tokens(order):
+    """Return the search tokens for an order
+
+    Customer names are split into lower-case words (``n:``), seats are
+    stored upper-case without spaces (``s:``) and every mobile number
+    suffix of at least MIN_MOBILE_SUFFIX digits gets its own token (``m:``)
+    so a suffix search is a single exact index lookup.
+    """
+    tokens = {f'n:{word}' for word in _words(order.customer_name or '')}
+
+    seat = re.sub(r'\s+', '', order.seat_number or '').upper()
+    if seat:
+        tokens.add(f's:{seat}')
+
+    digits = re.sub(r'\D', '', order.mobile_number or '')
+    for length in range(MIN_MOBILE_SUFFIX, len(digits) + 1):
+        tokens.add(f'm:{digits[-length:]}')
+
+    return tokens
+
+
+def index_order(order, created=False):
+    """Write the search tokens for one order, replacing any old ones"""
+    tokens = [OrderSearchToken(order=order, token=token) for token in order_tokens(order)]
+    if created:
+        # A new order has no tokens yet, so a single insert is enough
+        OrderSearchToken.objects.bulk_create(tokens)
+        return
+    with transaction.atomic():
+        OrderSearchToken.objects.filter(order=order).delete()
+        OrderSearchToken.objects.bulk_create(tokens)
+
+
+def reindex_orders(orders, batch_size=2000):
+    """Rebuild search tokens for a queryset of orders in batches"""
+    indexed = 0
+    batch = []
+    for order in orders.only('id', *SEARCH_FIELDS).order_by('id').iterator(chunk_size=batch_size):
+        batch.append(order)
+        if len(batch) == batch_size:
+            indexed += _reindex_batch(batch)
+            batch = []
+    if batch:
+        indexed += _reindex_batch(batch)
+    return indexed
+
+
+def _reindex_batch(orders):
+    """Replace the tokens for a batch of orders in one transaction"""
+    with transaction.atomic():
+        OrderSearchToken.objects.filter(order__in=orders).delete()
+        OrderSearchToken.objects.bulk_create([
+            OrderSearchToken(order=order, token=token)
+            for order in orders
+            for token in order_tokens(order)
+        ], batch_size=1000)
+    return len(orders)
+
+
+def _prefix(token):
+    """Index range for tokens starting with token"""
+    return Q(token__gte=token, token__lt=token + PREFIX_END)
+
+
+def _term_filter(term):
+    """Token lookups that can satisfy one search term"""
+    term = term.strip()
+    name, seat = term.lower(), term.upper()
+    match = _prefix(f'n:{name}') | _prefix(f's:{seat}')
+    if term.isdigit() and len(term) >= MIN_MOBILE_SUFFIX:
+        match |= Q(token=f'm:{term}')
+    return match
+
+
+def _terms(query):
+    """Split a search box query into terms"""
+    return re.sub(r'[^\w]+', ' ', query).split()
+
+
+def _matches(terms):
+    """Token rows matching the terms, grouped per order, requiring every term
+
+    Each term is counted on its own, as one token can satisfy several terms
+    (``ravi`` and ``ravindran`` both match the token for Ravindran).
+    """
+    term_filters = [_term_filter(term) for term in terms]
+
+    combined = term_filters[0]
+    for term_filter in term_filters[1:]:
+        combined |= term_filter
+
+    counts = {f'term_{i}': Count('id', filter=term_filter) for i, term_filter in enumerate(term_filters)}
+    return OrderSearchToken.objects.filter(combined).values('order').annotate(**counts).filter(
+        **{f'{name}__gt': 0 for name in counts}
+    )
+
+
+def matching_order_ids(query):
+    """Subquery of ids for orders matching every term of the query"""
+    terms = _terms(query)
+    if not terms:
+        return Order.objects.none().values('id')
+    return _matches(terms).values('order')
+
+
+def search_orders(query, limit=20, orders=None):
+    """Orders matching the query, best match first, then newest first
+
+    orders narrows the search to a queryset, such as one with the owner's
+    other filters applied; the matches are loaded through it.
+    """
+    if orders is None:
+        orders = Order.objects.all()
+    terms = _terms(query)
+    if not terms:
+        return []
+
+    weighted_tokens = [
+        ([f's:{term.upper()}' for term in terms], WEIGHTS['seat']),
+        ([f'm:{term}' for term in terms if term.isdigit()], WEIGHTS['mobile']),
+        ([f'n:{term.lower()}' for term in terms], WEIGHTS['name']),
+    ]
+    score = Case(
+        *[When(token__in=tokens, then=Value(weight)) for tokens, weight in weighted_tokens if tokens],
+        When(token__startswith='n:', then=Value(WEIGHTS['name_prefix'])),
+        default=Value(WEIGHTS['seat_prefix']),
+        output_field=IntegerField()
+    )
+
+    matches = _matches(terms).filter(order__in=orders.values('id'))
+    ranked = list(matches.annotate(score=Sum(score)).order_by('-score', '-order')[:limit])
+    found = orders.in_bulk([row['order'] for row in ranked])
+    return [found[row['order']] for row in ranked]
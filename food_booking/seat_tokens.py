@@ -0,0 +1,61 @@
+from django.core import signing
+import re
+
+
+SEAT_TOKEN_SALT = 'food_booking.seat'
+
+# Cookie holding the seat a customer scanned, so later pages can skip seat selection
+SEAT_COOKIE_NAME = 'seat'
+SEAT_COOKIE_MAX_AGE = 60 * 60 * 6
+
+SEAT_VALUE = re.compile(r'^(\d+)-([A-Z])(\d{1,3})$')
+
+
+class SeatToken:
+    """Auditorium and seat read from a signed token, without touching the database"""
+
+    def __init__(self, token, auditorium_id, row, number):
+        self.token = token
+        self.auditorium_id = auditorium_id
+        self.row = row
+        self.number = number
+
+    @property
+    def label(self):
+        return f'{self.row}{self.number}'
+
+
+def make_seat_token(auditorium_id, label):
+    """Compact signed token like "3-F12:<signature>" for a seat's QR code"""
+    return signing.Signer(salt=SEAT_TOKEN_SALT).sign(f'{auditorium_id}-{label}')
+
+
+def read_seat_token(token):
+    """SeatToken for a valid token, or None if it was altered or is malformed"""
+    try:
+        value = signing.Signer(salt=SEAT_TOKEN_SALT).unsign(token or '')
+    except signing.BadSignature:
+        return None
+    match = SEAT_VALUE.match(value)
+    if not match:
+        return None
+    return SeatToken(token, int(match.group(1)), match.group(2), int(match.group(3)))
+
+
+def bound_seat(request):
+    """Seat this customer scanned earlier, from the seat cookie"""
+    if not hasattr(request, '_bound_seat'):
+        request._bound_seat = read_seat_token(request.COOKIES.get(SEAT_COOKIE_NAME))
+    return request._bound_seat
+
+
+def unbind_seat(response):
+    """Forget the scanned seat, so the customer chooses one again"""
+    response.delete_cookie(SEAT_COOKIE_NAME, samesite='Lax')
+
+
+def bind_seat(response, seat):
+    """Remember a scanned seat on the customer's browser"""
+    response.set_cookie(
+        SEAT_COOKIE_NAME, seat.token, max_age=SEAT_COOKIE_MAX_AGE, httponly=True, samesite='Lax'
+    )
@@ -0,0 +1,74 @@
+from decimal import Decimal
+from django.db import IntegrityError, transaction
+from .idempotency import remember, replayed_order
+from .models import FoodItem, Order, OrderItem
+from .theatre import find_seat
+import secrets
+
+
+def new_payment_reference():
+    """Unguessable merchant reference the gateway reports settlements against"""
+    return 'MS' + secrets.token_hex(8).upper()
+
+
+def place_order(quantities, seat_number, customer_name, mobile_number=None, payment_method='UPI', show=None,
+                idempotency_key=None):
+    """Create an order and all of its items in a single transaction
+
+    ``quantities`` maps food item ids to the quantity ordered. Items are
+    fetched with one query, lines are inserted with one bulk insert and the
+    total is computed once, so the cost does not grow with the cart size.
+    Items that no longer exist are skipped, as the old per-line loop did.
+    When the show is known the order is linked to it and to the matching seat.
+
+    With an ``idempotency_key``, a retry of a submission that already went
+    through returns the original order without writing anything. Two
+    concurrent submissions race on the key's unique index; the loser's
+    transaction rolls back and it returns the winner's order.
+    """
+    quantities = {int(item_id): int(quantity) for item_id, quantity in quantities.items()}
+
+    if idempotency_key:
+        order = replayed_order(idempotency_key)
+        if order is not None:
+            return order
+
+    try:
+        order = _create_order(quantities, seat_number, customer_name, mobile_number, payment_method, show,
+                              idempotency_key)
+    except IntegrityError:
+        order = replayed_order(idempotency_key)
+        if order is None:
+            raise
+    return order
+
+
+def _create_order(quantities, seat_number, customer_name, mobile_number, payment_method, show, idempotency_key):
+    with transaction.atomic():
+        food_items = FoodItem.objects.in_bulk(quantities.keys())
+
+        lines = [
+            OrderItem(food_item=food_items[item_id], quantity=quantity, price=food_items[item_id].price)
+            for item_id, quantity in quantities.items()
+            if item_id in food_items
+        ]
+
+        order = Order.objects.create(
+            show=show,
+            seat=find_seat(show, seat_number) if show else None,
+            seat_number=seat_number,
+            customer_name=customer_name,
+            mobile_number=mobile_number,
+            payment_method=payment_method,
+            payment_reference=new_payment_reference() if payment_method in Order.GATEWAY_PAYMENT_METHODS else None,
+            total_amount=sum((line.subtotal for line in lines), Decimal('0.00')),
+        )
+
+        for line in lines:
+            line.order = order
+        OrderItem.objects.bulk_create(lines)
+
+        if idempotency_key:
+            remember(idempotency_key, order)
+
+    return order
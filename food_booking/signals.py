@@ -0,0 +1,87 @@
+from django.db import models, transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+from .events import order_channel, publish
+from .kitchen import announce_order, announce_removed
+from .menu_cache import bump_menu_version
+from .models import Auditorium, FoodItem, Order, OrderItem
+from .search import SEARCH_FIELDS, index_order
+from .stats import refresh_order_day
+from .streams import payment_status_event
+
+
+@receiver(post_save, sender=FoodItem)
+@receiver(post_delete, sender=FoodItem)
+def invalidate_menu(sender, **kwargs):
+    """Bump the menu version once the food item change is committed"""
+    transaction.on_commit(bump_menu_version)
+
+
+@receiver(post_save, sender=Auditorium)
+def create_auditorium_seats(sender, instance, **kwargs):
+    """Keep the Seat rows in step with the auditorium layout"""
+    instance.sync_seats()
+
+
+def _schedule_rollup_refresh(created_at):
+    """Refresh a closed day's rollup after commit; today is always read live"""
+    if created_at is not None and timezone.localdate(created_at) < timezone.localdate():
+        transaction.on_commit(lambda: refresh_order_day(created_at))
+
+
+@receiver(post_save, sender=Order)
+@receiver(post_delete, sender=Order)
+def refresh_rollup_for_order(sender, instance, **kwargs):
+    """Keep the daily rollup in step with changes to older orders"""
+    _schedule_rollup_refresh(instance.created_at)
+
+
+@receiver(post_delete, sender=OrderItem)
+def remove_line_from_total(sender, instance, origin=None, **kwargs):
+    """Keep the order total in step with deleted lines, including queryset and admin deletes"""
+    # Lines deleted along with their order have no total left to adjust
+    origin_model = origin.model if isinstance(origin, models.QuerySet) else type(origin)
+    if origin_model is not Order:
+        instance.remove_from_total()
+
+
+@receiver(post_save, sender=OrderItem)
+@receiver(post_delete, sender=OrderItem)
+def refresh_rollup_for_order_item(sender, instance, **kwargs):
+    """Keep the daily rollup in step with line edits on older orders"""
+    if OrderItem.order.is_cached(instance):
+        created_at = instance.order.created_at
+    else:
+        created_at = Order.objects.filter(pk=instance.order_id).values_list('created_at', flat=True).first()
+    _schedule_rollup_refresh(created_at)
+
+
+@receiver(post_save, sender=Order)
+def index_order_for_search(sender, instance, created, update_fields=None, **kwargs):
+    """Keep the order search tokens in step with the searchable fields"""
+    if created or update_fields is None or SEARCH_FIELDS & set(update_fields):
+        index_order(instance, created=created)
+
+
+@receiver(post_save, sender=Order)
+def publish_payment_status(sender, instance, created, update_fields=None, **kwargs):
+    """Tell customers waiting on the confirmation page about payment updates"""
+    if created or (update_fields is not None and 'payment_status' not in update_fields):
+        return
+    channel, event = order_channel(instance.pk), payment_status_event(instance.payment_status)
+    transaction.on_commit(lambda: publish(channel, event))
+
+
+@receiver(post_save, sender=Order)
+def announce_to_kitchen(sender, instance, **kwargs):
+    """Push new and changed orders to the kitchen screens once committed"""
+    order_id = instance.pk
+    transaction.on_commit(lambda: announce_order(order_id))
+
+
+@receiver(post_delete, sender=Order)
+def remove_from_kitchen(sender, instance, **kwargs):
+    """Drop deleted orders from the kitchen screens once committed"""
+    order_id, seat_number = instance.pk, instance.seat_number
+    transaction.on_commit(lambda: announce_removed(order_id, seat_number))
@@ -0,0 +1,248 @@
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, DecimalField, F, Min, Q, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+from .models import DailyItemRollup, DailySalesRollup, Order, OrderItem, RollupWatermark
+
+
+# Cached copy of RollupWatermark, so reads don't have to look it up every time
+CLOSED_THROUGH_KEY = 'food_booking:rollups_closed_through'
+
+
+def start_of_day(date):
+    """Aware datetime for midnight at the start of date in the current timezone"""
+    return timezone.make_aware(datetime.combine(date, time.min))
+
+
+def line_revenue():
+    """Database expression for the revenue of an order line"""
+    return Sum(F('quantity') * F('price'), output_field=DecimalField(max_digits=12, decimal_places=2))
+
+
+# Rollup maintenance
+
+def refresh_days(start_date, end_date):
+    """Rebuild the sales and item rollups for every day from start_date to end_date
+
+    Each call replaces the rows for the range with two grouped queries over
+    that range only, so it is cheap to repeat for a day whose orders changed.
+    """
+    if start_date > end_date:
+        return
+
+    start, end = start_of_day(start_date), start_of_day(end_date + timedelta(days=1))
+
+    sales = Order.objects.order_by().filter(created_at__gte=start, created_at__lt=end).annotate(
+        date=TruncDate('created_at')
+    ).values('date', 'payment_method', 'payment_status').annotate(
+        order_count=Count('id'),
+        revenue=Sum('total_amount')
+    )
+
+    items = OrderItem.objects.order_by().filter(order__created_at__gte=start, order__created_at__lt=end).annotate(
+        date=TruncDate('order__created_at')
+    ).values('date', 'food_item').annotate(
+        revenue=line_revenue(),
+        total_quantity=Sum('quantity'),
+        order_count=Count('order', distinct=True)
+    )
+
+    with transaction.atomic():
+        DailySalesRollup.objects.filter(date__gte=start_date, date__lte=end_date).delete()
+        DailyItemRollup.objects.filter(date__gte=start_date, date__lte=end_date).delete()
+        DailySalesRollup.objects.bulk_create([DailySalesRollup(**row) for row in sales], batch_size=500)
+        DailyItemRollup.objects.bulk_create([
+            DailyItemRollup(
+                date=row['date'],
+                food_item_id=row['food_item'],
+                quantity=row['total_quantity'],
+                revenue=row['revenue'],
+                order_count=row['order_count'],
+            )
+            for row in items
+        ], batch_size=500)
+
+
+def get_closed_through():
+    """Last day every rollup is complete for, or None before the first backfill
+
+    The watermark lives in the database; the cache only saves the lookup.
+    It is never inferred from the rollup rows, since a refreshed later day
+    says nothing about the days before it.
+    """
+    closed_through = cache.get(CLOSED_THROUGH_KEY)
+    if closed_through is None:
+        closed_through = RollupWatermark.objects.values_list('closed_through', flat=True).first()
+        if closed_through is not None:
+            cache.set(CLOSED_THROUGH_KEY, closed_through, timeout=None)
+    return closed_through
+
+
+def set_closed_through(date):
+    """Record that every day up to date is rolled up"""
+    RollupWatermark.objects.update_or_create(pk=1, defaults={'closed_through': date})
+    cache.set(CLOSED_THROUGH_KEY, date, timeout=None)
+
+
+def close_days(end_date=None):
+    """Make sure every day up to end_date (default yesterday) is rolled up"""
+    if end_date is None:
+        end_date = timezone.localdate() - timedelta(days=1)
+
+    closed_through = get_closed_through()
+    if closed_through is not None and closed_through >= end_date:
+        return
+
+    if closed_through is None:
+        first_order = Order.objects.aggregate(first=Min('created_at'))['first']
+        start_date = timezone.localdate(first_order) if first_order else end_date + timedelta(days=1)
+    else:
+        start_date = closed_through + timedelta(days=1)
+
+    refresh_days(start_date, end_date)
+    set_closed_through(end_date)
+
+
+def refresh_order_day(created_at):
+    """Refresh the rollup for an order's day once that day is closed
+
+    Today is always read from live rows, so orders placed today cost nothing
+    here. Changes to older orders, such as a late payment status update,
+    rebuild just that one day.
+    """
+    date = timezone.localdate(created_at)
+    if date < timezone.localdate():
+        refresh_days(date, date)
+
+
+# Reads: closed days come from the rollups, today from live orders
+
+def live_orders():
+    """Orders placed today, which the rollups never cover"""
+    return Order.objects.order_by().filter(created_at__gte=start_of_day(timezone.localdate()))
+
+
+def _merge(rows, key, fields):
+    """Add up rows that share the same key"""
+    merged = {}
+    for row in rows:
+        total = merged.setdefault(row[key], {key: row[key], **{field: 0 for field in fields}})
+        for field in fields:
+            total[field] += row[field] or 0
+    return list(merged.values())
+
+
+def dashboard_windows(now=None):
+    """First days of the today / week / month dashboard windows"""
+    today = timezone.localdate(now or timezone.now())
+    return {
+        'today': today,
+        'week': today - timedelta(days=7),
+        'month': today - timedelta(days=30),
+    }
+
+
+def dashboard_stats(now=None):
+    """Revenue and order counts for every dashboard window
+
+    Closed days are summed from the daily rollup in one conditional
+    aggregate; only today's orders are read live, over a plain
+    ``created_at >= midnight`` range.
+    """
+    windows = dashboard_windows(now)
+    close_days(windows['today'] - timedelta(days=1))
+
+    week = Q(date__gte=windows['week'])
+    closed = DailySalesRollup.objects.filter(date__gte=windows['month'], date__lt=windows['today']).aggregate(
+        week_revenue=Sum('revenue', filter=week),
+        week_count=Sum('order_count', filter=week),
+        month_revenue=Sum('revenue'),
+        month_count=Sum('order_count'),
+    )
+    live = Order.objects.filter(created_at__gte=start_of_day(windows['today'])).aggregate(
+        today_revenue=Sum('total_amount'),
+        today_count=Count('id'),
+    )
+
+    stats = {key: value or 0 for key, value in {**closed, **live}.items()}
+    for name in ('week', 'month'):
+        stats[f'{name}_revenue'] += stats['today_revenue']
+        stats[f'{name}_count'] += stats['today_count']
+    return stats
+
+
+def payment_breakdown(start_date=None):
+    """Orders and revenue per payment method, with the pending count per method"""
+    close_days()
+
+    closed = DailySalesRollup.objects.order_by()
+    if start_date is not None:
+        closed = closed.filter(date__gte=start_date)
+    closed = closed.values('payment_method').annotate(
+        count=Sum('order_count'),
+        total=Sum('revenue'),
+        pending=Sum('order_count', filter=Q(payment_status='PENDING'))
+    )
+    live = live_orders().values('payment_method').annotate(
+        count=Count('id'),
+        total=Sum('total_amount'),
+        pending=Count('id', filter=Q(payment_status='PENDING'))
+    )
+
+    rows = _merge(list(closed) + list(live), 'payment_method', ['count', 'total', 'pending'])
+    return sorted(rows, key=lambda row: row['total'], reverse=True)
+
+
+def popular_items(limit, start_date=None):
+    """Best selling food items by quantity, with revenue and order counts"""
+    close_days()
+
+    closed = DailyItemRollup.objects.order_by()
+    if start_date is not None:
+        closed = closed.filter(date__gte=start_date)
+    closed = closed.values('food_item__name').annotate(
+        total_quantity=Sum('quantity'),
+        total_revenue=Sum('revenue'),
+        order_count=Sum('order_count')
+    )
+    live = OrderItem.objects.order_by().filter(
+        order__created_at__gte=start_of_day(timezone.localdate())
+    ).values('food_item__name').annotate(
+        total_quantity=Sum('quantity'),
+        total_revenue=line_revenue(),
+        order_count=Count('order', distinct=True)
+    )
+
+    rows = _merge(list(closed) + list(live), 'food_item__name', ['total_quantity', 'total_revenue', 'order_count'])
+    return sorted(rows, key=lambda row: row['total_quantity'], reverse=True)[:limit]
+
+
+def show_summary(show):
+    """Orders, revenue, fulfilment progress and best sellers for one show
+
+    Every aggregate filters on show_id first, so it is answered from the
+    show's own slice of the order indexes however many shows have run.
+    """
+    orders = Order.objects.order_by().filter(show=show)
+    totals = orders.aggregate(
+        order_count=Count('id'),
+        revenue=Sum('total_amount'),
+        open_count=Count('id', filter=Q(fulfilment_status__in=Order.OPEN_FULFILMENT_STATUSES)),
+    )
+    return {
+        'order_count': totals['order_count'],
+        'revenue': totals['revenue'] or Decimal('0'),
+        'open_count': totals['open_count'],
+        'fulfilment': list(orders.values('fulfilment_status').annotate(count=Count('id')).order_by('fulfilment_status')),
+        'seats': list(orders.values('seat_number').annotate(
+            order_count=Count('id'),
+            total_revenue=Sum('total_amount'),
+        ).order_by('-order_count', 'seat_number')[:20]),
+        'top_items': list(OrderItem.objects.order_by().filter(order__show=show).values('food_item__name').annotate(
+            total_quantity=Sum('quantity'),
+            total_revenue=line_revenue(),
+        ).order_by('-total_quantity')[:10]),
+    }
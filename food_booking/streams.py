@@ -0,0 +1,75 @@
+from django.http import Http404, StreamingHttpResponse
+from .events import next_event, order_channel, sse_event, sse_keepalive, subscribe
+from .kitchen import aload_board, board, get_counters, kitchen_channel
+from .models import Order
+from .owner_views import is_owner, owner_access_denied
+
+
+# Payment statuses after which the customer's page stops listening
+FINAL_PAYMENT_STATUSES = {'PAID', 'FAILED'}
+
+
+def payment_status_event(payment_status):
+    """Event published when an order's payment status is saved"""
+    return {
+        'payment_status': payment_status,
+        'label': dict(Order.PAYMENT_STATUS_CHOICES).get(payment_status, payment_status),
+    }
+
+
+def event_stream(events):
+    """Wrap an async generator of SSE chunks in a non-cached streaming response"""
+    response = StreamingHttpResponse(events, content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    # Stop nginx and similar proxies from buffering the stream
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+async def order_status_stream(request, order_id):
+    """Push an order's payment status to the confirmation page as it changes"""
+    if not await Order.objects.filter(pk=order_id).aexists():
+        raise Http404('No Order matches the given query.')
+
+    async def events():
+        async with subscribe(order_channel(order_id)) as queue:
+            # Read the status after subscribing so no change can slip between
+            payment_status = await Order.objects.filter(pk=order_id).values_list('payment_status', flat=True).afirst()
+            sent = None
+            while True:
+                if payment_status != sent:
+                    yield sse_event('payment_status', payment_status_event(payment_status))
+                    sent = payment_status
+                if payment_status in FINAL_PAYMENT_STATUSES:
+                    return
+
+                event = await next_event(queue)
+                if event is None:
+                    yield sse_keepalive()
+                else:
+                    payment_status = event['payment_status']
+
+    return event_stream(events())
+
+
+async def kitchen_stream(request, counter):
+    """Push a counter's open orders, then every new order and change to them"""
+    request.user = await request.auser()
+    if not is_owner(request.user):
+        return owner_access_denied(request)
+    if counter not in get_counters():
+        raise Http404('Unknown counter.')
+
+    async def events():
+        async with subscribe(kitchen_channel(counter)) as queue:
+            # Subscribed first, so changes made while loading are replayed after
+            await aload_board()
+            yield sse_event('snapshot', board.orders_for(counter))
+            while True:
+                event = await next_event(queue)
+                if event is None:
+                    yield sse_keepalive()
+                else:
+                    yield sse_event('order', event)
+
+    return event_stream(events())
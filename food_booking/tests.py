@@ -1,3 +1,1337 @@
-from django.test import TestCase
+from decimal import Decimal
+from io import StringIO
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.management import call_command
+from django.db.models import F, Sum
+from django.test import TestCase, override_settings
+from django.urls import NoReverseMatch, clear_url_caches, resolve, reverse
+from django.utils import timezone
+from datetime import timedelta
+from unittest.mock import patch
+import importlib
+import json
+import os
+import shutil
+import tempfile
+from .models import (
+    Auditorium, DailyItemRollup, DailySalesRollup, FoodItem, IdempotencyKey, Order, OrderItem, OrderSearchToken,
+    PaymentTransaction, RollupWatermark, Seat, Show,
+    deferred_order_totals
+)
+from movie_ticket import urls as project_urls
+from . import async_views, urls as food_booking_urls
+from .catalogue import CatalogueError, import_catalogue, read_catalogue_csv
+from .delivery import parse_seat, plan_trips
+from .events import get_broker, order_channel
+from .gateway import GatewaySimulator
+from .forms import OrderForm
+from .fulfilment import InvalidTransition, advance_order, claim_next_order, claimable_orders, open_order_count
+from .kitchen import board, kitchen_channel, open_orders
+from .loadtest import IntervalReplay, create_owner, regressions, seed_dataset, summarise
+from .menu_cache import get_menu_snapshot
+from .qr import generate, seat_url, show_url
+from .pagination import KeysetPage, decode_cursor
+from .search import matching_order_ids, search_orders
+from .seat_tokens import SEAT_COOKIE_NAME, make_seat_token, read_seat_token
+from .reconciliation import parse_transaction, reconcile, sign
+from .services import place_order
+from .theatre import find_seat, seat_map
+from .stats import close_days, dashboard_stats, show_summary, start_of_day
+from .timeseries import daily_series, hourly_series, show_slot_series
 
-# Create your tests here.
+
+class PlaceOrderTests(TestCase):
+    """Tests for the bulk order placement pipeline"""
+
+    def setUp(self):
+        cache.clear()
+        board.clear()
+        self.food_items = [
+            FoodItem.objects.create(name=f'Item {i}', description='Test item', price=Decimal('10.00') * i)
+            for i in range(1, 7)
+        ]
+
+    def test_query_count_does_not_grow_with_cart_size(self):
+        quantities = {item.id: 2 for item in self.food_items}
+
+        # savepoint, in_bulk, order insert, search tokens, bulk item insert, release;
+        # nothing after commit while no kitchen screen has loaded the board
+        with self.assertNumQueries(6):
+            with self.captureOnCommitCallbacks(execute=True):
+                order = place_order(quantities, seat_number='F12', customer_name='Asha', payment_method='CASH')
+
+        self.assertEqual(order.orderitem_set.count(), 6)
+        self.assertEqual(order.total_amount, Decimal('420.00'))
+
+    def test_missing_items_are_skipped(self):
+        quantities = {self.food_items[0].id: 3, 999999: 1}
+
+        order = place_order(quantities, seat_number='A1', customer_name='Ravi', payment_method='CASH')
+
+        self.assertEqual(list(order.orderitem_set.values_list('food_item_id', 'quantity')), [(self.food_items[0].id, 3)])
+        self.assertEqual(order.total_amount, Decimal('30.00'))
+
+    def test_order_form_places_order(self):
+        item = self.food_items[1]
+        self.client.post(reverse('food_booking:add_to_cart'), {'food_item_id': item.id, 'quantity': 2})
+
+        response = self.client.post(reverse('food_booking:order_form'), {
+            'customer_name': 'Meera',
+            'mobile_number': '9876543210',
+            'payment_method': 'UPI',
+            'row_letter': 'C',
+            'seat_number': '7',
+        })
+
+        order = Order.objects.get()
+        self.assertRedirects(response, reverse('food_booking:order_confirmation', args=[order.id]))
+        self.assertEqual(order.seat_number, 'C7')
+        self.assertEqual(order.total_amount, Decimal('40.00'))
+        self.assertEqual(OrderItem.objects.filter(order=order).count(), 1)
+        self.assertEqual(self.client.cookies['cart'].value, '')
+
+
+class IdempotentOrderTests(TestCase):
+    """Tests for duplicate-suppressing idempotency keys on order submission"""
+
+    def setUp(self):
+        cache.clear()
+        self.item = FoodItem.objects.create(name='Nachos', description='Cheesy', price=Decimal('8.00'))
+
+    def test_replay_returns_original_order_without_writes(self):
+        first = place_order({self.item.id: 1}, 'A1', 'Asha', payment_method='CASH', idempotency_key='tap-0001')
+
+        with self.assertNumQueries(1):
+            again = place_order({self.item.id: 1}, 'A1', 'Asha', payment_method='CASH', idempotency_key='tap-0001')
+
+        self.assertEqual(again, first)
+        self.assertEqual(OrderItem.objects.count(), 1)
+
+    def test_double_submitted_form_creates_one_order(self):
+        self.client.post(reverse('food_booking:add_to_cart'), {'food_item_id': self.item.id, 'quantity': 2})
+        key = self.client.get(reverse('food_booking:order_form')).context['idempotency_key']
+        data = {
+            'customer_name': 'Meera', 'payment_method': 'CASH', 'row_letter': 'C', 'seat_number': '7',
+            'idempotency_key': key,
+        }
+
+        first = self.client.post(reverse('food_booking:order_form'), data)
+        second = self.client.post(reverse('food_booking:order_form'), data)
+
+        order = Order.objects.get()
+        self.assertEqual(first.url, second.url)
+        self.assertEqual(second.url, reverse('food_booking:order_confirmation', args=[order.id]))
+
+    def test_expired_key_places_a_new_order(self):
+        first = place_order({self.item.id: 1}, 'A1', 'Asha', payment_method='CASH', idempotency_key='tap-0002')
+        IdempotencyKey.objects.update(created_at=timezone.now() - timedelta(days=2))
+
+        second = place_order({self.item.id: 1}, 'A1', 'Asha', payment_method='CASH', idempotency_key='tap-0002')
+
+        self.assertNotEqual(second, first)
+        self.assertEqual(IdempotencyKey.objects.get().order, second)
+
+
+class OrderTotalTests(TestCase):
+    """Tests for incremental order total maintenance"""
+
+    def setUp(self):
+        self.popcorn = FoodItem.objects.create(name='Popcorn', description='Salted', price=Decimal('120.00'))
+        self.nachos = FoodItem.objects.create(name='Nachos', description='Cheese', price=Decimal('150.00'))
+        self.order = Order.objects.create(seat_number='B4', customer_name='Kiran')
+
+    def stored_total(self):
+        return Order.objects.values_list('total_amount', flat=True).get(pk=self.order.pk)
+
+    def test_adding_a_line_applies_a_single_update(self):
+        # savepoint, item insert, total update, release
+        with self.assertNumQueries(4):
+            OrderItem.objects.create(order=self.order, food_item=self.popcorn, quantity=2)
+
+        self.assertEqual(self.stored_total(), Decimal('240.00'))
+        self.assertEqual(self.order.total_amount, Decimal('240.00'))
+
+    def test_quantity_edit_and_delete_apply_deltas(self):
+        OrderItem.objects.create(order=self.order, food_item=self.popcorn, quantity=2)
+        OrderItem.objects.create(order=self.order, food_item=self.nachos, quantity=1)
+
+        line = OrderItem.objects.get(order=self.order, food_item=self.popcorn)
+        line.quantity = 3
+        line.save()
+        self.assertEqual(self.stored_total(), Decimal('510.00'))
+
+        OrderItem.objects.get(order=self.order, food_item=self.nachos).delete()
+        self.assertEqual(self.stored_total(), Decimal('360.00'))
+
+    def test_queryset_delete_applies_deltas(self):
+        OrderItem.objects.create(order=self.order, food_item=self.popcorn, quantity=2)
+        OrderItem.objects.create(order=self.order, food_item=self.nachos, quantity=1)
+
+        OrderItem.objects.filter(food_item=self.popcorn).delete()
+        self.assertEqual(self.stored_total(), Decimal('150.00'))
+
+        with deferred_order_totals():
+            OrderItem.objects.filter(order=self.order).delete()
+        self.assertEqual(self.stored_total(), Decimal('0.00'))
+
+    def test_deferred_totals_recalculate_once(self):
+        with deferred_order_totals():
+            OrderItem.objects.create(order=self.order, food_item=self.popcorn, quantity=1)
+            OrderItem.objects.create(order=self.order, food_item=self.nachos, quantity=2)
+            self.assertEqual(self.stored_total(), Decimal('0.00'))
+
+        self.assertEqual(self.stored_total(), Decimal('420.00'))
+
+    def test_calculate_total_covers_bulk_created_lines(self):
+        OrderItem.objects.bulk_create([
+            OrderItem(order=self.order, food_item=self.popcorn, quantity=1, price=self.popcorn.price),
+        ])
+
+        self.assertEqual(self.order.calculate_total(), Decimal('120.00'))
+        self.assertEqual(self.stored_total(), Decimal('120.00'))
+
+
+class MenuSnapshotTests(TestCase):
+    """Tests for the cached, versioned menu snapshot"""
+
+    def setUp(self):
+        cache.clear()
+        self.popcorn = FoodItem.objects.create(name='Popcorn', description='Salted', price=Decimal('120.00'))
+
+    def test_snapshot_is_served_from_cache(self):
+        get_menu_snapshot()
+
+        with self.assertNumQueries(0):
+            snapshot = get_menu_snapshot()
+
+        self.assertEqual(snapshot['food_items'], [self.popcorn])
+        self.assertIn('Popcorn', snapshot['html'])
+
+    def test_food_item_changes_bump_the_version(self):
+        version = get_menu_snapshot()['version']
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.popcorn.available = False
+            self.popcorn.save()
+
+        snapshot = get_menu_snapshot()
+        self.assertNotEqual(snapshot['version'], version)
+        self.assertEqual(snapshot['food_items'], [])
+
+    def test_menu_view_fills_in_csrf_token(self):
+        response = self.client.get(reverse('food_booking:menu'))
+
+        self.assertContains(response, 'Popcorn')
+        self.assertNotContains(response, '__menu_csrf_token__')
+        self.assertContains(response, 'name="csrfmiddlewaretoken"')
+
+
+class CatalogueImportTests(TestCase):
+    """Tests for bulk catalogue import and export"""
+
+    CSV = (
+        'name,description,price,available\n'
+        'Popcorn,Salted,130,yes\n'
+        'Nachos,Cheesy,150.00,no\n'
+        'Water,Still,40,\n'
+    )
+
+    def setUp(self):
+        cache.clear()
+        self.popcorn = FoodItem.objects.create(name='Popcorn', description='Salted', price=Decimal('120.00'))
+        self.water = FoodItem.objects.create(name='Water', description='Still', price=Decimal('40.00'))
+
+    def test_upserts_by_name_and_reports_changes(self):
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            with self.assertNumQueries(4):
+                counts, changes = import_catalogue(read_catalogue_csv(StringIO(self.CSV)))
+
+        self.assertEqual(counts, {'created': 1, 'updated': 1, 'unchanged': 1})
+        self.assertEqual(changes, [
+            ('Popcorn', 'updated', {'price': (Decimal('120.00'), Decimal('130.00'))}),
+            ('Nachos', 'created', {'description': (None, 'Cheesy'), 'price': (None, Decimal('150.00')), 'available': (None, False)}),
+        ])
+        self.assertEqual(len(callbacks), 1)
+        self.popcorn.refresh_from_db()
+        self.assertEqual(self.popcorn.price, Decimal('130.00'))
+        self.assertFalse(FoodItem.objects.get(name='Nachos').available)
+        self.assertEqual(import_catalogue(read_catalogue_csv(StringIO(self.CSV)))[0]['unchanged'], 3)
+
+    def test_bad_row_saves_nothing(self):
+        with self.assertRaisesMessage(CatalogueError, 'Line 3'):
+            import_catalogue(read_catalogue_csv(StringIO(self.CSV.replace('150.00', 'free'))))
+        with self.assertRaisesMessage(CatalogueError, 'appears more than once'):
+            import_catalogue(read_catalogue_csv(StringIO(self.CSV + 'Nachos,Cheesy,150,yes\n')))
+
+        self.assertEqual(FoodItem.objects.count(), 2)
+        self.assertEqual(FoodItem.objects.get(name='Popcorn').price, Decimal('120.00'))
+
+    def test_export_round_trips(self):
+        output = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, output)
+        for fmt in ['csv', 'json', 'jsonl']:
+            path = os.path.join(output, f'catalogue.{fmt}')
+            call_command('export_catalogue', path, stdout=StringIO())
+            stdout = StringIO()
+            call_command('import_catalogue', path, stdout=stdout)
+            self.assertIn('Unchanged           2', stdout.getvalue())
+
+
+class CartTests(TestCase):
+    """Tests for the compact cart and its storage backends"""
+
+    def setUp(self):
+        cache.clear()
+        self.popcorn = FoodItem.objects.create(name='Popcorn', description='Salted', price=Decimal('120.00'))
+        self.nachos = FoodItem.objects.create(name='Nachos', description='Cheesy', price=Decimal('150.00'))
+
+    def add(self, item, quantity=1):
+        return self.client.post(reverse('food_booking:add_to_cart'), {'food_item_id': item.id, 'quantity': quantity})
+
+    def test_cart_clicks_do_not_touch_the_database(self):
+        get_menu_snapshot()
+
+        with self.assertNumQueries(0):
+            self.add(self.popcorn, 2)
+            self.add(self.nachos)
+            self.client.post(reverse('food_booking:update_cart'), {'item_id': self.popcorn.id, 'quantity': 3})
+
+        # The signed cookie carries only ids and quantities
+        self.assertTrue(self.client.cookies['cart'].value.startswith(f'{self.popcorn.id}:3,{self.nachos.id}:1:'))
+        response = self.client.get(reverse('food_booking:menu'))
+        self.assertEqual(response.context['cart_count'], 4)
+        self.assertEqual(response.context['cart_total'], Decimal('510.00'))
+
+    def test_prices_and_availability_come_from_the_menu(self):
+        self.add(self.popcorn, 2)
+        self.add(self.nachos)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.popcorn.price = Decimal('100.00')
+            self.popcorn.save()
+            self.nachos.available = False
+            self.nachos.save()
+
+        response = self.client.get(reverse('food_booking:menu'))
+        self.assertEqual(response.context['cart'], [
+            {'id': self.popcorn.id, 'name': 'Popcorn', 'price': Decimal('100.00'), 'quantity': 2, 'subtotal': Decimal('200.00')}
+        ])
+
+    def test_tampered_cookie_is_ignored(self):
+        self.add(self.popcorn)
+        self.client.cookies['cart'] = f'{self.popcorn.id}:50'
+
+        response = self.client.get(reverse('food_booking:menu'))
+        self.assertEqual(response.context['cart'], [])
+
+    def batch(self, *operations):
+        return self.client.post(
+            reverse('food_booking:api_cart_batch'), {'operations': list(operations)}, content_type='application/json'
+        ).json()
+
+    def test_batch_api_applies_all_operations(self):
+        self.add(self.popcorn)
+        get_menu_snapshot()
+
+        with self.assertNumQueries(0):
+            data = self.batch(
+                {'op': 'add', 'food_item_id': self.nachos.id, 'quantity': 2},
+                {'op': 'set', 'food_item_id': self.popcorn.id, 'quantity': 4},
+                {'op': 'add', 'food_item_id': self.nachos.id},
+            )
+
+        self.assertEqual(data, {
+            'success': True,
+            'items': {str(self.popcorn.id): 4, str(self.nachos.id): 3},
+            'cart_total': 930.0,
+            'cart_count': 7,
+        })
+        self.assertEqual(self.batch({'op': 'remove', 'food_item_id': self.popcorn.id})['items'], {str(self.nachos.id): 3})
+
+    def test_batch_api_is_all_or_nothing(self):
+        self.add(self.popcorn)
+
+        data = self.batch(
+            {'op': 'set', 'food_item_id': self.popcorn.id, 'quantity': 5},
+            {'op': 'add', 'food_item_id': 999999, 'quantity': 1},
+        )
+        self.assertEqual(data, {'success': False, 'message': 'Item not found or not available.', 'operation': 1})
+        self.assertFalse(self.batch({'op': 'set', 'food_item_id': self.popcorn.id, 'quantity': 11})['success'])
+        self.assertFalse(self.batch({'op': 'eat', 'food_item_id': self.popcorn.id})['success'])
+
+        response = self.client.get(reverse('food_booking:menu'))
+        self.assertEqual([(line['name'], line['quantity']) for line in response.context['cart']], [('Popcorn', 1)])
+
+    @override_settings(FOOD_BOOKING_CART_BACKEND='food_booking.cart.CacheCartBackend')
+    def test_cache_backend(self):
+        self.add(self.popcorn, 2)
+        self.assertNotIn('cart', self.client.cookies)
+
+        self.client.post(reverse('food_booking:clear_cart'))
+        self.add(self.nachos)
+        response = self.client.get(reverse('food_booking:menu'))
+        self.assertEqual([(line['name'], line['quantity']) for line in response.context['cart']], [('Nachos', 1)])
+
+    @override_settings(FOOD_BOOKING_CART_BACKEND='food_booking.cart.SessionCartBackend')
+    def test_session_backend_reads_old_carts(self):
+        session = self.client.session
+        session['cart'] = {str(self.popcorn.id): {'id': self.popcorn.id, 'name': 'Popcorn', 'price': 120.0, 'quantity': 2}}
+        session.save()
+
+        self.add(self.nachos)
+        self.assertEqual(self.client.session['cart'], {str(self.popcorn.id): 2, str(self.nachos.id): 1})
+
+
+class ConditionalResponseTests(TestCase):
+    """Tests for ETag / Last-Modified handling on public pages"""
+
+    def setUp(self):
+        cache.clear()
+        self.popcorn = FoodItem.objects.create(name='Popcorn', description='Salted', price=Decimal('120.00'))
+
+    def test_menu_answers_304_until_cart_changes(self):
+        etag = self.client.get(reverse('food_booking:menu'))['ETag']
+
+        response = self.client.get(reverse('food_booking:menu'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        self.client.post(reverse('food_booking:add_to_cart'), {'food_item_id': self.popcorn.id, 'quantity': 1})
+        response = self.client.get(reverse('food_booking:menu'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Popcorn added to cart!')
+
+        response = self.client.get(reverse('food_booking:menu'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_order_confirmation_answers_304_until_order_changes(self):
+        order = Order.objects.create(seat_number='D9', customer_name='Nila')
+        url = reverse('food_booking:order_confirmation', args=[order.id])
+        etag = self.client.get(url)['ETag']
+
+        # Only the validator query runs, no template rendering
+        with self.assertNumQueries(1):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        order.payment_status = 'PAID'
+        order.save()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+
+class AsyncViewTests(TestCase):
+    """Tests for the async customer views selected by FOOD_BOOKING_ASYNC_VIEWS"""
+
+    def setUp(self):
+        cache.clear()
+        self.popcorn = FoodItem.objects.create(name='Popcorn', description='Salted', price=Decimal('120.00'))
+        self.order = place_order({self.popcorn.id: 2}, seat_number='B4', customer_name='Kiran', payment_method='CASH')
+
+        with self.settings(FOOD_BOOKING_ASYNC_VIEWS=True):
+            self.reload_urls()
+        self.addCleanup(self.reload_urls)
+
+    def reload_urls(self):
+        # The project urlconf holds resolvers built from the app's patterns
+        importlib.reload(food_booking_urls)
+        importlib.reload(project_urls)
+        clear_url_caches()
+
+    def test_async_views_are_routed(self):
+        match = resolve(reverse('food_booking:menu'))
+        self.assertIs(match.func, async_views.menu_view)
+
+    async def test_menu_and_cart_api(self):
+        response = await self.async_client.post(
+            reverse('food_booking:api_add_to_cart'), {'food_item_id': self.popcorn.id, 'quantity': 3},
+            content_type='application/json'
+        )
+        self.assertEqual(response.json()['cart_total'], 360.0)
+
+        response = await self.async_client.post(
+            reverse('food_booking:api_cart_batch'), {'operations': [{'op': 'set', 'food_item_id': self.popcorn.id, 'quantity': 1}]},
+            content_type='application/json'
+        )
+        self.assertEqual(response.json()['cart_count'], 1)
+
+        response = await self.async_client.get(reverse('food_booking:menu'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['cart_count'], 1)
+        self.assertContains(response, 'name="csrfmiddlewaretoken"')
+
+        response = await self.async_client.get(reverse('food_booking:menu'), headers={'if-none-match': response['ETag']})
+        self.assertEqual(response.status_code, 304)
+
+    async def test_order_confirmation(self):
+        url = reverse('food_booking:order_confirmation', args=[self.order.id])
+        response = await self.async_client.get(url)
+        self.assertContains(response, 'Popcorn')
+
+        response = await self.async_client.get(url, headers={'if-none-match': response['ETag']})
+        self.assertEqual(response.status_code, 304)
+
+        response = await self.async_client.get(reverse('food_booking:order_confirmation', args=[999999]))
+        self.assertEqual(response.status_code, 404)
+
+
+class PaymentStatusStreamTests(TestCase):
+    """Tests for the Server-Sent Events payment status stream and its polled fallback"""
+
+    def setUp(self):
+        self.order = Order.objects.create(seat_number='E3', customer_name='Dev', payment_method='UPI')
+
+        with self.settings(FOOD_BOOKING_LIVE_STREAMS=True):
+            self.reload_urls()
+        self.addCleanup(self.reload_urls)
+        self.url = reverse('food_booking:order_status_stream', args=[self.order.id])
+
+    def reload_urls(self):
+        importlib.reload(food_booking_urls)
+        importlib.reload(project_urls)
+        clear_url_caches()
+
+    def test_without_streams_the_page_polls_a_conditional_status(self):
+        self.reload_urls()
+        with self.assertRaises(NoReverseMatch):
+            reverse('food_booking:order_status_stream', args=[self.order.id])
+        response = self.client.get(reverse('food_booking:order_confirmation', args=[self.order.id]))
+        self.assertNotContains(response, 'EventSource')
+        self.assertContains(response, reverse('food_booking:order_status', args=[self.order.id]))
+
+        url = reverse('food_booking:order_status', args=[self.order.id])
+        response = self.client.get(url)
+        self.assertEqual(response.json(), {'payment_status': 'PENDING', 'label': 'Pending'})
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+        self.assertEqual(self.client.get(reverse('food_booking:order_status', args=[999999])).status_code, 404)
+
+    def test_saving_payment_status_publishes_after_commit(self):
+        with patch('food_booking.signals.publish') as publish:
+            with self.captureOnCommitCallbacks(execute=True):
+                self.order.payment_status = 'PAID'
+                self.order.save(update_fields=['payment_status', 'updated_at'])
+            with self.captureOnCommitCallbacks(execute=True):
+                self.order.save(update_fields=['customer_name'])
+
+        publish.assert_called_once_with(f'order:{self.order.id}', {'payment_status': 'PAID', 'label': 'Paid'})
+
+    async def test_stream_pushes_changes_until_final_status(self):
+        response = await self.async_client.get(self.url)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        events = aiter(response.streaming_content)
+        self.assertIn(b'"payment_status": "PENDING"', await anext(events))
+
+        get_broker().publish(order_channel(self.order.id), {'payment_status': 'PAID', 'label': 'Paid'})
+        self.assertEqual(await anext(events), b'event: payment_status\ndata: {"payment_status": "PAID", "label": "Paid"}\n\n')
+
+        with self.assertRaises(StopAsyncIteration):
+            await anext(events)
+
+    async def test_unknown_order_is_404(self):
+        response = await self.async_client.get(reverse('food_booking:order_status_stream', args=[999999]))
+        self.assertEqual(response.status_code, 404)
+
+
+@override_settings(FOOD_BOOKING_COUNTERS={'left': 'ABCDE', 'right': 'FGHIJ'})
+class KitchenQueueTests(TestCase):
+    """Tests for the in-memory kitchen board and its push stream"""
+
+    def setUp(self):
+        self.owner = User.objects.create_superuser('owner', 'owner@example.com', 'pass')
+        self.popcorn = FoodItem.objects.create(name='Popcorn', description='Salted', price=Decimal('120.00'))
+        self.order = place_order({self.popcorn.id: 2}, seat_number='B4', customer_name='Kiran', payment_method='CASH')
+        Order.objects.create(seat_number='C1', customer_name='Old', payment_status='FAILED')
+        board.load(open_orders())
+        self.addCleanup(board.clear)
+
+    def reload_urls(self):
+        importlib.reload(food_booking_urls)
+        importlib.reload(project_urls)
+        clear_url_caches()
+
+    def test_board_tracks_committed_changes(self):
+        self.assertEqual([order['id'] for order in board.orders_for('left')], [self.order.id])
+
+        with patch('food_booking.kitchen.publish') as publish:
+            with self.captureOnCommitCallbacks(execute=True):
+                new_order = place_order({self.popcorn.id: 1}, seat_number='G7', customer_name='Lata', payment_method='UPI')
+            with self.captureOnCommitCallbacks(execute=True):
+                self.order.seat_number = 'H2'
+                self.order.save()
+
+        self.assertEqual(board.orders_for('left'), [])
+        self.assertEqual([order['id'] for order in board.orders_for('right')], [self.order.id, new_order.id])
+        self.assertEqual(board.orders_for('right')[1]['items'], [{'name': 'Popcorn', 'quantity': 1}])
+        self.assertEqual([call.args[0] for call in publish.call_args_list], ['kitchen:right', 'kitchen:left', 'kitchen:right'])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            new_order.payment_status = 'FAILED'
+            new_order.save()
+        self.assertEqual([order['id'] for order in board.orders_for('right')], [self.order.id])
+
+    def test_kitchen_page_needs_an_owner(self):
+        self.assertEqual(self.client.get(reverse('food_booking:owner_kitchen')).status_code, 302)
+
+        self.client.force_login(self.owner)
+        self.assertRedirects(self.client.get(reverse('food_booking:owner_kitchen')), reverse('food_booking:owner_kitchen_counter', args=['left']))
+        self.assertEqual(self.client.get(reverse('food_booking:owner_kitchen_counter', args=['nowhere'])).status_code, 404)
+
+    def test_without_streams_the_page_carries_its_orders(self):
+        self.client.force_login(self.owner)
+        response = self.client.get(reverse('food_booking:owner_kitchen_counter', args=['left']))
+
+        self.assertEqual([order['id'] for order in response.context['orders']], [self.order.id])
+        self.assertNotContains(response, 'EventSource')
+        with self.assertRaises(NoReverseMatch):
+            reverse('food_booking:owner_kitchen_stream', args=['left'])
+
+    async def test_stream_sends_snapshot_then_events(self):
+        with self.settings(FOOD_BOOKING_LIVE_STREAMS=True):
+            self.reload_urls()
+        self.addCleanup(self.reload_urls)
+        url = reverse('food_booking:owner_kitchen_stream', args=['left'])
+        self.assertEqual((await self.async_client.get(url)).status_code, 403)
+
+        await self.async_client.aforce_login(self.owner)
+        response = await self.async_client.get(url)
+        events = aiter(response.streaming_content)
+        snapshot = await anext(events)
+        self.assertTrue(snapshot.startswith(b'event: snapshot\n'))
+        self.assertIn(b'"seat_number": "B4"', snapshot)
+
+        get_broker().publish(kitchen_channel('left'), {'id': self.order.id, 'counter': 'left', 'open': False})
+        self.assertEqual(await anext(events), f'event: order\ndata: {{"id": {self.order.id}, "counter": "left", "open": false}}\n\n'.encode())
+
+
+class FulfilmentTests(TestCase):
+    """Tests for the fulfilment state machine and claim queue"""
+
+    def setUp(self):
+        self.staff = User.objects.create_superuser('staff', 'staff@example.com', 'pass')
+        self.orders = [
+            Order.objects.create(seat_number=seat, customer_name='Guest')
+            for seat in ['A1', 'G2', 'B3']
+        ]
+
+    def test_transitions_are_enforced_and_stamped(self):
+        order = self.orders[0]
+
+        with self.assertRaises(InvalidTransition):
+            advance_order(order, 'READY')
+
+        advance_order(order, 'PREPARING', self.staff)
+        advance_order(order, 'READY')
+        order.refresh_from_db()
+        self.assertEqual(order.fulfilment_status, 'READY')
+        self.assertEqual(order.claimed_by, self.staff)
+        self.assertIsNotNone(order.preparing_at)
+        self.assertIsNotNone(order.ready_at)
+        self.assertIsNone(order.delivered_at)
+
+        # A stale copy cannot repeat a move someone else already made
+        stale = Order.objects.get(pk=self.orders[1].pk)
+        advance_order(self.orders[1], 'CANCELLED')
+        with self.assertRaises(InvalidTransition):
+            advance_order(stale, 'PREPARING')
+
+    def test_claims_never_hand_out_the_same_order(self):
+        claimed = [claim_next_order(self.staff) for _ in range(4)]
+
+        self.assertEqual([order.id if order else None for order in claimed], [order.id for order in self.orders] + [None])
+        self.assertEqual(open_order_count(), 3)
+        self.assertFalse(Order.objects.filter(fulfilment_status='PLACED').exists())
+
+    @override_settings(FOOD_BOOKING_COUNTERS={'left': 'ABCDE', 'right': 'FGHIJ'})
+    def test_claims_respect_the_counter(self):
+        self.assertEqual(claim_next_order(self.staff, 'right'), self.orders[1])
+        self.assertIsNone(claim_next_order(self.staff, 'right'))
+        self.assertEqual(claim_next_order(self.staff, 'left'), self.orders[0])
+
+    def test_claim_query_uses_fulfilment_index(self):
+        plan = claimable_orders().explain()
+        self.assertIn('order_fulfil_created_idx', plan)
+
+    def test_owner_can_advance_from_the_kitchen(self):
+        self.client.force_login(self.staff)
+        kitchen = reverse('food_booking:owner_kitchen_counter', args=['main'])
+
+        response = self.client.post(reverse('food_booking:owner_claim_order', args=['main']))
+        self.assertRedirects(response, kitchen)
+        response = self.client.post(
+            reverse('food_booking:owner_advance_order', args=[self.orders[0].id]),
+            {'fulfilment_status': 'READY', 'next': kitchen}
+        )
+        self.assertRedirects(response, kitchen)
+        self.assertEqual(Order.objects.get(pk=self.orders[0].id).fulfilment_status, 'READY')
+
+
+class DeliveryBatchingTests(TestCase):
+    """Tests for seat parsing and runner trip planning"""
+
+    def ready(self, order_id, seat, minutes_ago):
+        now = timezone.now()
+        return Order(id=order_id, seat_number=seat, created_at=now, ready_at=now - timedelta(minutes=minutes_ago))
+
+    def test_parse_seat(self):
+        self.assertEqual(parse_seat('F12'), (6, 12))
+        self.assertEqual(parse_seat(' b 3 '), (2, 3))
+        self.assertIsNone(parse_seat('Balcony'))
+
+    def test_trips_group_nearby_seats_and_route_them(self):
+        orders = [
+            self.ready(1, 'J20', 10),
+            self.ready(2, 'A2', 1),
+            self.ready(3, 'J18', 1),
+            self.ready(4, 'A1', 1),
+            self.ready(5, 'K19', 1),
+        ]
+
+        trips = plan_trips(orders, capacity=3)
+
+        self.assertEqual([trip.seats for trip in trips], [['J18', 'J20', 'K19'], ['A1', 'A2']])
+        # The oldest order has waited past MAX_WAIT; the front-row trip can still fill up
+        self.assertEqual([trip.due for trip in trips], [True, False])
+        self.assertEqual(trips[1].distance, 6)
+
+    def test_unparsable_seats_travel_alone(self):
+        trips = plan_trips([self.ready(1, 'Balcony', 0), self.ready(2, 'C4', 0), self.ready(3, 'C5', 0)], capacity=2)
+        self.assertEqual([(trip.seats, trip.due) for trip in trips], [(['Balcony'], True), (['C4', 'C5'], True)])
+
+    def test_delivering_a_trip(self):
+        owner = User.objects.create_superuser('owner', 'owner@example.com', 'pass')
+        orders = [Order.objects.create(seat_number=seat, customer_name='Guest') for seat in ['D4', 'D5']]
+        for order in orders:
+            advance_order(order, 'PREPARING', owner)
+            advance_order(order, 'READY')
+
+        self.client.force_login(owner)
+        response = self.client.get(reverse('food_booking:owner_delivery'))
+        self.assertEqual([trip.seats for trip in response.context['waiting_trips']], [['D4', 'D5']])
+
+        response = self.client.post(reverse('food_booking:owner_deliver_trip'), {'order_ids': [order.id for order in orders] + ['x']})
+        self.assertRedirects(response, reverse('food_booking:owner_delivery'))
+        self.assertEqual(set(Order.objects.values_list('fulfilment_status', flat=True)), {'DELIVERED'})
+
+
+class OrderApiTests(TestCase):
+    """Tests for the JSON order placement API"""
+
+    def setUp(self):
+        cache.clear()
+        self.item = FoodItem.objects.create(name='Samosa', description='Spicy', price=Decimal('3.50'))
+        self.order = {
+            'items': [{'food_item_id': self.item.id, 'quantity': 4}],
+            'customer_name': 'Kiosk Guest',
+            'mobile_number': '9876543210',
+            'payment_method': 'UPI',
+            'row_letter': 'F',
+            'seat_number': 12,
+        }
+
+    def post(self, data, **headers):
+        return self.client.post(reverse('food_booking:api_place_order'), data, content_type='application/json', **headers)
+
+    def test_places_order(self):
+        response = self.post(self.order)
+
+        self.assertEqual(response.status_code, 201)
+        order = Order.objects.get()
+        self.assertEqual(response.json()['order_id'], order.id)
+        self.assertEqual(response.json()['total_amount'], '14.00')
+        self.assertEqual((order.seat_number, order.orderitem_set.get().quantity), ('F12', 4))
+
+    def test_rejects_what_the_form_and_cart_reject(self):
+        response = self.post({**self.order, 'mobile_number': ''})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('__all__', response.json()['errors'])
+
+        response = self.post({**self.order, 'items': [{'food_item_id': self.item.id, 'quantity': 11}]})
+        self.assertEqual((response.status_code, response.json()['item']), (400, 0))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.item.available = False
+            self.item.save()
+        self.assertEqual(self.post(self.order).status_code, 400)
+        self.assertFalse(Order.objects.exists())
+
+    def test_retry_with_key_returns_the_same_order(self):
+        first = self.post(self.order, HTTP_IDEMPOTENCY_KEY='kiosk-7-0001')
+        second = self.post(self.order, HTTP_IDEMPOTENCY_KEY='kiosk-7-0001')
+
+        self.assertEqual((first.status_code, second.status_code), (201, 200))
+        self.assertEqual(first.json(), second.json())
+        self.assertEqual(Order.objects.count(), 1)
+
+
+class ReconciliationTests(TestCase):
+    """Tests for matching gateway settlements to orders"""
+
+    def setUp(self):
+        self.orders = [
+            Order.objects.create(
+                seat_number=f'A{i}', customer_name='Guest', payment_method='UPI',
+                payment_reference=f'MSTEST{i:04d}', total_amount=Decimal('100.00')
+            )
+            for i in range(1, 5)
+        ]
+
+    def line(self, order, status='SUCCESS', amount='100.00', transaction_id=None):
+        return {
+            'transaction_id': transaction_id or f'TXN-{order.payment_reference}-{status}',
+            'payment_reference': order.payment_reference,
+            'amount': amount,
+            'status': status,
+        }
+
+    def test_batches_apply_statuses_and_skip_repeats(self):
+        self.orders[2].payment_status = 'PAID'
+        self.orders[2].save()
+        lines = [
+            self.line(self.orders[0]),
+            self.line(self.orders[1], status='FAILED'),
+            self.line(self.orders[2], status='FAILED'),
+            self.line(self.orders[3], amount='99.00'),
+            {'transaction_id': 'TXN-X', 'payment_reference': 'MSNOBODY', 'amount': '5.00', 'status': 'SUCCESS'},
+        ]
+        parsed = [parse_transaction(line) for line in lines]
+
+        counts = reconcile(parsed, batch_size=2)
+
+        self.assertEqual(
+            {result: counts[result] for result in counts if counts[result]},
+            {'APPLIED': 2, 'CONFLICT': 1, 'MISMATCH': 1, 'UNMATCHED': 1}
+        )
+        self.assertEqual(
+            list(Order.objects.order_by('id').values_list('payment_status', flat=True)),
+            ['PAID', 'FAILED', 'PAID', 'PENDING']
+        )
+        self.assertEqual(reconcile(parsed)['duplicate'], 5)
+        self.assertEqual(PaymentTransaction.objects.count(), 5)
+
+    @override_settings(FOOD_BOOKING_PAYMENT_WEBHOOK_SECRET='s3cret')
+    def test_webhook_requires_signature(self):
+        simulator = GatewaySimulator(failure_rate=0, mismatch_rate=0, unknown_rate=0, duplicate_rate=0, seed=3)
+        body, signature = simulator.webhook(simulator.settle([(self.orders[0].payment_reference, '100.00')]), 's3cret')
+        url = reverse('food_booking:payment_webhook')
+
+        response = self.client.post(url, body, content_type='application/json', HTTP_X_GATEWAY_SIGNATURE=sign(body, 'wrong'))
+        self.assertEqual(response.status_code, 403)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(url, body, content_type='application/json', HTTP_X_GATEWAY_SIGNATURE=signature)
+        self.assertEqual(response.json()['results'], {'duplicate': 0, 'APPLIED': 1})
+        self.orders[0].refresh_from_db()
+        self.assertEqual(self.orders[0].payment_status, 'PAID')
+
+    @override_settings(FOOD_BOOKING_PAYMENT_WEBHOOK_SECRET='s3cret')
+    def test_webhook_rejects_invalid_settlement_dates(self):
+        for settled_at in ['2026-13-01T10:00:00+05:30', 'yesterday']:
+            body = json.dumps({'transactions': [{**self.line(self.orders[0]), 'settled_at': settled_at}]}).encode()
+            response = self.client.post(
+                reverse('food_booking:payment_webhook'), body, content_type='application/json',
+                HTTP_X_GATEWAY_SIGNATURE=sign(body, 's3cret')
+            )
+            self.assertEqual(response.status_code, 400)
+            self.assertEqual(response.json()['line'], 1)
+
+    def test_gateway_orders_get_a_reference(self):
+        item = FoodItem.objects.create(name='Tea', description='Hot', price=Decimal('2.00'))
+        upi = place_order({item.id: 1}, 'B1', 'Asha', payment_method='UPI')
+        cash = place_order({item.id: 1}, 'B2', 'Ravi', payment_method='CASH')
+
+        self.assertRegex(upi.payment_reference, r'^MS[0-9A-F]{16}$')
+        self.assertIsNone(cash.payment_reference)
+
+
+class LoadTestTests(TestCase):
+    """Tests for the seeded ordering flow replay behind benchmark_ordering_flow"""
+
+    def setUp(self):
+        cache.clear()
+
+    def test_seeding_is_reproducible(self):
+        seed_dataset(50, items=5, seed=7)
+        totals = list(Order.objects.order_by('id').values_list('total_amount', flat=True))
+        self.assertEqual(len(totals), 50)
+        self.assertEqual(
+            sum(totals), OrderItem.objects.aggregate(total=Sum(F('price') * F('quantity')))['total']
+        )
+
+        Order.objects.all().delete()
+        FoodItem.objects.all().delete()
+        seed_dataset(50, items=5, seed=7)
+        self.assertEqual(list(Order.objects.order_by('id').values_list('total_amount', flat=True)), totals)
+
+    def test_replay_places_orders_and_reports_each_step(self):
+        item_ids = seed_dataset(20, items=5)
+        replay = IntervalReplay(item_ids, create_owner(), lines=2, dashboard_every=2)
+        seconds, samples = replay.run(4)
+
+        summary = summarise(seconds, samples, Order.objects.count() - 20)
+        self.assertEqual(summary['orders'], 4)
+        self.assertEqual(summary['steps']['add_to_cart']['requests'], 8)
+        self.assertEqual(summary['steps']['owner_dashboard']['requests'], 2)
+        self.assertEqual(summary['steps']['add_to_cart']['queries_per_request'], 0)
+
+    def test_regressions_compare_against_baseline(self):
+        baseline = {'orders_per_second': 100, 'steps': {'menu': {'p95_ms': 10, 'queries_per_request': 1}}}
+        steady = {'orders_per_second': 90, 'steps': {'menu': {'p95_ms': 12, 'queries_per_request': 1.2}}}
+        worse = {'orders_per_second': 50, 'steps': {'menu': {'p95_ms': 20, 'queries_per_request': 3}}}
+
+        self.assertEqual(regressions(steady, baseline), [])
+        self.assertEqual(len(regressions(worse, baseline)), 3)
+
+
+class QrGenerationTests(TestCase):
+    """Tests for batch per-seat QR sheet generation"""
+
+    def setUp(self):
+        self.screen = Auditorium.objects.create(name='Screen 3', rows='AB', seats_per_row=3)
+        self.output = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.output)
+
+    def test_seat_links_carry_a_signed_seat_token(self):
+        self.assertEqual(
+            seat_url('https://snacks.example/', self.screen, 'B2'),
+            f'https://snacks.example/s/{make_seat_token(self.screen.id, "B2")}/'
+        )
+
+    def test_unchanged_sheets_are_skipped(self):
+        call_command('generate_qr_codes', output=self.output, format='svg', workers=1, stdout=StringIO())
+        with open(os.path.join(self.output, 'manifest.json')) as file:
+            self.assertEqual(list(json.load(file)), [f'seats-{self.screen.id}-001.svg'])
+        with open(os.path.join(self.output, f'seats-{self.screen.id}-001.svg')) as file:
+            self.assertEqual(file.read().count('<symbol'), 6)
+
+        codes = {'seats': [('A1', 'https://snacks.example/?seat=A1')]}
+        self.assertEqual(generate(codes, self.output, 'png', workers=1), (1, 0))
+        self.assertEqual(generate(codes, self.output, 'png', workers=1), (0, 1))
+        codes['seats'].append(('A2', 'https://snacks.example/?seat=A2'))
+        self.assertEqual(generate(codes, self.output, 'png', workers=1), (1, 0))
+
+
+class SeatTokenTests(TestCase):
+    """Tests for seat deep links opened from QR codes"""
+
+    def setUp(self):
+        cache.clear()
+        self.screen = Auditorium.objects.create(name='Screen 2', rows='ABCDEF', seats_per_row=12)
+        self.item = FoodItem.objects.create(name='Nachos', description='Cheesy', price=Decimal('5.00'))
+        self.token = make_seat_token(self.screen.id, 'F12')
+
+    def test_token_round_trip_and_tampering(self):
+        seat = read_seat_token(self.token)
+        self.assertEqual((seat.auditorium_id, seat.row, seat.number, seat.label), (self.screen.id, 'F', 12, 'F12'))
+        self.assertIsNone(read_seat_token(self.token.replace('F12', 'A1')))
+        self.assertIsNone(read_seat_token('garbage'))
+
+    def test_seat_page_binds_the_seat_and_revalidates(self):
+        url = reverse('food_booking:seat_menu', args=[self.token])
+        response = self.client.get(url)
+        self.assertContains(response, 'Seat F12')
+        self.assertContains(response, 'data-express-item')
+        self.assertEqual(response.cookies[SEAT_COOKIE_NAME].value, self.token)
+
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+        self.assertRedirects(
+            self.client.get(reverse('food_booking:seat_menu', args=['3-F12:forged'])), reverse('food_booking:menu')
+        )
+
+    def test_order_form_skips_seat_selection_for_a_scanned_seat(self):
+        self.client.get(reverse('food_booking:seat_menu', args=[self.token]))
+        self.client.post(reverse('food_booking:add_to_cart'), {'food_item_id': self.item.id, 'quantity': 1})
+
+        response = self.client.get(reverse('food_booking:order_form'))
+        self.assertContains(response, '(from your QR code)')
+        self.assertNotContains(response, 'id="row-select"')
+        self.assertEqual(self.client.get(reverse('food_booking:order_form'), {'show': 'abc'}).status_code, 200)
+
+        response = self.client.get(reverse('food_booking:forget_seat'), {'next': reverse('food_booking:order_form')})
+        self.assertRedirects(response, reverse('food_booking:order_form'))
+        self.assertEqual(response.cookies[SEAT_COOKIE_NAME].value, '')
+        self.assertContains(self.client.get(reverse('food_booking:order_form')), 'id="row-select"')
+
+    def test_api_takes_the_seat_from_the_token(self):
+        response = self.client.post(reverse('food_booking:api_place_order'), {
+            'items': [{'food_item_id': self.item.id, 'quantity': 2}],
+            'customer_name': 'Seat Guest',
+            'payment_method': 'CASH',
+            'seat_token': self.token,
+            'show': 'abc',
+        }, content_type='application/json')
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(Order.objects.get().seat_number, 'F12')
+        response = self.client.post(reverse('food_booking:api_place_order'), {
+            'items': [{'food_item_id': self.item.id, 'quantity': 2}],
+            'customer_name': 'Seat Guest',
+            'payment_method': 'CASH',
+            'seat_token': 'forged',
+        }, content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+
+
+class ShowPartitionTests(TestCase):
+    """Tests for auditorium seat layouts and per-show order partitioning"""
+
+    def setUp(self):
+        cache.clear()
+        self.screen = Auditorium.objects.create(name='Screen 2', rows='ABC', seats_per_row=4)
+        now = timezone.now()
+        self.show = Show.objects.create(
+            auditorium=self.screen, title='Matinee', starts_at=now - timedelta(minutes=10), ends_at=now + timedelta(hours=2)
+        )
+        self.item = FoodItem.objects.create(name='Popcorn', description='Salted', price=Decimal('5.00'))
+
+    def test_seats_follow_the_layout(self):
+        self.assertEqual(self.screen.seats.count(), 12)
+        self.assertEqual(seat_map(self.screen), {'A': [1, 2, 3, 4], 'B': [1, 2, 3, 4], 'C': [1, 2, 3, 4]})
+
+        self.screen.seats_per_row = 5
+        self.screen.save()
+        self.assertEqual(self.screen.seats.count(), 15)
+
+        self.screen.seats_per_row = 2
+        self.screen.save()
+        self.assertEqual(seat_map(self.screen), {'A': [1, 2], 'B': [1, 2], 'C': [1, 2]})
+        self.assertFalse(OrderForm({
+            'customer_name': 'Asha', 'payment_method': 'CASH', 'row_letter': 'A', 'seat_number': '4'
+        }, seat_map=seat_map(self.screen)).is_valid())
+
+    def test_rows_are_single_letters(self):
+        for rows in ['AB2', 'AAB', 'ab']:
+            with self.assertRaises(ValidationError):
+                Auditorium(name='Screen 9', rows=rows).full_clean()
+        with self.assertRaises(ValidationError):
+            Auditorium(name='Screen 9', rows='A' * 27).full_clean()
+
+        self.assertEqual(find_seat(self.show, 'c4'), Seat.objects.get(auditorium=self.screen, row='C', number=4))
+        self.assertIsNone(find_seat(self.show, 'AA1'))
+        self.assertIsNone(read_seat_token(make_seat_token(self.screen.id, 'AA1')))
+
+    def test_order_form_uses_the_running_show(self):
+        self.client.post(reverse('food_booking:add_to_cart'), {'food_item_id': self.item.id, 'quantity': 1})
+        response = self.client.get(reverse('food_booking:order_form'))
+        self.assertEqual(response.context['show'], self.show)
+
+    def test_show_qr_code_selects_its_show_among_several(self):
+        now = timezone.now()
+        late = Show.objects.create(
+            auditorium=self.screen, title='Late', starts_at=now, ends_at=now + timedelta(hours=3)
+        )
+        self.client.get(show_url('', late))
+        self.client.post(reverse('food_booking:add_to_cart'), {'food_item_id': self.item.id, 'quantity': 1})
+
+        response = self.client.get(reverse('food_booking:order_form'))
+        self.assertEqual(response.context['show'], late)
+
+        late.ends_at = now - timedelta(minutes=1)
+        late.save()
+        response = self.client.get(reverse('food_booking:order_form'))
+        self.assertEqual(response.context['show'], self.show)
+        self.assertEqual([value for value, _ in response.context['form'].fields['row_letter'].choices], ['', 'A', 'B', 'C'])
+
+        details = {'customer_name': 'Meera', 'payment_method': 'CASH', 'show': self.show.id}
+        response = self.client.post(reverse('food_booking:order_form'), {**details, 'row_letter': 'D', 'seat_number': '2'})
+        self.assertFalse(Order.objects.exists())
+
+        self.client.post(reverse('food_booking:order_form'), {**details, 'row_letter': 'B', 'seat_number': '3'})
+        order = Order.objects.get()
+        self.assertEqual(order.show, self.show)
+        self.assertEqual(order.seat, Seat.objects.get(auditorium=self.screen, row='B', number=3))
+        self.assertEqual(order.seat_number, 'B3')
+
+    def test_owner_queries_partition_by_show(self):
+        later = Show.objects.create(
+            auditorium=self.screen, title='Late', starts_at=timezone.now() + timedelta(hours=3),
+            ends_at=timezone.now() + timedelta(hours=5)
+        )
+        place_order({self.item.id: 2}, seat_number='A1', customer_name='Asha', payment_method='CASH', show=self.show)
+        place_order({self.item.id: 1}, seat_number='A2', customer_name='Ravi', payment_method='CASH', show=later)
+
+        summary = show_summary(self.show)
+        self.assertEqual((summary['order_count'], summary['revenue']), (1, Decimal('10.00')))
+        self.assertEqual(summary['top_items'][0]['total_quantity'], 2)
+
+        User.objects.create_superuser('owner', 'owner@example.com', 'secret')
+        self.client.login(username='owner', password='secret')
+        response = self.client.get(reverse('food_booking:owner_orders'), {'show': later.id})
+        self.assertEqual([order.customer_name for order in response.context['orders']], ['Ravi'])
+        response = self.client.get(reverse('food_booking:owner_show', args=[self.show.id]))
+        self.assertContains(response, 'Matinee')
+
+
+class DashboardStatsTests(TestCase):
+    """Tests for the rollup-backed dashboard statistics"""
+
+    def setUp(self):
+        cache.clear()
+
+    def make_order(self, days_ago, amount, status='PAID'):
+        order = Order.objects.create(seat_number='A1', customer_name='Test', payment_status=status, total_amount=amount)
+        Order.objects.filter(pk=order.pk).update(created_at=timezone.now() - timedelta(days=days_ago))
+
+    def test_closed_days_come_from_the_rollup(self):
+        self.make_order(0, Decimal('100.00'))
+        self.make_order(3, Decimal('50.00'), status='PENDING')
+        self.make_order(20, Decimal('25.00'))
+        self.make_order(60, Decimal('10.00'))
+        close_days()
+
+        # One aggregate over the rollup, one over today's live orders
+        with self.assertNumQueries(2):
+            stats = dashboard_stats()
+
+        self.assertEqual(stats['today_count'], 1)
+        self.assertEqual(stats['today_revenue'], Decimal('100.00'))
+        self.assertEqual(stats['week_count'], 2)
+        self.assertEqual(stats['week_revenue'], Decimal('150.00'))
+        self.assertEqual(stats['month_count'], 3)
+        self.assertEqual(stats['month_revenue'], Decimal('175.00'))
+
+    def test_later_day_refresh_does_not_close_the_days_before_it(self):
+        for days_ago in (6, 4, 3, 2):
+            self.make_order(days_ago, Decimal('10.00'))
+        close_days(timezone.localdate() - timedelta(days=6))
+        cache.clear()
+
+        order = Order.objects.filter(created_at__date__lte=timezone.localdate() - timedelta(days=2)).first()
+        with self.captureOnCommitCallbacks(execute=True):
+            order.payment_status = 'PENDING'
+            order.save()
+
+        self.assertEqual(dashboard_stats()['week_count'], 4)
+
+    def test_owner_dashboard_renders(self):
+        self.make_order(0, Decimal('100.00'), status='PENDING')
+        self.make_order(0, Decimal('40.00'))
+        User.objects.create_superuser('owner', 'owner@example.com', 'secret')
+        self.client.login(username='owner', password='secret')
+
+        response = self.client.get(reverse('food_booking:owner_dashboard'))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['pending_orders'], 1)
+        self.assertEqual(response.context['open_orders'], 2)
+        self.assertEqual(response.context['today_count'], 2)
+        self.assertEqual(sum(point['count'] for point in response.context['hourly_orders']), 2)
+        self.assertEqual(max(point['height'] for point in response.context['hourly_orders']), 100)
+
+
+class TimeSeriesTests(TestCase):
+    """Tests for the grouped, zero-filled time series"""
+
+    def setUp(self):
+        cache.clear()
+        self.today = timezone.localdate()
+        for days_ago, hour, amount in [(0, 13, '100.00'), (0, 21, '40.00'), (2, 13, '60.00')]:
+            order = Order.objects.create(seat_number='A1', customer_name='Test', total_amount=Decimal(amount))
+            created_at = start_of_day(self.today - timedelta(days=days_ago)) + timedelta(hours=hour)
+            Order.objects.filter(pk=order.pk).update(created_at=created_at)
+
+    def test_daily_series_reads_rollup_and_is_zero_filled(self):
+        close_days()
+
+        with self.assertNumQueries(2):
+            series = daily_series(self.today - timedelta(days=89), self.today)
+
+        self.assertEqual(len(series), 90)
+        self.assertEqual(series[-1], {'period': self.today, 'revenue': Decimal('140.00'), 'count': 2})
+        self.assertEqual(series[-2]['count'], 0)
+        self.assertEqual(series[-3]['revenue'], Decimal('60.00'))
+
+    def test_hourly_series(self):
+        series = hourly_series(self.today, self.today)
+
+        self.assertEqual(len(series), 24)
+        self.assertEqual(series[13]['revenue'], Decimal('100.00'))
+        self.assertEqual(sum(point['count'] for point in series), 2)
+
+    def test_show_slot_series(self):
+        series = {point['period']: point for point in show_slot_series(self.today - timedelta(days=7), self.today)}
+
+        self.assertEqual(series['Matinee']['count'], 2)
+        self.assertEqual(series['Night']['revenue'], Decimal('40.00'))
+        self.assertEqual(series['Morning']['count'], 0)
+
+
+class DailyRollupTests(TestCase):
+    """Tests for the incrementally refreshed daily rollups"""
+
+    def setUp(self):
+        cache.clear()
+        self.popcorn = FoodItem.objects.create(name='Popcorn', description='Salted', price=Decimal('120.00'))
+        self.order = place_order({self.popcorn.id: 2}, seat_number='E5', customer_name='Devi', payment_method='UPI')
+        self.yesterday = timezone.localdate() - timedelta(days=1)
+        Order.objects.filter(pk=self.order.pk).update(created_at=start_of_day(self.yesterday) + timedelta(hours=19))
+        self.order.refresh_from_db()
+
+    def test_backfill_command_builds_rollups(self):
+        call_command('rollup_sales', stdout=StringIO())
+
+        sales = DailySalesRollup.objects.get()
+        self.assertEqual((sales.date, sales.payment_status, sales.order_count), (self.yesterday, 'PENDING', 1))
+        self.assertEqual(sales.revenue, Decimal('240.00'))
+        items = DailyItemRollup.objects.get()
+        self.assertEqual((items.food_item, items.quantity, items.revenue), (self.popcorn, 2, Decimal('240.00')))
+        self.assertEqual(RollupWatermark.objects.get().closed_through, self.yesterday)
+
+    def test_status_change_on_closed_day_refreshes_rollup(self):
+        close_days()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.order.payment_status = 'PAID'
+            self.order.save()
+
+        self.assertEqual(list(DailySalesRollup.objects.values_list('payment_status', 'order_count')), [('PAID', 1)])
+
+    def test_orders_placed_today_do_not_touch_rollups(self):
+        close_days()
+
+        with patch('food_booking.signals.refresh_order_day') as refresh_order_day:
+            with self.captureOnCommitCallbacks(execute=True):
+                place_order({self.popcorn.id: 1}, seat_number='E6', customer_name='Arun', payment_method='CASH')
+
+        refresh_order_day.assert_not_called()
+        self.assertEqual(DailySalesRollup.objects.count(), 1)
+        self.assertEqual(dashboard_stats()['today_count'], 1)
+
+
+class OrderIndexTests(TestCase):
+    """EXPLAIN checks that the main owner queries use the Order indexes"""
+
+    def assertIndexSearch(self, queryset):
+        plan = queryset.explain()
+        self.assertIn('SEARCH food_booking_order USING INDEX', plan)
+        self.assertNotIn('TEMP B-TREE FOR ORDER BY', plan)
+
+    def test_owner_order_filters_use_indexes(self):
+        week_start = start_of_day(timezone.localdate() - timedelta(days=7))
+        orders = Order.objects.order_by('-created_at')
+
+        self.assertIndexSearch(orders.filter(created_at__gte=week_start))
+        self.assertIndexSearch(orders.filter(payment_status='PENDING', created_at__gte=week_start))
+        self.assertIndexSearch(orders.filter(payment_method='UPI', created_at__gte=week_start))
+        self.assertIndexSearch(orders.filter(payment_status='PAID', payment_method='CASH'))
+        self.assertIndexSearch(orders.filter(seat_number='F12'))
+
+    def test_latest_orders_walk_the_date_index(self):
+        plan = Order.objects.order_by('-created_at')[:20].explain()
+        self.assertIn('USING INDEX order_created_idx', plan)
+        self.assertNotIn('TEMP B-TREE FOR ORDER BY', plan)
+
+
+class KeysetPaginationTests(TestCase):
+    """Tests for cursor pagination of owner orders"""
+
+    def setUp(self):
+        cache.clear()
+        # Several orders share a timestamp so the id tie-breaker is exercised
+        now = timezone.now()
+        for i in range(45):
+            order = Order.objects.create(seat_number=f'A{i}', customer_name='Test')
+            Order.objects.filter(pk=order.pk).update(created_at=now - timedelta(minutes=i // 3))
+
+    def test_pages_cover_every_order_once(self):
+        seen = []
+        page = KeysetPage(Order.objects.all(), page_size=20)
+        seen += page.orders
+        while page.next_cursor:
+            page = KeysetPage(Order.objects.all(), after=page.next_cursor, page_size=20)
+            seen += page.orders
+
+        self.assertEqual(len(seen), 45)
+        self.assertEqual({order.id for order in seen}, set(Order.objects.values_list('id', flat=True)))
+
+    def test_pages_are_stable_while_orders_arrive(self):
+        first = KeysetPage(Order.objects.all(), page_size=20)
+        second = KeysetPage(Order.objects.all(), after=first.next_cursor, page_size=20)
+
+        Order.objects.create(seat_number='Z1', customer_name='Late arrival')
+
+        again = KeysetPage(Order.objects.all(), after=first.next_cursor, page_size=20)
+        self.assertEqual([o.id for o in again.orders], [o.id for o in second.orders])
+
+        back = KeysetPage(Order.objects.all(), before=second.previous_cursor, page_size=20)
+        self.assertEqual([o.id for o in back.orders], [o.id for o in first.orders])
+        self.assertTrue(back.has_previous)
+
+    def test_malformed_cursor_starts_from_the_top(self):
+        self.assertIsNone(decode_cursor('not a cursor'))
+        page = KeysetPage(Order.objects.all(), after='not a cursor', page_size=20)
+        self.assertEqual(page.orders[0], Order.objects.order_by('-created_at', '-id').first())
+
+    def test_owner_orders_keeps_filters_in_cursor_links(self):
+        User.objects.create_superuser('owner', 'owner@example.com', 'secret')
+        self.client.login(username='owner', password='secret')
+
+        response = self.client.get(reverse('food_booking:owner_orders'), {'status': 'PENDING'})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context['orders']), 20)
+        self.assertEqual(response.context['total_orders'], 45)
+        self.assertContains(response, f"?after={response.context['next_cursor']}&status=PENDING")
+
+
+class OrderSearchTests(TestCase):
+    """Tests for the token-based owner order search"""
+
+    def setUp(self):
+        self.asha = Order.objects.create(seat_number='F12', customer_name='Asha Rao', mobile_number='9876543210')
+        self.ravi = Order.objects.create(seat_number='F1', customer_name='Ravi Kumar', mobile_number='9123456789')
+        self.fatima = Order.objects.create(seat_number='B3', customer_name='Fatima', mobile_number=None)
+
+    def test_exact_seat_ranks_first(self):
+        self.assertEqual(search_orders('f12'), [self.asha])
+        self.assertEqual(search_orders('F1')[0], self.ravi)
+
+    def test_mobile_suffix_lookup(self):
+        self.assertEqual(search_orders('3210'), [self.asha])
+        self.assertEqual(search_orders('321'), [])
+
+    def test_name_prefixes_must_all_match(self):
+        self.assertEqual(search_orders('ravi ku'), [self.ravi])
+        self.assertEqual(search_orders('ravi rao'), [])
+        self.assertEqual(set(search_orders('fa')), {self.fatima})
+
+    def test_full_name_with_overlapping_prefixes(self):
+        ravindran = Order.objects.create(seat_number='G4', customer_name='Ravi Ravindran')
+
+        self.assertEqual(search_orders('ravi ravindran'), [ravindran])
+        self.assertEqual(search_orders('Ravindran Ravi'), [ravindran])
+        self.assertEqual(list(Order.objects.filter(id__in=matching_order_ids('Ravi Ravindran'))), [ravindran])
+        self.assertEqual(set(search_orders('ravi')), {self.ravi, ravindran})
+
+    def test_reindexed_on_searchable_field_change(self):
+        self.fatima.customer_name = 'Zoya'
+        self.fatima.save()
+
+        self.assertEqual(search_orders('fatima'), [])
+        self.assertEqual(search_orders('zoya'), [self.fatima])
+
+    def test_owner_search_lists_best_matches_first(self):
+        cache.clear()
+        ravindra = Order.objects.create(seat_number='C1', customer_name='Ravindra', payment_status='PAID')
+        User.objects.create_superuser('owner', 'owner@example.com', 'secret')
+        self.client.login(username='owner', password='secret')
+
+        response = self.client.get(reverse('food_booking:owner_orders'), {'search': 'ravi'})
+        self.assertEqual(list(response.context['orders']), [self.ravi, ravindra])
+        self.assertEqual(response.context['total_orders'], 2)
+        self.assertIsNone(response.context['next_cursor'])
+
+        response = self.client.get(reverse('food_booking:owner_orders'), {'search': 'ravi', 'status': 'PAID'})
+        self.assertEqual(list(response.context['orders']), [ravindra])
+
+    def test_matching_ids_filter_querysets(self):
+        orders = Order.objects.filter(id__in=matching_order_ids('asha'))
+
+        self.assertEqual(list(orders), [self.asha])
+
+    def test_rebuild_command(self):
+        OrderSearchToken.objects.all().delete()
+
+        call_command('rebuild_search_index', stdout=StringIO())
+
+        self.assertEqual(search_orders('kumar'), [self.ravi])
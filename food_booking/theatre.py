@@ -0,0 +1,87 @@
+from django.utils import timezone
+from datetime import timedelta
+from .models import Auditorium, Seat, Show
+import re
+
+
+# Customers start ordering this long before a show begins
+ARRIVAL_WINDOW = timedelta(minutes=30)
+
+SEAT_LABEL = re.compile(r'^([A-Z])(\d{1,3})$')
+
+# Cookie holding the show a per-show QR code named, so the order form still
+# knows it after the menu and cart pages in between
+SHOW_COOKIE_NAME = 'show'
+SHOW_COOKIE_MAX_AGE = 60 * 60 * 6
+
+
+def current_shows(now=None):
+    """Shows that customers can be ordering for right now"""
+    now = now or timezone.now()
+    return Show.objects.filter(
+        starts_at__lte=now + ARRIVAL_WINDOW, ends_at__gte=now
+    ).select_related('auditorium').order_by('starts_at')
+
+
+def selected_show(request, show_id=None):
+    """The show given (or named by ?show=, a posted show or the show cookie), else the only one running"""
+    show_id = str(show_id or request.POST.get('show') or request.GET.get('show') or '')
+    if show_id.isdigit():
+        return Show.objects.select_related('auditorium').filter(pk=show_id).first()
+
+    # A remembered show only counts while it is still running
+    remembered = request.COOKIES.get(SHOW_COOKIE_NAME, '')
+    if remembered.isdigit():
+        show = current_shows().filter(pk=remembered).first()
+        if show is not None:
+            return show
+
+    running = list(current_shows()[:2])
+    return running[0] if len(running) == 1 else None
+
+
+def remember_show(request, response):
+    """Keep the show named by ?show= on the customer's browser for the order form"""
+    show_id = request.GET.get('show', '')
+    if show_id.isdigit():
+        response.set_cookie(
+            SHOW_COOKIE_NAME, show_id, max_age=SHOW_COOKIE_MAX_AGE, httponly=True, samesite='Lax'
+        )
+
+
+def show_for_seat(seat, show_id=None):
+    """Show a scanned seat is ordering for: the one given, else the one running in its auditorium"""
+    show_id = str(show_id or '')
+    shows = Show.objects.select_related('auditorium').filter(pk=show_id) if show_id.isdigit() else current_shows()
+    return shows.filter(auditorium_id=seat.auditorium_id).first()
+
+
+def scanned_seat_map(seat, show=None):
+    """Seat map of the auditorium a scanned seat belongs to, even with no show running"""
+    auditorium = show.auditorium if show else Auditorium.objects.filter(pk=seat.auditorium_id).first()
+    return seat_map(auditorium) if auditorium else None
+
+
+def seat_map(auditorium):
+    """Seat numbers per row, front row first, from the auditorium's Seat rows
+
+    Seat rows are kept when a layout shrinks, as orders may point at them,
+    so seats beyond seats_per_row are left out here.
+    """
+    seats = {row: [] for row in auditorium.rows}
+    in_layout = auditorium.seats.filter(number__lte=auditorium.seats_per_row)
+    for row, number in in_layout.order_by('number').values_list('row', 'number'):
+        if row in seats:
+            seats[row].append(number)
+    return {row: numbers for row, numbers in seats.items() if numbers}
+
+
+def find_seat(show, seat_label):
+    """Seat in the show's auditorium matching a label like "F12", or None"""
+    match = SEAT_LABEL.match((seat_label or '').strip().upper())
+    if show is None or not match:
+        return None
+    number = int(match.group(2))
+    if number > show.auditorium.seats_per_row:
+        return None
+    return Seat.objects.filter(auditorium_id=show.auditorium_id, row=match.group(1), number=number).first()
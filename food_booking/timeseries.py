@@ -0,0 +1,92 @@
+from django.db.models import Count, Sum
+from django.db.models.functions import ExtractHour, TruncHour
+from django.utils import timezone
+from datetime import timedelta
+from decimal import Decimal
+from .models import DailySalesRollup, Order
+from .stats import close_days, live_orders, start_of_day
+
+
+# Show slots as (name, first hour) pairs; each slot runs until the next one starts
+SHOW_SLOTS = [
+    ('Morning', 0),
+    ('Matinee', 12),
+    ('Evening', 16),
+    ('Night', 20),
+]
+
+
+def _orders_between(start_date, end_date):
+    """Orders created from the start of start_date up to the end of end_date"""
+    return Order.objects.order_by().filter(
+        created_at__gte=start_of_day(start_date),
+        created_at__lt=start_of_day(end_date + timedelta(days=1)),
+    )
+
+
+def _grouped(queryset, period):
+    """Revenue and order count per value of the period expression"""
+    rows = queryset.annotate(period=period).values('period').annotate(
+        revenue=Sum('total_amount'),
+        count=Count('id')
+    )
+    return {row['period']: row for row in rows}
+
+
+def _point(period, row):
+    """One series entry, zero-filled when the period had no orders"""
+    return {
+        'period': period,
+        'revenue': row['revenue'] if row else Decimal('0.00'),
+        'count': row['count'] if row else 0,
+    }
+
+
+def daily_series(start_date, end_date):
+    """Revenue and order count for every day from start_date to end_date, zero-filled
+
+    Closed days are read from the daily rollup and today from live orders,
+    so the cost stays flat however long the range is.
+    """
+    close_days()
+    rows = {
+        row['date']: row
+        for row in DailySalesRollup.objects.order_by().filter(date__gte=start_date, date__lte=end_date)
+        .values('date').annotate(revenue=Sum('revenue'), count=Sum('order_count'))
+    }
+
+    today = timezone.localdate()
+    if start_date <= today <= end_date:
+        live = live_orders().aggregate(revenue=Sum('total_amount'), count=Count('id'))
+        rows[today] = live if live['count'] else None
+
+    days = (end_date - start_date).days + 1
+    return [
+        _point(day, rows.get(day))
+        for day in (start_date + timedelta(days=i) for i in range(days))
+    ]
+
+
+def hourly_series(start_date, end_date):
+    """Revenue and order count for every hour from start_date to end_date, zero-filled"""
+    rows = _grouped(_orders_between(start_date, end_date), TruncHour('created_at'))
+    rows = {timezone.localtime(period): row for period, row in rows.items()}
+    first = start_of_day(start_date)
+    hours = ((end_date - start_date).days + 1) * 24
+    return [
+        _point(hour, rows.get(hour))
+        for hour in (timezone.localtime(first + timedelta(hours=i)) for i in range(hours))
+    ]
+
+
+def show_slot_series(start_date, end_date, slots=SHOW_SLOTS):
+    """Revenue and order count per show slot from start_date to end_date"""
+    rows = _grouped(_orders_between(start_date, end_date), ExtractHour('created_at'))
+
+    totals = {name: {'revenue': Decimal('0.00'), 'count': 0} for name, _ in slots}
+    for hour, row in rows.items():
+        name = [name for name, first_hour in slots if first_hour <= hour][-1]
+        totals[name]['revenue'] += row['revenue']
+        totals[name]['count'] += row['count']
+
+    return [_point(name, totals[name]) for name, _ in slots]
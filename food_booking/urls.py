@@ -1,25 +1,51 @@
+from django.conf import settings
 from django.urls import path
-from . import views, owner_views
+from . import async_views, streams, views, owner_views
+from .events import live_streams_enabled
 
 app_name = 'food_booking'
 
+# Views with an async implementation for deployments served over ASGI
+customer_views = async_views if getattr(settings, 'FOOD_BOOKING_ASYNC_VIEWS', False) else views
+
 urlpatterns = [
-    path('', views.menu_view, name='menu'),
+    path('', customer_views.menu_view, name='menu'),
     path('add-to-cart/', views.add_to_cart, name='add_to_cart'),
     path('update-cart/', views.update_cart, name='update_cart'),
     path('remove-from-cart/<int:item_id>/', views.remove_from_cart, name='remove_from_cart'),
     path('clear-cart/', views.clear_cart, name='clear_cart'),
     path('order/', views.order_form, name='order_form'),
-    path('order/confirmation/<int:order_id>/', views.order_confirmation, name='order_confirmation'),
-    path('api/add-to-cart/', views.api_add_to_cart, name='api_add_to_cart'),
+    path('s/<str:token>/', views.seat_menu, name='seat_menu'),
+    path('seat/forget/', views.forget_seat, name='forget_seat'),
+    path('order/confirmation/<int:order_id>/', customer_views.order_confirmation, name='order_confirmation'),
+    path('order/<int:order_id>/status/', views.order_status, name='order_status'),
+    path('api/add-to-cart/', customer_views.api_add_to_cart, name='api_add_to_cart'),
+    path('api/cart/', customer_views.api_cart_batch, name='api_cart_batch'),
+    path('api/orders/', views.api_place_order, name='api_place_order'),
+    path('api/payments/webhook/', views.payment_webhook, name='payment_webhook'),
     
     # Owner/Admin URLs
     path('owner/', owner_views.owner_dashboard, name='owner_dashboard'),
     path('owner/orders/', owner_views.owner_orders, name='owner_orders'),
     path('owner/orders/<int:order_id>/', owner_views.owner_order_detail, name='owner_order_detail'),
+    path('owner/orders/<int:order_id>/fulfilment/', owner_views.owner_advance_order, name='owner_advance_order'),
     path('owner/food-items/', owner_views.owner_food_items, name='owner_food_items'),
     path('owner/food-items/add/', owner_views.owner_add_food_item, name='owner_add_food_item'),
     path('owner/food-items/<int:item_id>/edit/', owner_views.owner_edit_food_item, name='owner_edit_food_item'),
     path('owner/analytics/', owner_views.owner_analytics, name='owner_analytics'),
+    path('owner/shows/<int:show_id>/', owner_views.owner_show, name='owner_show'),
+    path('owner/kitchen/', owner_views.owner_kitchen, name='owner_kitchen'),
+    path('owner/kitchen/<slug:counter>/', owner_views.owner_kitchen, name='owner_kitchen_counter'),
+    path('owner/kitchen/<slug:counter>/claim/', owner_views.owner_claim_order, name='owner_claim_order'),
+    path('owner/delivery/', owner_views.owner_delivery, name='owner_delivery'),
+    path('owner/delivery/deliver/', owner_views.owner_deliver_trip, name='owner_deliver_trip'),
     path('owner/settings/', owner_views.owner_settings, name='owner_settings'),
 ]
+
+# Streams hold a connection open for as long as the page is, which only an
+# ASGI server can afford; under WSGI they would pin a worker each
+if live_streams_enabled():
+    urlpatterns += [
+        path('order/<int:order_id>/status/stream/', streams.order_status_stream, name='order_status_stream'),
+        path('owner/kitchen/<slug:counter>/stream/', streams.kitchen_stream, name='owner_kitchen_stream'),
+    ]
@@ -1,31 +1,71 @@
+from django.conf import settings
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib import messages
-from django.http import JsonResponse
+from django.http import Http404, JsonResponse
 from django.views.decorators.csrf import csrf_exempt
-from django.views.decorators.http import require_POST
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import condition, require_POST
+from django.urls import reverse
 from django.utils import timezone
-from .models import FoodItem, Order, OrderItem
+from django.utils.http import url_has_allowed_host_and_scheme
+from .models import Order
 from .forms import OrderForm, CartItemForm, UpdateCartForm
+from .cart import Cart, CartOperationError, apply_operations, get_cart
+from .conditional import (
+    menu_etag, menu_last_modified, order_etag, order_last_modified, seat_menu_etag, seat_menu_last_modified,
+)
+from .events import live_streams_enabled
+from .menu_cache import get_menu_item, get_menu_snapshot, render_menu_items
+from .idempotency import new_key, replayed_order, request_key
+from .reconciliation import SIGNATURE_HEADER, SettlementError, read_webhook_batch, reconcile, verify_signature
+from .seat_tokens import bind_seat, bound_seat, read_seat_token, unbind_seat
+from .services import place_order
+from .streams import payment_status_event
+from .theatre import remember_show, scanned_seat_map, seat_map, selected_show, show_for_seat
 import json
 
 
 def menu_view(request):
     """Display the food menu"""
-    food_items = FoodItem.objects.filter(available=True).order_by('name')
-    
-    # Initialize cart in session if not exists
-    if 'cart' not in request.session:
-        request.session['cart'] = {}
+    # Set even on a 304, so a per-show QR code always selects its show
+    response = _render_menu(request)
+    remember_show(request, response)
+    return response
+
+
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=menu_etag, last_modified_func=menu_last_modified)
+def _render_menu(request):
+    """Render the menu, or answer a conditional GET with 304"""
+    snapshot = get_menu_snapshot()
     
     context = {
-        'food_items': food_items,
-        'cart': request.session['cart'],
-        'cart_total': sum(item['price'] * item['quantity'] for item in request.session['cart'].values()),
-        'cart_count': sum(item['quantity'] for item in request.session['cart'].values())
+        'food_items': snapshot['food_items'],
+        'menu_items_html': render_menu_items(request, snapshot),
+        **get_cart(request).summary()
     }
     return render(request, 'food_booking/menu.html', context)
 
 
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=seat_menu_etag, last_modified_func=seat_menu_last_modified)
+def seat_menu(request, token):
+    """Menu and checkout on one page for the seat in a scanned QR code"""
+    seat = read_seat_token(token)
+    if seat is None:
+        messages.error(request, 'That QR code could not be read. Please choose your seat when ordering.')
+        return redirect('food_booking:menu')
+    
+    context = {
+        'seat': seat,
+        'express_items_html': get_menu_snapshot()['express_html'],
+        'payment_methods': Order.PAYMENT_METHOD_CHOICES,
+    }
+    response = render(request, 'food_booking/seat_menu.html', context)
+    bind_seat(response, seat)
+    return response
+
+
 @require_POST
 def add_to_cart(request):
     """Add item to cart"""
@@ -34,30 +74,12 @@ def add_to_cart(request):
         food_item_id = form.cleaned_data['food_item_id']
         quantity = form.cleaned_data['quantity']
         
-        try:
-            food_item = FoodItem.objects.get(id=food_item_id, available=True)
-            
-            # Initialize cart if not exists
-            if 'cart' not in request.session:
-                request.session['cart'] = {}
-            
-            cart = request.session['cart']
-            
-            # Add or update item in cart
-            if str(food_item_id) in cart:
-                cart[str(food_item_id)]['quantity'] += quantity
-            else:
-                cart[str(food_item_id)] = {
-                    'id': food_item_id,
-                    'name': food_item.name,
-                    'price': float(food_item.price),
-                    'quantity': quantity
-                }
-            
-            request.session.modified = True
+        # Checked against the cached menu so cart clicks stay off the database
+        food_item = get_menu_item(food_item_id)
+        if food_item:
+            get_cart(request).add(food_item_id, quantity)
             messages.success(request, f'{food_item.name} added to cart!')
-            
-        except FoodItem.DoesNotExist:
+        else:
             messages.error(request, 'Item not found or not available.')
     
     return redirect('food_booking:menu')
@@ -71,17 +93,14 @@ def update_cart(request):
         item_id = form.cleaned_data['item_id']
         quantity = form.cleaned_data['quantity']
         
-        cart = request.session.get('cart', {})
+        cart = get_cart(request)
         
-        if str(item_id) in cart:
+        if item_id in cart:
+            cart.set(item_id, quantity)
             if quantity <= 0:
-                del cart[str(item_id)]
                 messages.success(request, 'Item removed from cart.')
             else:
-                cart[str(item_id)]['quantity'] = quantity
                 messages.success(request, 'Cart updated successfully.')
-            
-            request.session.modified = True
     
     return redirect('food_booking:menu')
 
@@ -89,83 +108,98 @@ def update_cart(request):
 @require_POST
 def remove_from_cart(request, item_id):
     """Remove item from cart"""
-    cart = request.session.get('cart', {})
+    cart = get_cart(request)
     
-    if str(item_id) in cart:
-        item_name = cart[str(item_id)]['name']
-        del cart[str(item_id)]
-        request.session.modified = True
+    if item_id in cart:
+        cart.remove(item_id)
+        food_item = get_menu_item(item_id)
+        item_name = food_item.name if food_item else 'Item'
         messages.success(request, f'{item_name} removed from cart.')
     
     return redirect('food_booking:menu')
 
 
+def forget_seat(request):
+    """Clear a seat bound from a QR code, for customers sitting elsewhere"""
+    next_url = request.GET.get('next')
+    if not (next_url and url_has_allowed_host_and_scheme(next_url, allowed_hosts={request.get_host()})):
+        next_url = reverse('food_booking:menu')
+    response = redirect(next_url)
+    unbind_seat(response)
+    return response
+
+
 def order_form(request):
     """Display order form and handle submission"""
-    cart = request.session.get('cart', {})
+    # A repeated submission goes back to the order it already created,
+    # even though the first one has emptied the cart
+    key = request_key(request) if request.method == 'POST' else None
+    order = replayed_order(key)
+    if order is not None:
+        return redirect('food_booking:order_confirmation', order_id=order.id)
+    
+    cart = get_cart(request)
+    summary = cart.summary()
     
-    if not cart:
+    if not summary['cart']:
         messages.warning(request, 'Your cart is empty. Please add some items first.')
         return redirect('food_booking:menu')
     
+    # The seat grid follows the auditorium of the show being ordered for;
+    # a seat scanned from a QR code fixes both and skips seat selection
+    seat = bound_seat(request)
+    if seat is not None:
+        show = show_for_seat(seat, request.POST.get('show') or request.GET.get('show'))
+        seats = scanned_seat_map(seat, show)
+    else:
+        show = selected_show(request)
+        seats = seat_map(show.auditorium) if show else None
+    
     if request.method == 'POST':
-        form = OrderForm(request.POST)
+        form = OrderForm(request.POST, seat_map=seats)
         if form.is_valid():
-            # Create order
-            order = Order()
             # Combine row and seat number
             row_letter = form.cleaned_data['row_letter']
             seat_num = form.cleaned_data['seat_number']
-            if row_letter and seat_num:
-                order.seat_number = f"{row_letter}{seat_num}"
-            else:
+            if not (row_letter and seat_num):
                 messages.error(request, 'Please select both row and seat number.')
                 return render(request, 'food_booking/order_form.html', {
-                    'form': form,
-                    'cart': cart,
-                    'cart_total': cart_total,
-                    'cart_count': sum(item['quantity'] for item in cart.values())
+                    'form': form, 'show': show, 'seat': seat, 'idempotency_key': key or new_key(), **summary
                 })
             
-            order.customer_name = form.cleaned_data['customer_name']
-            order.mobile_number = form.cleaned_data['mobile_number']
-            order.payment_method = form.cleaned_data['payment_method']
-            order.total_amount = sum(item['price'] * item['quantity'] for item in cart.values())
-            order.save()
-            
-            # Create order items
-            for item_id, item_data in cart.items():
-                try:
-                    food_item = FoodItem.objects.get(id=item_data['id'])
-                    OrderItem.objects.create(
-                        order=order,
-                        food_item=food_item,
-                        quantity=item_data['quantity'],
-                        price=food_item.price
-                    )
-                except FoodItem.DoesNotExist:
-                    continue
+            # Create order and order items in one transaction
+            order = place_order(
+                {line['id']: line['quantity'] for line in summary['cart']},
+                seat_number=f"{row_letter}{seat_num}",
+                customer_name=form.cleaned_data['customer_name'],
+                mobile_number=form.cleaned_data['mobile_number'],
+                payment_method=form.cleaned_data['payment_method'],
+                show=show,
+                idempotency_key=key,
+            )
             
             # Clear cart
-            del request.session['cart']
-            request.session.modified = True
+            cart.clear()
             
             messages.success(request, 'Order placed successfully!')
             return redirect('food_booking:order_confirmation', order_id=order.id)
     else:
-        form = OrderForm()
-    
-    cart_total = sum(item['price'] * item['quantity'] for item in cart.values())
+        initial = {'row_letter': seat.row, 'seat_number': str(seat.number)} if seat else None
+        form = OrderForm(seat_map=seats, initial=initial)
     
     context = {
         'form': form,
-        'cart': cart,
-        'cart_total': cart_total,
-        'cart_count': sum(item['quantity'] for item in cart.values())
+        'show': show,
+        'seat': seat,
+        # Reused when an invalid form is shown again, so retries still match
+        'idempotency_key': key or new_key(),
+        **summary
     }
     return render(request, 'food_booking/order_form.html', context)
 
 
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=order_etag, last_modified_func=order_last_modified)
 def order_confirmation(request, order_id):
     """Display order confirmation"""
     order = get_object_or_404(Order, id=order_id)
@@ -174,16 +208,27 @@ def order_confirmation(request, order_id):
     context = {
         'order': order,
         'order_items': order_items,
+        'live_streams': live_streams_enabled(),
         'cart_count': 0  # No cart items on confirmation page
     }
     return render(request, 'food_booking/order_confirmation.html', context)
 
 
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=order_etag, last_modified_func=order_last_modified)
+def order_status(request, order_id):
+    """An order's payment status as JSON, polled by the confirmation page when streams are off"""
+    payment_status = Order.objects.filter(pk=order_id).values_list('payment_status', flat=True).first()
+    if payment_status is None:
+        raise Http404('No Order matches the given query.')
+    return JsonResponse(payment_status_event(payment_status))
+
+
 def clear_cart(request):
     """Clear the entire cart"""
-    if 'cart' in request.session:
-        del request.session['cart']
-        request.session.modified = True
+    cart = get_cart(request)
+    if cart.items:
+        cart.clear()
         messages.success(request, 'Cart cleared successfully.')
     
     return redirect('food_booking:menu')
@@ -202,38 +247,150 @@ def api_add_to_cart(request):
         if not food_item_id or quantity < 1:
             return JsonResponse({'success': False, 'message': 'Invalid data'})
         
-        food_item = FoodItem.objects.get(id=food_item_id, available=True)
-        
-        # Initialize cart if not exists
-        if 'cart' not in request.session:
-            request.session['cart'] = {}
-        
-        cart = request.session['cart']
-        
-        # Add or update item in cart
-        if str(food_item_id) in cart:
-            cart[str(food_item_id)]['quantity'] += quantity
-        else:
-            cart[str(food_item_id)] = {
-                'id': food_item_id,
-                'name': food_item.name,
-                'price': float(food_item.price),
-                'quantity': quantity
-            }
-        
-        request.session.modified = True
+        food_item = get_menu_item(food_item_id)
+        if food_item is None:
+            return JsonResponse({'success': False, 'message': 'Invalid request'})
         
-        cart_total = sum(item['price'] * item['quantity'] for item in cart.values())
-        cart_count = sum(item['quantity'] for item in cart.values())
+        cart = get_cart(request)
+        cart.add(food_item_id, quantity)
+        summary = cart.summary()
         
         return JsonResponse({
             'success': True,
             'message': f'{food_item.name} added to cart!',
-            'cart_total': cart_total,
-            'cart_count': cart_count
+            'cart_total': float(summary['cart_total']),
+            'cart_count': summary['cart_count']
         })
         
-    except (json.JSONDecodeError, FoodItem.DoesNotExist, ValueError):
+    except (json.JSONDecodeError, ValueError):
         return JsonResponse({'success': False, 'message': 'Invalid request'})
     except Exception as e:
         return JsonResponse({'success': False, 'message': str(e)})
+
+
+@csrf_exempt
+@require_POST
+def api_cart_batch(request):
+    """API endpoint applying several cart changes in one request"""
+    try:
+        data = json.loads(request.body)
+    except (json.JSONDecodeError, UnicodeDecodeError):
+        return JsonResponse({'success': False, 'message': 'Invalid request'})
+    
+    cart = get_cart(request)
+    try:
+        apply_operations(cart, data.get('operations') if isinstance(data, dict) else None)
+    except CartOperationError as e:
+        return JsonResponse({'success': False, 'message': str(e), 'operation': e.index})
+    
+    summary = cart.summary()
+    return JsonResponse({
+        'success': True,
+        'items': {str(line['id']): line['quantity'] for line in summary['cart']},
+        'cart_total': float(summary['cart_total']),
+        'cart_count': summary['cart_count']
+    })
+
+
+def order_response(order, status=201):
+    """Compact JSON description of a placed order for API clients"""
+    return JsonResponse({
+        'success': True,
+        'order_id': order.id,
+        'seat_number': order.seat_number,
+        'total_amount': str(order.total_amount),
+        'payment_status': order.payment_status,
+        'confirmation_url': reverse('food_booking:order_confirmation', args=[order.id]),
+    }, status=status)
+
+
+@csrf_exempt
+@require_POST
+def api_place_order(request):
+    """Stateless order placement for kiosks and seat tablets
+
+    The body carries the whole order: ``items`` as a list of
+    ``{"food_item_id", "quantity"}`` lines plus the fields of the order
+    form (``customer_name``, ``mobile_number``, ``payment_method``,
+    ``row_letter``, ``seat_number``) and an optional ``show``. A
+    ``seat_token`` from a seat's QR code can stand in for the row and
+    seat. Lines and customer details are checked with the same rules as
+    the cart and OrderForm. An Idempotency-Key header makes retries
+    return the original order.
+    """
+    key = request_key(request)
+    order = replayed_order(key)
+    if order is not None:
+        return order_response(order, status=200)
+    
+    try:
+        data = json.loads(request.body)
+    except (json.JSONDecodeError, UnicodeDecodeError):
+        return JsonResponse({'success': False, 'message': 'Invalid request'}, status=400)
+    if not isinstance(data, dict):
+        return JsonResponse({'success': False, 'message': 'Invalid request'}, status=400)
+    
+    # Validate the lines against the cached menu, exactly like cart batches
+    items = data.get('items')
+    operations = [
+        {**line, 'op': 'add'} if isinstance(line, dict) else line for line in items
+    ] if isinstance(items, list) else None
+    cart = Cart(None, {})
+    try:
+        apply_operations(cart, operations, get_menu_snapshot())
+    except CartOperationError as e:
+        return JsonResponse({'success': False, 'message': str(e), 'item': e.index}, status=400)
+    
+    details = {
+        field: data.get(field) for field in (
+            'customer_name', 'mobile_number', 'payment_method', 'row_letter', 'seat_number'
+        )
+    }
+    if data.get('seat_token'):
+        seat = read_seat_token(data['seat_token'])
+        if seat is None:
+            return JsonResponse({'success': False, 'message': 'Invalid seat token'}, status=400)
+        show = show_for_seat(seat, data.get('show'))
+        details.update(row_letter=seat.row, seat_number=str(seat.number))
+        seats = scanned_seat_map(seat, show)
+    else:
+        show = selected_show(request, data.get('show'))
+        seats = seat_map(show.auditorium) if show else None
+    
+    form = OrderForm(details, seat_map=seats)
+    if not form.is_valid():
+        return JsonResponse({
+            'success': False,
+            'message': 'Invalid order details',
+            'errors': {field: [str(error) for error in errors] for field, errors in form.errors.items()},
+        }, status=400)
+    
+    order = place_order(
+        cart.items,
+        seat_number=f"{form.cleaned_data['row_letter']}{form.cleaned_data['seat_number']}",
+        customer_name=form.cleaned_data['customer_name'],
+        mobile_number=form.cleaned_data['mobile_number'],
+        payment_method=form.cleaned_data['payment_method'],
+        show=show,
+        idempotency_key=key,
+    )
+    return order_response(order)
+
+
+@csrf_exempt
+@require_POST
+def payment_webhook(request):
+    """Settlement batches pushed by the payment gateway, signed with a shared secret"""
+    secret = getattr(settings, 'FOOD_BOOKING_PAYMENT_WEBHOOK_SECRET', '')
+    if not verify_signature(request.body, secret, request.headers.get(SIGNATURE_HEADER)):
+        return JsonResponse({'success': False, 'message': 'Invalid signature'}, status=403)
+    
+    try:
+        transactions = read_webhook_batch(json.loads(request.body))
+    except (json.JSONDecodeError, UnicodeDecodeError):
+        return JsonResponse({'success': False, 'message': 'Invalid request'}, status=400)
+    except SettlementError as e:
+        return JsonResponse({'success': False, 'message': str(e), 'line': e.line}, status=400)
+    
+    counts = reconcile(transactions)
+    return JsonResponse({'success': True, 'results': dict(counts)})
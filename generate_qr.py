@@ -10,6 +10,9 @@ Requirements:
 
 Usage:
     python generate_qr.py
+
+For per-seat and per-show codes, printed as sheets, use:
+    python manage.py generate_qr_codes --base-url https://yourdomain.com
 """
 
 import qrcode
@@ -82,9 +85,9 @@ def main():
     print("1. Print the generated QR codes")
     print("2. Place the main QR code at the entrance and common areas")
     print("3. Place section-specific QR codes at the respective sections")
-    print("4. Each seat can use any QR code - they all lead to the same menu")
+    print("4. These codes all lead to the same menu")
     print("5. Customers scan the QR code to access the food ordering system")
-    print("6. No need to create individual QR codes for each seat")
+    print("6. For a code on every seat, run: python manage.py generate_qr_codes")
     print("="*60)
 
 if __name__ == "__main__":
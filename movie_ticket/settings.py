@@ -47,6 +47,7 @@ MIDDLEWARE = [
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
+    'food_booking.cart.CartMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
@@ -78,10 +79,68 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # Take the write lock when a transaction starts, so concurrent order
+        # placements queue for it instead of failing with "database is locked"
+        'OPTIONS': {
+            'transaction_mode': 'IMMEDIATE',
+            'timeout': 20,
+        },
     }
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# The menu snapshot is versioned through this cache, so every worker must
+# share it: a per-process cache would keep serving (and pricing carts from)
+# an old menu in the workers that did not handle the change. The file cache
+# is shared by every worker on one server; use Redis or Memcached when
+# running on several servers.
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': BASE_DIR / 'cache',
+        'OPTIONS': {
+            'MAX_ENTRIES': 10000,
+        },
+    }
+}
+
+# Where customer carts are kept: SignedCookieCartBackend (no server state),
+# CacheCartBackend (shared cache) or SessionCartBackend (database sessions)
+
+FOOD_BOOKING_CART_BACKEND = 'food_booking.cart.SignedCookieCartBackend'
+
+# Serve the menu, order confirmation and cart APIs from async views. Only
+# enable this when running under an ASGI server (movie_ticket.asgi).
+
+FOOD_BOOKING_ASYNC_VIEWS = False
+
+# Push payment statuses and kitchen orders over server-sent events. Every
+# open stream holds its connection, so only enable this under an ASGI server
+# (movie_ticket.asgi) running one process, as the in-process broker and
+# kitchen board cannot reach other processes. Without it, confirmation pages
+# poll and kitchen screens reload instead.
+
+FOOD_BOOKING_LIVE_STREAMS = False
+
+# Pub/sub used for live payment status streams. The in-process broker only
+# reaches customers connected to the same process as the change.
+
+FOOD_BOOKING_EVENT_BROKER = 'food_booking.events.InProcessBroker'
+
+# Kitchen counters and the seat rows each one serves
+
+FOOD_BOOKING_COUNTERS = {
+    'main': 'ABCDEFGHIJKLMNOPQRSTUVWXYZ',
+}
+
+# Shared secret the payment gateway signs settlement webhooks with. The
+# webhook is refused while this is empty.
+
+FOOD_BOOKING_PAYMENT_WEBHOOK_SECRET = ''
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 